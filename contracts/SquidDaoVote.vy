@@ -4,6 +4,7 @@
 @title SQUID DAO Vote Calculator
 @notice Signal vote caps at 8 tokens, Squid has too many tentacles
 @dev Combines naked SQUID plus equivalent LPs (SQUID/ETH) via Curve, Convex, Stake DAO
+     Tentacles live in an ordered registry, so new LP wrappers are added without a redeploy
 @author Leviathan News
 @license MIT
 
@@ -60,24 +61,57 @@ interface ThreeCrypto:
     def price_oracle(i: uint256) -> uint256: view
 
 
+# ============================================================================================
+# 📣 EVENTS
+# ============================================================================================
+
+event TentacleAdded:
+    token: indexed(address)
+    pool: indexed(address)
+    index: uint256
+
+event TentacleRemoved:
+    token: indexed(address)
+
+event OwnershipTransferred:
+    previous_owner: indexed(address)
+    new_owner: indexed(address)
+
+
+# ============================================================================================
+# 🐙 STRUCTS & CONSTANTS
+# ============================================================================================
+
+# A single source of voting power. Naked SQUID has no pool (empty address)
+struct Tentacle:
+    token: IERC20
+    pool: TwoCrypto
+    index: uint256
+
+# A Curve pool shared by one or more LP wrappers, valued once per call
+struct LPPool:
+    pool: TwoCrypto
+    index: uint256
+
+MAX_TENTACLES: constant(uint256) = 16
+MAX_POOLS: constant(uint256) = 16
+MAX_BATCH: constant(uint256) = 256
+DUST_THRESHOLD: constant(uint256) = 10_000_000
+
+
 # ============================================================================================
 # 💾 STORAGE
 # ============================================================================================
 
+owner: public(address)
+
 # NAKED SQUID 🦑🛀
 squid_token: IERC20
 
-# SQUID / ETH LP 🦑💎
-squid_eth_lp_token: IERC20
-squid_eth_gauge: IERC20
-squid_eth_cvx: IERC20
-squid_eth_stakedao: IERC20
-
-# SQUID / SQUILL LP 🦑🪶
-squill_lp_token: IERC20
-squill_gauge: IERC20
-squill_cvx: IERC20
-squill_stakedao: IERC20
+# TENTACLE REGISTRY 🐙
+tentacles: public(DynArray[Tentacle, MAX_TENTACLES])
+tentacle_pool_ids: DynArray[uint256, MAX_TENTACLES]
+lp_pools: public(DynArray[LPPool, MAX_POOLS])
 
 # PRICE ORACLES ⚖️
 squid_eth_pool: TwoCrypto
@@ -90,27 +124,26 @@ eth_usd_pool: ThreeCrypto
 # ============================================================================================
 
 @deploy
-def __init__():
+def __init__(
+    squid_token: IERC20,
+    squid_eth_pool: TwoCrypto,
+    squill_squid_pool: TwoCrypto,
+    eth_usd_pool: ThreeCrypto,
+    tentacles: DynArray[Tentacle, MAX_TENTACLES],
+):
+    self.owner = msg.sender
 
     # NAKED SQUID 🦑🛀
-    self.squid_token = IERC20(0x6e58089d8E8f664823d26454f49A5A0f2fF697Fe)
-
-    # SQUID/ETH LP 🦑💎
-    self.squid_eth_lp_token = IERC20(0x277FA53c8a53C880E0625c92C92a62a9F60f3f04)
-    self.squid_eth_gauge = IERC20(0xe5E5ed1B50AE33E66ca69dF17Aa6381FDe4e9C7e)
-    self.squid_eth_cvx = IERC20(0x29FF8F9ACb27727D8A2A52D16091c12ea56E9E4d)
-    self.squid_eth_stakedao = IERC20(0x8CDCDccAB3fC79c267B8361AdDAefD3aADaB9778)
-
-    # SQUID/SQUILL LP 🦑🪶
-    self.squill_lp_token = IERC20(0xb2B1458960E4d64716c8C472c114441A02fBA1De)
-    self.squill_gauge = IERC20(0x9bC291018e0434a21218A16005B0e198b4814ba8)
-    self.squill_cvx = IERC20(0x1CC03c1C714f767ca866A3Fa58c9153b1C087E85)
-    self.squill_stakedao = IERC20(0x9C1a1b52Bf2c42B6e7E2dCdAEF260b60386Ad76b)
+    self.squid_token = squid_token
 
     # PRICE ORACLES ⚖️
-    self.squid_eth_pool = TwoCrypto(0x277FA53c8a53C880E0625c92C92a62a9F60f3f04)
-    self.squill_squid_pool = TwoCrypto(0xb2B1458960E4d64716c8C472c114441A02fBA1De)
-    self.eth_usd_pool = ThreeCrypto(0xa0D3911349e701A1F49C1Ba2dDA34b4ce9636569)
+    self.squid_eth_pool = squid_eth_pool
+    self.squill_squid_pool = squill_squid_pool
+    self.eth_usd_pool = eth_usd_pool
+
+    # TENTACLE REGISTRY 🐙
+    for tentacle: Tentacle in tentacles:
+        self._add_tentacle(tentacle)
 
 
 # ============================================================================================
@@ -122,18 +155,85 @@ def __init__():
 def balanceOf(addr: address) -> uint256:
     """
     @notice Calculate the total SQUID voting power for an address
-    @dev Combines three types of token holdings to determine total voting power:
-         - Naked SQUID tokens (direct holdings)
-         - SQUID/ETH LP tokens (converted to SQUID equivalent)
-         - SQUID/SQUILL LP tokens (converted to SQUID equivalent)
+    @dev Walks the tentacle registry once. Naked SQUID is added directly, LP wrappers
+         are summed per underlying pool and each pool is valued once per call
     @param addr The address for which to check voting power
     @return Total SQUID equivalent voting power for the address
     """
-    total_bal: uint256 = self._squid_balance(addr)
-    total_bal += self._squid_lp_balance_in_squid(addr)
-    total_bal += self._squill_lp_balance_in_squid(addr)
+    return self._voting_power(addr, self.tentacles, self.tentacle_pool_ids, self.lp_pools)
 
-    return total_bal
+
+# ======================
+# BATCH CENSUS 🗳️
+# ======================
+
+@external
+@view
+def balanceOfBatch(voters: DynArray[address, MAX_BATCH]) -> DynArray[uint256, MAX_BATCH]:
+    """
+    @notice Calculate voting power for many addresses in one call
+    @dev ABI-array form of balanceOfPacked, reads the registry once per batch
+    @param voters Addresses to score
+    @return Voting power of each address, in order
+    """
+    tentacles: DynArray[Tentacle, MAX_TENTACLES] = self.tentacles
+    pool_ids: DynArray[uint256, MAX_TENTACLES] = self.tentacle_pool_ids
+    lp_pools: DynArray[LPPool, MAX_POOLS] = self.lp_pools
+
+    powers: DynArray[uint256, MAX_BATCH] = []
+    for voter: address in voters:
+        powers.append(self._voting_power(voter, tentacles, pool_ids, lp_pools))
+    return powers
+
+
+@external
+@view
+def balanceOfPacked(voters: Bytes[MAX_BATCH * 20]) -> Bytes[MAX_BATCH * 32 + 64]:
+    """
+    @notice Calculate voting power for many addresses using packed calldata
+    @dev Addresses are concatenated 20-byte words instead of ABI-padded 32-byte words,
+         which saves 12 zero bytes of L2 calldata per voter. The registry is read
+         once per batch
+    @param voters Concatenated 20-byte addresses
+    @return Concatenated 32-byte big-endian voting powers, in order
+    """
+    assert len(voters) % 20 == 0, "Bad packing"
+
+    tentacles: DynArray[Tentacle, MAX_TENTACLES] = self.tentacles
+    pool_ids: DynArray[uint256, MAX_TENTACLES] = self.tentacle_pool_ids
+    lp_pools: DynArray[LPPool, MAX_POOLS] = self.lp_pools
+
+    powers: DynArray[uint256, MAX_BATCH] = []
+    for i: uint256 in range(len(voters) // 20, bound=MAX_BATCH):
+        voter: address = convert(convert(slice(voters, i * 20, 20), bytes20), address)
+        powers.append(self._voting_power(voter, tentacles, pool_ids, lp_pools))
+
+    # Drop the ABI offset and length words, keeping the raw uint256 words
+    return slice(abi_encode(powers), 64, len(powers) * 32)
+
+
+# ======================
+# TENTACLE REGISTRY 🐙
+# ======================
+
+@external
+@view
+def tentacle_count() -> uint256:
+    """
+    @notice Get the number of registered tentacles
+    @return Length of the tentacle registry
+    """
+    return len(self.tentacles)
+
+
+@external
+@view
+def lp_pool_count() -> uint256:
+    """
+    @notice Get the number of distinct LP pools backing the registry
+    @return Length of the LP pool list
+    """
+    return len(self.lp_pools)
 
 
 # ======================
@@ -165,7 +265,7 @@ def squid_lp_balance(addr: address) -> uint256:
     @param addr The address for which to check SQUID/ETH LP balance
     @return Total amount of SQUID/ETH LP tokens held by the address
     """
-    return self._squid_lp_balance(addr)
+    return self._pool_lp_balance(addr, self.squid_eth_pool)
 
 
 @external
@@ -177,7 +277,7 @@ def squid_lp_balance_in_squid(addr: address) -> uint256:
     @param addr The address for which to check SQUID/ETH LP balance
     @return SQUID equivalent value of the address's SQUID/ETH LP tokens
     """
-    return self._squid_lp_balance_in_squid(addr)
+    return self._pool_lp_balance_in_squid(addr, self.squid_eth_pool)
 
 
 # ======================
@@ -193,7 +293,7 @@ def squill_lp_balance(addr: address) -> uint256:
     @param addr The address to check SQUID/SQUILL LP balance for
     @return Total amount of SQUID/SQUILL LP tokens held by the address
     """
-    return self._squill_lp_balance(addr)
+    return self._pool_lp_balance(addr, self.squill_squid_pool)
 
 
 @external
@@ -205,7 +305,7 @@ def squill_lp_balance_in_squid(addr: address) -> uint256:
     @param addr The address to check SQUID/SQUILL LP balance for
     @return SQUID equivalent value of the address's SQUID/SQUILL LP tokens
     """
-    return self._squill_lp_balance_in_squid(addr)
+    return self._pool_lp_balance_in_squid(addr, self.squill_squid_pool)
 
 
 # ======================
@@ -254,7 +354,8 @@ def squid_lp_equivalent(quantity: uint256 = 10**18) -> uint256:
     @param quantity Amount of SQUID/ETH LP tokens to convert (defaults to 1 LP token)
     @return SQUID equivalent amount for the given LP token quantity
     """
-    return self._squid_lp_equivalent(quantity)
+    lp_pool: LPPool = self._lp_pool(self.squid_eth_pool)
+    return self._lp_equivalent(lp_pool.pool, lp_pool.index, quantity)
 
 
 @external
@@ -266,7 +367,81 @@ def squill_lp_equivalent(quantity: uint256 = 10**18) -> uint256:
     @param quantity Amount of SQUID/SQUILL LP tokens to convert (defaults to 1 LP token)
     @return SQUID equivalent amount for the given LP token quantity
     """
-    return self._squill_lp_equivalent(quantity)
+    lp_pool: LPPool = self._lp_pool(self.squill_squid_pool)
+    return self._lp_equivalent(lp_pool.pool, lp_pool.index, quantity)
+
+
+# ============================================================================================
+# 🔐 ADMIN FUNCTIONS
+# ============================================================================================
+
+@external
+def add_tentacle(tentacle: Tentacle):
+    """
+    @notice Register a new source of voting power
+    @dev Wrappers of an already registered pool join that pool's group, so the pool
+         is still valued only once per balanceOf call
+    @param tentacle Wrapper token, underlying pool (empty for naked SQUID) and SQUID coin index
+    """
+    assert msg.sender == self.owner, "Only owner"
+    self._add_tentacle(tentacle)
+
+
+@external
+def remove_tentacle(token: IERC20):
+    """
+    @notice Remove a source of voting power, keeping the order of the rest
+    @dev A pool group goes with its last wrapper, so add/remove cycles never fill MAX_POOLS
+    @param token Wrapper token to remove
+    """
+    assert msg.sender == self.owner, "Only owner"
+
+    removed: Tentacle = empty(Tentacle)
+    removed_id: uint256 = 0
+    tentacles: DynArray[Tentacle, MAX_TENTACLES] = []
+    pool_ids: DynArray[uint256, MAX_TENTACLES] = []
+    for i: uint256 in range(len(self.tentacles), bound=MAX_TENTACLES):
+        if self.tentacles[i].token != token:
+            tentacles.append(self.tentacles[i])
+            pool_ids.append(self.tentacle_pool_ids[i])
+        else:
+            removed = self.tentacles[i]
+            removed_id = self.tentacle_pool_ids[i]
+
+    assert len(tentacles) < len(self.tentacles), "Unknown tentacle"
+
+    last_of_pool: bool = removed.pool.address != empty(address)
+    for tentacle: Tentacle in tentacles:
+        if tentacle.pool == removed.pool:
+            last_of_pool = False
+
+    if last_of_pool:
+        # Last wrapper of its pool: drop the group and shift the later group ids down
+        lp_pools: DynArray[LPPool, MAX_POOLS] = []
+        for i: uint256 in range(len(self.lp_pools), bound=MAX_POOLS):
+            if i != removed_id:
+                lp_pools.append(self.lp_pools[i])
+        self.lp_pools = lp_pools
+
+        for i: uint256 in range(len(pool_ids), bound=MAX_TENTACLES):
+            if tentacles[i].pool.address != empty(address) and pool_ids[i] > removed_id:
+                pool_ids[i] -= 1
+
+    self.tentacles = tentacles
+    self.tentacle_pool_ids = pool_ids
+
+    log TentacleRemoved(token=token.address)
+
+
+@external
+def transfer_ownership(new_owner: address):
+    """
+    @notice Hand the tentacle registry over to a new owner
+    @param new_owner Address allowed to add and remove tentacles
+    """
+    assert msg.sender == self.owner, "Only owner"
+    log OwnershipTransferred(previous_owner=self.owner, new_owner=new_owner)
+    self.owner = new_owner
 
 
 # ============================================================================================
@@ -274,75 +449,116 @@ def squill_lp_equivalent(quantity: uint256 = 10**18) -> uint256:
 # ============================================================================================
 
 # ======================
-# NAKED SQUID 🦑🛀
+# TENTACLE REGISTRY 🐙
 # ======================
 
 @internal
-@view
-def _squid_balance(addr: address) -> uint256:
-    return staticcall self.squid_token.balanceOf(addr)
+def _add_tentacle(tentacle: Tentacle):
+    assert len(self.tentacles) < MAX_TENTACLES, "Too many tentacles"
+    for existing: Tentacle in self.tentacles:
+        assert existing.token != tentacle.token, "Duplicate tentacle"
 
+    pool_id: uint256 = 0
+    if tentacle.pool.address != empty(address):
+        # SQUID index sanity check or burn it all
+        assert (staticcall tentacle.pool.coins(tentacle.index)) == self.squid_token.address
+
+        pool_id = len(self.lp_pools)
+        for i: uint256 in range(len(self.lp_pools), bound=MAX_POOLS):
+            if self.lp_pools[i].pool == tentacle.pool:
+                assert self.lp_pools[i].index == tentacle.index, "Index mismatch"
+                pool_id = i
+                break
+
+        if pool_id == len(self.lp_pools):
+            self.lp_pools.append(LPPool(pool=tentacle.pool, index=tentacle.index))
+
+    self.tentacles.append(tentacle)
+    self.tentacle_pool_ids.append(pool_id)
+
+    log TentacleAdded(token=tentacle.token.address, pool=tentacle.pool.address, index=tentacle.index)
 
-# ======================
-# SQUID/ETH LP 🦑💎
-# ======================
 
 @internal
 @view
-def _squid_lp_balance(addr: address) -> uint256:
-    lp_val: uint256 = staticcall self.squid_eth_lp_token.balanceOf(addr)
-    lp_val += staticcall self.squid_eth_gauge.balanceOf(addr)
-    lp_val += staticcall self.squid_eth_cvx.balanceOf(addr)
-    lp_val += staticcall self.squid_eth_stakedao.balanceOf(addr)
-    return lp_val
+def _voting_power(
+    addr: address,
+    tentacles: DynArray[Tentacle, MAX_TENTACLES],
+    pool_ids: DynArray[uint256, MAX_TENTACLES],
+    lp_pools: DynArray[LPPool, MAX_POOLS],
+) -> uint256:
+    lp_bals: uint256[MAX_POOLS] = empty(uint256[MAX_POOLS])
+
+    total_bal: uint256 = 0
+    for i: uint256 in range(len(tentacles), bound=MAX_TENTACLES):
+        bal: uint256 = staticcall tentacles[i].token.balanceOf(addr)
+        if tentacles[i].pool.address == empty(address):
+            total_bal += bal
+        else:
+            lp_bals[pool_ids[i]] += bal
+
+    # Per voter, a pool whose summed LP is dust (or zero) is never priced
+    for i: uint256 in range(len(lp_pools), bound=MAX_POOLS):
+        total_bal += self._lp_balance_in_squid(lp_bals[i], lp_pools[i])
+
+    return total_bal
 
 
 @internal
 @view
-def _squid_lp_balance_in_squid(addr: address) -> uint256:
-    bal: uint256 = self._squid_lp_balance(addr)
-    if bal < 10_000_000:  # Dust protection
-        return 0
+def _lp_pool(pool: TwoCrypto) -> LPPool:
+    for lp_pool: LPPool in self.lp_pools:
+        if lp_pool.pool == pool:
+            return lp_pool
+    raise "Unknown pool"
 
-    rate: uint256 = self._squid_lp_equivalent(bal)
-    return bal * rate // 10**18
 
+# ======================
+# NAKED SQUID 🦑🛀
+# ======================
 
 @internal
 @view
-def _squid_lp_equivalent(quantity: uint256 = 10**18) -> uint256:
-    return self._lp_equivalent(self.squid_eth_pool, 1, quantity)
+def _squid_balance(addr: address) -> uint256:
+    bal: uint256 = 0
+    for tentacle: Tentacle in self.tentacles:
+        if tentacle.pool.address == empty(address):
+            bal += staticcall tentacle.token.balanceOf(addr)
+    return bal
 
 
 # ======================
-# SQUID/SQUILL LP 🦑🪶
+# LP TENTACLES 🦑💎🪶
 # ======================
 
 @internal
 @view
-def _squill_lp_balance(addr: address) -> uint256:
-    lp_val: uint256 = staticcall self.squill_lp_token.balanceOf(addr)
-    lp_val += staticcall self.squill_gauge.balanceOf(addr)
-    lp_val += staticcall self.squill_cvx.balanceOf(addr)
-    lp_val += staticcall self.squill_stakedao.balanceOf(addr)
+def _pool_lp_balance(addr: address, pool: TwoCrypto) -> uint256:
+    lp_val: uint256 = 0
+    for tentacle: Tentacle in self.tentacles:
+        if tentacle.pool == pool:
+            lp_val += staticcall tentacle.token.balanceOf(addr)
     return lp_val
 
 
 @internal
 @view
-def _squill_lp_balance_in_squid(addr: address) -> uint256:
-    bal: uint256 = self._squill_lp_balance(addr)
-    if bal < 10_000_000:  # Dust protection
-        return 0
-
-    rate: uint256 = self._squill_lp_equivalent(bal)
-    return bal * rate // 10**18
+def _pool_lp_balance_in_squid(addr: address, pool: TwoCrypto) -> uint256:
+    # A pool with no wrappers left has no group, and nothing to value
+    for lp_pool: LPPool in self.lp_pools:
+        if lp_pool.pool == pool:
+            return self._lp_balance_in_squid(self._pool_lp_balance(addr, pool), lp_pool)
+    return 0
 
 
 @internal
 @view
-def _squill_lp_equivalent(quantity: uint256 = 10**18) -> uint256:
-    return self._lp_equivalent(self.squill_squid_pool, 0, quantity)
+def _lp_balance_in_squid(bal: uint256, lp_pool: LPPool) -> uint256:
+    if bal < DUST_THRESHOLD:  # Dust protection
+        return 0
+
+    rate: uint256 = self._lp_equivalent(lp_pool.pool, lp_pool.index, bal)
+    return bal * rate // 10**18
 
 
 # ======================
@@ -380,8 +596,7 @@ def _squill_usd_price() -> uint256:
 @internal
 @view
 def _lp_equivalent(pool: TwoCrypto, index: uint256, quantity: uint256) -> uint256:
-    # SQUID index sanity check or burn it all
-    assert (staticcall pool.coins(index) == self.squid_token.address)
+    # SQUID index is checked once, when the pool is registered
 
     # Effective SQUID single-sided withdraw amount
     retval: uint256 = 0
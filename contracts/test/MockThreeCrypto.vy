@@ -0,0 +1,24 @@
+# @version 0.3.10
+
+"""
+@notice Mock Curve ThreeCrypto price oracle for testing
+"""
+
+
+prices: public(uint256[2])
+
+
+@external
+def __init__(_prices: uint256[2]):
+    self.prices = _prices
+
+
+@external
+@view
+def price_oracle(k: uint256) -> uint256:
+    return self.prices[k]
+
+
+@external
+def set_prices(_prices: uint256[2]):
+    self.prices = _prices
@@ -0,0 +1,49 @@
+# @version 0.3.10
+
+"""
+@notice Mock Curve TwoCrypto pool for testing
+@dev Single-sided withdrawals are priced as a proportional withdraw plus a
+     constant-product swap of the other side, so the SQUID-per-LP rate falls
+     as the quantity grows, like the real pools.
+"""
+
+
+coins: public(address[2])
+balances: public(uint256[2])
+totalSupply: public(uint256)
+price_oracle: public(uint256)
+fee: public(uint256)
+
+
+@external
+def __init__(_coins: address[2], _balances: uint256[2], _total_supply: uint256, _price_oracle: uint256):
+    self.coins = _coins
+    self.balances = _balances
+    self.totalSupply = _total_supply
+    self.price_oracle = _price_oracle
+
+
+@external
+@view
+def calc_withdraw_one_coin(token_amount: uint256, i: uint256) -> uint256:
+    assert token_amount <= self.totalSupply
+    j: uint256 = 1 - i
+
+    share_i: uint256 = self.balances[i] * token_amount / self.totalSupply
+    share_j: uint256 = self.balances[j] * token_amount / self.totalSupply
+    swapped: uint256 = (self.balances[i] - share_i) * share_j / self.balances[j]
+
+    out: uint256 = share_i + swapped
+    return out - out * self.fee / 10**10
+
+
+@external
+def set_state(_balances: uint256[2], _total_supply: uint256, _price_oracle: uint256):
+    self.balances = _balances
+    self.totalSupply = _total_supply
+    self.price_oracle = _price_oracle
+
+
+@external
+def set_fee(_fee: uint256):
+    self.fee = _fee
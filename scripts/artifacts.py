@@ -0,0 +1,156 @@
+"""
+Precompiled build artifacts for SquidDaoVote.
+
+``python -m scripts.artifacts`` compiles ``contracts/SquidDaoVote.vy`` and
+writes ``artifacts/SquidDaoVote.json`` (ABI, bytecode, method identifiers,
+storage layout).  ``python -m scripts.artifacts --check`` exits non-zero if
+the artifact no longer matches the source hash.
+
+Reading artifacts never imports the Vyper compiler; only ``build_artifacts``
+does, lazily.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTRACT_PATH = os.path.join("contracts", "SquidDaoVote.vy")
+ARTIFACT_PATH = os.path.join("artifacts", "SquidDaoVote.json")
+
+OUTPUT_FORMATS = ["abi", "bytecode", "bytecode_runtime", "method_identifiers", "layout"]
+
+
+class StaleArtifactError(Exception):
+    pass
+
+
+def source_hash(source_path=CONTRACT_PATH):
+    with open(os.path.join(ROOT, source_path), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _clean_layout(layout):
+    # Builtin interface types are reported as absolute .vyi paths
+    if isinstance(layout, dict):
+        return {key: _clean_layout(value) for key, value in layout.items()}
+    if isinstance(layout, str) and layout.endswith(".vyi"):
+        return os.path.splitext(os.path.basename(layout))[0]
+    return layout
+
+
+def build_artifacts(source_path=CONTRACT_PATH, artifact_path=ARTIFACT_PATH):
+    """
+    Compile the contract and write its artifact file. Returns the artifact dict.
+    """
+    import vyper
+
+    with open(os.path.join(ROOT, source_path)) as f:
+        source = f.read()
+
+    out = vyper.compile_code(
+        source, contract_path=source_path, output_formats=OUTPUT_FORMATS
+    )
+    artifact = {
+        "contract_name": os.path.splitext(os.path.basename(source_path))[0],
+        "source_path": source_path.replace(os.sep, "/"),
+        "source_sha256": source_hash(source_path),
+        "compiler_version": vyper.__version__,
+        "abi": out["abi"],
+        "bytecode": out["bytecode"],
+        "bytecode_runtime": out["bytecode_runtime"],
+        "method_identifiers": {
+            sig: "0x" + int(selector, 16).to_bytes(4, "big").hex()
+            for sig, selector in out["method_identifiers"].items()
+        },
+        "storage_layout": _clean_layout(out["layout"])["storage_layout"],
+    }
+
+    full_path = os.path.join(ROOT, artifact_path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "w") as f:
+        json.dump(artifact, f, indent=2)
+        f.write("\n")
+    return artifact
+
+
+def load_artifacts(artifact_path=ARTIFACT_PATH, check=True):
+    """
+    Load a precompiled artifact. With `check`, raise StaleArtifactError if the
+    contract source has changed since the artifact was built.
+    """
+    with open(os.path.join(ROOT, artifact_path)) as f:
+        artifact = json.load(f)
+
+    if check and os.path.exists(os.path.join(ROOT, artifact["source_path"])):
+        if source_hash(artifact["source_path"]) != artifact["source_sha256"]:
+            raise StaleArtifactError(
+                f"{artifact_path} is stale, rebuild with `python -m scripts.artifacts`"
+            )
+    return artifact
+
+
+def deploy_bytecode(*args, artifact_path=ARTIFACT_PATH):
+    """Initcode for a deployment: the artifact's bytecode plus ABI-encoded constructor args"""
+    from eth_abi import encode
+
+    artifact = load_artifacts(artifact_path)
+    ctor = next(
+        (item for item in artifact["abi"] if item["type"] == "constructor"), None
+    )
+    ctor_args = b""
+    if ctor is not None:
+        ctor_args = encode([abi_type(i) for i in ctor["inputs"]], list(args))
+    return bytes.fromhex(artifact["bytecode"].removeprefix("0x")) + ctor_args
+
+
+def deploy_from_artifacts(*args, artifact_path=ARTIFACT_PATH):
+    """
+    Deploy into the active boa env from precompiled bytecode, skipping compilation.
+    Returns a boa ABI contract.
+    """
+    import boa
+    from boa.contracts.abi.abi_contract import ABIContractFactory
+
+    artifact = load_artifacts(artifact_path)
+    factory = ABIContractFactory.from_abi_dict(
+        artifact["abi"], name=artifact["contract_name"]
+    )
+    address, _ = boa.env.deploy_code(
+        bytecode=deploy_bytecode(*args, artifact_path=artifact_path)
+    )
+    return factory.at(address)
+
+
+def abi_type(item):
+    if item["type"].startswith("tuple"):
+        inner = ",".join(abi_type(c) for c in item["components"])
+        return f"({inner}){item['type'][len('tuple'):]}"
+    return item["type"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--check", action="store_true", help="only verify the source hash"
+    )
+    args = parser.parse_args(argv)
+
+    if args.check:
+        try:
+            load_artifacts()
+        except (StaleArtifactError, FileNotFoundError) as e:
+            print(e)
+            return 1
+        print(f"{ARTIFACT_PATH} is up to date")
+        return 0
+
+    artifact = build_artifacts()
+    print(f"Wrote {ARTIFACT_PATH} ({artifact['source_sha256'][:12]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
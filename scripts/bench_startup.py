@@ -0,0 +1,136 @@
+"""
+Startup benchmark: compiling SquidDaoVote through boa vs. the precompiled artifacts.
+
+Each path runs in a fresh interpreter so import costs are measured cold. The
+artifact paths never import boa or Vyper; the local one runs on a bare py-evm
+chain (`scripts.client.PyEVMTransport`).
+
+    python -m scripts.bench_startup                  # local boa env only
+    python -m scripts.bench_startup --rpc <url>      # also time a first live call
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+from scripts.artifacts import ROOT
+from scripts.client import DEPLOYED_ADDRESS
+
+_PRELUDE = """
+import json, sys, time
+t0 = time.perf_counter()
+timings = {}
+"""
+
+# Both local paths deploy the same registry-less SquidDaoVote (placeholder
+# pool addresses, no tentacles) and time one balanceOf, so they differ only
+# in how the bytecode is obtained and which EVM runs it.
+PLACEHOLDERS = '["0x" + f"{k:040x}" for k in range(1, 5)]'
+
+# Current path: import boa (and Vyper), compile, deploy into boa's env, call
+COMPILE_LOCAL = f"""
+import boa
+timings["import"] = time.perf_counter() - t0
+t = time.perf_counter()
+deployer = boa.load_partial("contracts/SquidDaoVote.vy")
+timings["load"] = time.perf_counter() - t
+census = deployer.deploy(*{PLACEHOLDERS}, [])
+t = time.perf_counter()
+census.balanceOf(census.address)
+timings["first_call"] = time.perf_counter() - t
+"""
+
+# Artifact path: precompiled bytecode on a bare py-evm chain, no boa or Vyper
+ARTIFACT_LOCAL = f"""
+from scripts import artifacts, client
+timings["import"] = time.perf_counter() - t0
+t = time.perf_counter()
+artifacts.load_artifacts()
+timings["load"] = time.perf_counter() - t
+transport = client.PyEVMTransport()
+address = transport.deploy(artifacts.deploy_bytecode(*{PLACEHOLDERS}, []))
+c = client.SquidDaoVoteClient(address, transport)
+t = time.perf_counter()
+c.balanceOf(address)
+timings["first_call"] = time.perf_counter() - t
+"""
+
+COMPILE_RPC = """
+import boa
+timings["import"] = time.perf_counter() - t0
+t = time.perf_counter()
+boa.fork(sys.argv[1], allow_dirty=True)
+deployer = boa.load_partial("contracts/SquidDaoVote.vy")
+timings["load"] = time.perf_counter() - t
+t = time.perf_counter()
+deployer.at(sys.argv[2]).balanceOf(sys.argv[2])
+timings["first_call"] = time.perf_counter() - t
+"""
+
+ARTIFACT_RPC = """
+from scripts.client import SquidDaoVoteClient
+timings["import"] = time.perf_counter() - t0
+t = time.perf_counter()
+c = SquidDaoVoteClient.from_rpc(sys.argv[1], sys.argv[2])
+timings["load"] = time.perf_counter() - t
+t = time.perf_counter()
+c.balanceOf(sys.argv[2])
+timings["first_call"] = time.perf_counter() - t
+"""
+
+_EPILOGUE = """
+timings["total"] = time.perf_counter() - t0
+timings["vyper_imported"] = "vyper" in sys.modules
+print(json.dumps(timings))
+"""
+
+
+def run_path(body, *argv):
+    code = _PRELUDE + body + _EPILOGUE
+    out = subprocess.run(
+        [sys.executable, "-c", code, *argv],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(rpc=None, address=DEPLOYED_ADDRESS):
+    """Return {path name: timings} for each startup path."""
+    results = {
+        "compile (local)": run_path(COMPILE_LOCAL),
+        "artifact (local)": run_path(ARTIFACT_LOCAL),
+    }
+    if rpc:
+        results["compile (rpc)"] = run_path(COMPILE_RPC, rpc, address)
+        results["artifact (rpc)"] = run_path(ARTIFACT_RPC, rpc, address)
+    return results
+
+
+def print_table(results):
+    print(
+        f"\n{'Path':<20} {'Import':>10} {'Load':>10} {'1st call':>10} {'Total':>10}  Vyper"
+    )
+    print("-" * 72)
+    for name, t in results.items():
+        print(
+            f"{name:<20} {t['import']:>9.3f}s {t['load']:>9.3f}s "
+            f"{t['first_call']:>9.3f}s {t['total']:>9.3f}s  {t['vyper_imported']}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SquidDaoVote startup benchmark")
+    parser.add_argument(
+        "--rpc", help="JSON-RPC endpoint for a live first-call comparison"
+    )
+    parser.add_argument("--address", default=DEPLOYED_ADDRESS)
+    args = parser.parse_args(argv)
+    print_table(compare(args.rpc, args.address))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""
+Census runner: score an electorate through balanceOfPacked with metrics.
+
+Every stage of a run is timed through ``scripts.metrics``. ``rpc`` (or
+``evm`` on a local boa env) is the contract call, followed by ``encode``,
+``decode``, ``dust`` and ``write``. Counters cover RPC round trips, batch sizes,
+the per-run power cache and voters whose LP was zeroed by the dust rule.
+
+Runs pinned to a block number can checkpoint. Scored voters are appended to a
+results journal, and every few batches an atomic checkpoint records the
+cursor, the journal offset and a snapshot of the pool rates. A restarted run
+resumes from the cursor and writes the same output as an uninterrupted one.
+
+With a `scripts.prefilter.HolderPrefilter` for the pinned block, addresses
+outside the tentacle holder set are scored as zero without a call
+(`prefiltered`), and addresses that score zero feed its negative cache.
+
+    python -m scripts.census --voters voters.txt --address 0x... --block 12345678 \\
+        --out powers.csv --metrics census.prom --checkpoint census.ckpt \\
+        --prefilter holders.bloom
+"""
+
+import argparse
+import copy
+import csv
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+
+from eth_utils import to_checksum_address
+
+from scripts import packed
+from scripts.client import BoaTransport, RPCTransport, SquidDaoVoteClient
+from scripts.metrics import CProfileHook, Metrics, SamplingHook
+from scripts.model import DUST_THRESHOLD
+
+LP_VIEWS = ("squid_lp_balance", "squill_lp_balance")
+RATE_VIEWS = ("squid_lp_equivalent", "squill_lp_equivalent")
+PROFILERS = {"cprofile": CProfileHook, "sample": SamplingHook}
+CHECKPOINT_EVERY = 16  # batches
+ZERO_WORD = bytes(packed.WORD_SIZE)
+
+
+class CheckpointMismatch(Exception):
+    """The checkpoint on disk belongs to a different run or chain state"""
+
+
+class InstrumentedTransport:
+    """
+    Wraps a client transport, timing every call as the `rpc` stage (`evm` for
+    a local boa env) and counting round trips and eth_calls separately: a
+    JSON-RPC batch is one round trip, a boa batch executes call by call.
+    """
+
+    def __init__(self, transport, metrics, stage=None):
+        self.transport = transport
+        self.metrics = metrics
+        self.stage = stage or ("evm" if isinstance(transport, BoaTransport) else "rpc")
+
+    def call(self, to, data):
+        self.metrics.count("rpc_calls")
+        self.metrics.count("eth_calls")
+        with self.metrics.stage(self.stage):
+            return self.transport.call(to, data)
+
+    def batch_call(self, to, datas):
+        self.metrics.count(
+            "rpc_calls", 1 if isinstance(self.transport, RPCTransport) else len(datas)
+        )
+        self.metrics.count("eth_calls", len(datas))
+        with self.metrics.stage(self.stage):
+            return self.transport.batch_call(to, datas)
+
+
+# ============================================================================
+# Checkpoints
+# ============================================================================
+
+
+@dataclass
+class Checkpoint:
+    """
+    Progress of a pinned census run. `cursor` counts distinct voters (in
+    input order) already scored; their results are the first `results_offset`
+    bytes of the journal next to the checkpoint.
+    """
+
+    block: int
+    census: str
+    voters_digest: str
+    cursor: int
+    results_offset: int
+    pool_rates: dict
+
+    def save(self, path):
+        """Write-then-rename, so a crash leaves the previous checkpoint intact"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(asdict(self), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+def voters_digest(voters):
+    return hashlib.sha256("\n".join(voters).encode()).hexdigest()
+
+
+def journal_path(checkpoint_path):
+    return f"{checkpoint_path}.results"
+
+
+def read_journal(path, offset):
+    """Results recorded up to `offset`; anything after it is from a crashed batch"""
+    with open(path, "rb") as f:
+        data = f.read(offset)
+    results = {}
+    for line in data.decode().splitlines():
+        voter, power = line.split(",")
+        results[voter] = int(power)
+    return results
+
+
+# ============================================================================
+# Census
+# ============================================================================
+
+
+class Census:
+    """
+    Scores voters against one SquidDaoVote at one block. Powers are cached for
+    the lifetime of the Census, so repeated or overlapping electorates only
+    pay for new addresses.
+    """
+
+    def __init__(
+        self,
+        client,
+        batch_size=packed.MAX_BATCH,
+        metrics=None,
+        count_dust=False,
+        prefilter=None,
+    ):
+        self.metrics = metrics or Metrics()
+        self.client = copy.copy(client)
+        self.client.transport = InstrumentedTransport(client.transport, self.metrics)
+        self.batch_size = batch_size
+        self.count_dust = count_dust
+        self.prefilter = prefilter
+        self.cache = {}
+        self._packed = self.client._function("balanceOfPacked", 1)
+
+    def _score_packed(self, batch):
+        """balanceOfPacked output for `batch`: one 32-byte word per voter"""
+        self.metrics.observe("batch_size", len(batch))
+        with self.metrics.stage("encode"):
+            data = self._packed.encode([packed.encode_voters(batch)])
+        out = self.client.transport.call(self.client.address, data)
+        with self.metrics.stage("decode"):
+            return self._packed.decode(out)
+
+    def _score(self, batch):
+        words = self._score_packed(batch)
+        with self.metrics.stage("decode"):
+            return packed.decode_powers(words)
+
+    def _prefilter(self, voters):
+        """`voters` the prefilter cannot rule out, in order"""
+        block = self.pinned_block()
+        if self.prefilter.block != block:
+            raise ValueError(
+                f"prefilter is for block {self.prefilter.block}, census is pinned to {block}"
+            )
+        with self.metrics.stage("prefilter"):
+            kept = [v for v in voters if not self.prefilter.definitely_zero(v)]
+        self.metrics.count("prefiltered", len(voters) - len(kept))
+        return kept
+
+    def _remember_zeros(self, batch, powers):
+        if self.prefilter is not None:
+            for voter, power in zip(batch, powers):
+                if not power:
+                    self.prefilter.remember_zero(voter)
+
+    def _dust(self, batch):
+        with self.metrics.stage("dust"):
+            lp = [self.client.batch(view, batch) for view in LP_VIEWS]
+        filtered = sum(
+            any(0 < bal < DUST_THRESHOLD for bal in bals) for bals in zip(*lp)
+        )
+        self.metrics.count("dust_filtered", filtered)
+
+    def score(self, voters):
+        """
+        Powers for `voters` (checksummed), batched like `run` but bypassing
+        the cache, for callers that stream voters and must stay bounded in memory.
+        """
+        self.metrics.count("voters", len(voters))
+        if self.prefilter is None:
+            powers = []
+            for batch in packed.chunks(voters, self.batch_size):
+                powers.extend(self._score(batch))
+            return powers
+
+        scored = {}
+        for batch in packed.chunks(self._prefilter(voters), self.batch_size):
+            powers = self._score(batch)
+            self._remember_zeros(batch, powers)
+            scored.update(zip(batch, powers))
+        return [scored.get(v, 0) for v in voters]
+
+    def table(self, voters):
+        """
+        Powers for `voters` as a `scripts.records.VoterTable`, filled from the
+        packed words without decoding each power into an int. Voters are not
+        checksummed; the table does that on export. Bypasses the cache.
+        """
+        from scripts.records import VoterTable
+
+        voters = list(voters)
+        self.metrics.count("voters", len(voters))
+        kept = set(self._prefilter(voters)) if self.prefilter is not None else None
+        table = VoterTable()
+        for batch in packed.chunks(voters, self.batch_size):
+            scored = batch if kept is None else [v for v in batch if v in kept]
+            words = self._score_packed(scored) if scored else b""
+            if kept is not None:
+                size = packed.WORD_SIZE
+                self._remember_zeros(
+                    scored,
+                    [
+                        words[i : i + size] != ZERO_WORD
+                        for i in range(0, len(words), size)
+                    ],
+                )
+            if len(scored) < len(batch):
+                found = iter(
+                    words[i : i + packed.WORD_SIZE]
+                    for i in range(0, len(words), packed.WORD_SIZE)
+                )
+                words = b"".join(next(found) if v in kept else ZERO_WORD for v in batch)
+            table.extend_packed(batch, words)
+        return table
+
+    def pinned_block(self):
+        """Block number every call is pinned to, or None for a moving tag"""
+        transport = self.client.transport.transport
+        if isinstance(transport, BoaTransport):
+            return transport.env.evm.patch.block_number
+        block = transport.block
+        return int(block, 16) if block.startswith("0x") else None
+
+    def pool_rates(self):
+        """SQUID per 10**18 LP for each pool, the state a checkpoint is valid for"""
+        with self.metrics.stage("rates"):
+            return {view: self.client.call(view) for view in RATE_VIEWS}
+
+    def _resume(self, path, order):
+        """Cursor to resume from, loading journaled results into the cache"""
+        block = self.pinned_block()
+        if block is None:
+            raise ValueError(
+                "checkpointed census runs must be pinned to a block number"
+            )
+
+        rates = self.pool_rates()
+        digest = voters_digest(order)
+        if not os.path.exists(path):
+            self._checkpoint = Checkpoint(
+                block, self.client.address, digest, 0, 0, rates
+            )
+            open(journal_path(path), "wb").close()
+            return 0
+
+        ckpt = Checkpoint.load(path)
+        if (ckpt.block, ckpt.census, ckpt.voters_digest) != (
+            block,
+            self.client.address,
+            digest,
+        ):
+            raise CheckpointMismatch(
+                f"{path} is for a different block, contract or electorate"
+            )
+        if ckpt.pool_rates != rates:
+            raise CheckpointMismatch(f"pool rates at block {block} differ from {path}")
+
+        with self.metrics.stage("resume"):
+            resumed = read_journal(journal_path(path), ckpt.results_offset)
+        self.cache.update(resumed)
+        self.metrics.count("resumed_voters", len(resumed))
+        self._checkpoint = ckpt
+        return ckpt.cursor
+
+    def _save_checkpoint(self, path, journal, order, cursor):
+        """Journal order[checkpoint cursor:cursor] and move the checkpoint up to `cursor`"""
+        ckpt = self._checkpoint
+        with self.metrics.stage("checkpoint"):
+            rows = "".join(
+                f"{v},{self.cache[v]}\n" for v in order[ckpt.cursor : cursor]
+            )
+            journal.write(rows.encode())
+            journal.flush()
+            os.fsync(journal.fileno())
+            ckpt.cursor, ckpt.results_offset = cursor, journal.tell()
+            ckpt.save(path)
+        self.metrics.count("checkpoints")
+
+    def run(
+        self, voters, output=None, checkpoint=None, checkpoint_every=CHECKPOINT_EVERY
+    ):
+        """
+        Score `voters` and return {address: power}. `output` gets address,power
+        CSV rows. With `checkpoint` (a path) the run resumes from and keeps
+        saving to that checkpoint, and removes it once the output is written.
+        """
+        metrics = self.metrics
+        with metrics.stage("prepare"):
+            voters = [to_checksum_address(v) for v in voters]
+            order = list(dict.fromkeys(voters))
+        cursor = self._resume(checkpoint, order) if checkpoint else 0
+
+        pending = [v for v in order[cursor:] if v not in self.cache]
+        metrics.count("voters", len(voters))
+        metrics.count("cache_misses", len(pending))
+        metrics.count("cache_hits", len(voters) - len(pending))
+        if self.prefilter is not None:
+            kept = self._prefilter(pending)
+            self.cache.update(dict.fromkeys(set(pending).difference(kept), 0))
+            pending = kept
+
+        journal = None
+        if checkpoint:
+            # Drop anything a crash left in the journal past the last checkpoint
+            journal = open(journal_path(checkpoint), "r+b")
+            journal.truncate(self._checkpoint.results_offset)
+            journal.seek(self._checkpoint.results_offset)
+            position = {v: i for i, v in enumerate(order)}
+
+        try:
+            for n, batch in enumerate(packed.chunks(pending, self.batch_size), 1):
+                powers = self._score(batch)
+                self.cache.update(zip(batch, powers))
+                self._remember_zeros(batch, powers)
+                metrics.count("zero_power", powers.count(0))
+                if self.count_dust:
+                    self._dust(batch)
+                if journal and n % checkpoint_every == 0:
+                    self._save_checkpoint(
+                        checkpoint, journal, order, position[batch[-1]] + 1
+                    )
+            if journal:
+                self._save_checkpoint(checkpoint, journal, order, len(order))
+        finally:
+            if journal:
+                journal.close()
+
+        results = {v: self.cache[v] for v in voters}
+        if output is not None:
+            with metrics.stage("write"):
+                write_csv(output, results)
+        if checkpoint:
+            os.remove(checkpoint)
+            os.remove(journal_path(checkpoint))
+        return results
+
+
+def write_csv(output, results):
+    """`output` is a path or an open text file"""
+    if isinstance(output, str):
+        with open(output, "w", newline="") as f:
+            return write_csv(f, results)
+    writer = csv.writer(output)
+    writer.writerow(["address", "power"])
+    writer.writerows(results.items())
+
+
+def parse_profile(specs, prefix="census"):
+    """`stage=cprofile` / `stage=sample` flags to hooks writing `<prefix>.<stage>.*`"""
+    hooks = {}
+    for spec in specs:
+        stage, _, kind = spec.partition("=")
+        hook = PROFILERS[kind or "cprofile"]
+        suffix = "prof" if hook is CProfileHook else "folded"
+        hooks[stage] = hook(f"{prefix}.{stage}.{suffix}")
+    return hooks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SquidDaoVote census with run metrics")
+    parser.add_argument(
+        "--voters", required=True, help="file with one address per line"
+    )
+    parser.add_argument("--rpc", default="https://rpc.frax.com")
+    parser.add_argument(
+        "--address",
+        required=True,
+        help="SquidDaoVote deployment with balanceOfPacked (not DEPLOYED_ADDRESS)",
+    )
+    parser.add_argument("--block", default="latest")
+    parser.add_argument("--batch-size", type=int, default=packed.MAX_BATCH)
+    parser.add_argument("--count-dust", action="store_true")
+    parser.add_argument("--out", default="powers.csv")
+    parser.add_argument("--metrics", default="census.prom", help=".prom or .json")
+    parser.add_argument(
+        "--profile", action="append", default=[], metavar="STAGE=cprofile|sample"
+    )
+    parser.add_argument("--checkpoint", help="resume from / save progress to this file")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    parser.add_argument(
+        "--prefilter", help="holder filter from scripts.prefilter for --block"
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.voters) as f:
+        voters = [line.strip() for line in f if line.strip()]
+
+    block = int(args.block) if args.block.isdigit() else args.block
+    client = SquidDaoVoteClient.from_rpc(args.rpc, args.address, block=block)
+    metrics = Metrics(hooks=parse_profile(args.profile))
+    prefilter = None
+    if args.prefilter:
+        from scripts.prefilter import HolderPrefilter
+
+        prefilter = HolderPrefilter.load(args.prefilter)
+    census = Census(client, args.batch_size, metrics, args.count_dust, prefilter)
+
+    census.run(voters, args.out, args.checkpoint, args.checkpoint_every)
+    metrics.finish().write(args.metrics)
+    print(metrics.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Compiler-free SquidDaoVote client.
+
+Loads the precompiled ABI from ``artifacts/SquidDaoVote.json`` and talks to
+the contract through a small transport (JSON-RPC ``eth_call``, a local boa
+env or a bare py-evm chain), so querying voting power never imports Vyper.
+
+    client = SquidDaoVoteClient.from_rpc("https://rpc.frax.com", DEPLOYED_ADDRESS)
+    client.balanceOf(voter)
+"""
+
+from eth_abi import decode, encode
+from eth_utils import keccak, to_canonical_address, to_checksum_address
+
+from scripts.artifacts import ARTIFACT_PATH, abi_type, load_artifacts
+
+DEPLOYED_ADDRESS = "0xa3059E86548a4720AD28c881B701c6f02120164a"
+
+
+class ContractCallError(Exception):
+    pass
+
+
+class RPCTransport:
+    """
+    `eth_call` over JSON-RPC, pinned to `block` (a tag or block number).
+    """
+
+    def __init__(self, url, block="latest", timeout=30, session=None):
+        import requests
+
+        self.url = url
+        self.block = hex(block) if isinstance(block, int) else block
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self._id = 0
+
+    def _payload(self, method, params):
+        self._id += 1
+        return {"jsonrpc": "2.0", "id": self._id, "method": method, "params": params}
+
+    def _request(self, to, data):
+        return self._payload(
+            "eth_call", [{"to": to, "data": "0x" + data.hex()}, self.block]
+        )
+
+    def _post(self, payloads):
+        response = self.session.post(self.url, json=payloads, timeout=self.timeout)
+        response.raise_for_status()
+        by_id = {r["id"]: r for r in response.json()}
+        for r in by_id.values():
+            if "error" in r:
+                raise ContractCallError(r["error"])
+        return [by_id[p["id"]]["result"] for p in payloads]
+
+    @staticmethod
+    def _result(response):
+        if "error" in response:
+            raise ContractCallError(response["error"])
+        return bytes.fromhex(response["result"].removeprefix("0x"))
+
+    def call(self, to, data):
+        response = self.session.post(
+            self.url, json=self._request(to, data), timeout=self.timeout
+        )
+        response.raise_for_status()
+        return self._result(response.json())
+
+    def batch_call(self, to, datas):
+        """Send many calls as one JSON-RPC batch, results in request order."""
+        requests_ = [self._request(to, data) for data in datas]
+        response = self.session.post(self.url, json=requests_, timeout=self.timeout)
+        response.raise_for_status()
+        by_id = {r["id"]: r for r in response.json()}
+        return [self._result(by_id[r["id"]]) for r in requests_]
+
+    def request(self, method, params):
+        """Any other JSON-RPC method, e.g. eth_getBlockByNumber."""
+        (result,) = self._post([self._payload(method, params)])
+        return result
+
+    def batch(self, calls):
+        """[(method, params)] as one JSON-RPC batch, results in request order."""
+        if not calls:
+            return []
+        return self._post([self._payload(method, params) for method, params in calls])
+
+    def storage(self, address, slots):
+        """Storage words of `address` at `slots`, as one eth_getStorageAt batch."""
+        payloads = [
+            self._payload("eth_getStorageAt", [address, hex(slot), self.block])
+            for slot in slots
+        ]
+        return [int(word, 16) for word in self._post(payloads)]
+
+    def proof_storage(self, address, slots):
+        """The same words through a single eth_getProof request."""
+        keys = ["0x" + slot.to_bytes(32, "big").hex() for slot in slots]
+        (proof,) = self._post(
+            [self._payload("eth_getProof", [address, keys, self.block])]
+        )
+        return [int(entry["value"], 16) for entry in proof["storageProof"]]
+
+
+class BoaTransport:
+    """
+    Calls into a local boa env. boa (and Vyper with it) is imported on first use.
+    """
+
+    def __init__(self, env=None):
+        self._env = env
+
+    @property
+    def env(self):
+        if self._env is None:
+            import boa
+
+            self._env = boa.env
+        return self._env
+
+    def call(self, to, data):
+        try:
+            computation = self.env.raw_call(to, data=data)
+        except Exception as e:
+            raise ContractCallError(e) from e
+        if computation.is_error:
+            raise ContractCallError(computation.error)
+        return computation.output
+
+    def batch_call(self, to, datas):
+        return [self.call(to, data) for data in datas]
+
+    def storage(self, address, slots):
+        return [self.env.get_storage(address, slot) for slot in slots]
+
+    proof_storage = storage
+
+
+class PyEVMTransport:
+    """
+    A bare in-memory py-evm chain, for running precompiled bytecode without
+    boa. py-evm does not import Vyper; boa does, as soon as it is imported.
+    """
+
+    SENDER = bytes.fromhex("c0ffee".rjust(40, "0"))
+    GAS_LIMIT = 30_000_000
+
+    def __init__(self):
+        from eth.chains.base import MiningChain
+        from eth.db.atomic import AtomicDB
+        from eth.vm.forks.cancun import CancunVM
+
+        chain = MiningChain.configure(vm_configuration=((0, CancunVM),)).from_genesis(
+            AtomicDB(), {"gas_limit": self.GAS_LIMIT, "difficulty": 0, "timestamp": 0}
+        )
+        self.state = chain.get_vm().state
+        self._nonce = 0
+
+    def _run(self, message, create=False):
+        from eth.vm.transaction_context import BaseTransactionContext
+
+        ctx = BaseTransactionContext(origin=self.SENDER, gas_price=0)
+        computation_class = self.state.computation_class
+        run = (
+            computation_class.apply_create_message
+            if create
+            else computation_class.apply_message
+        )
+        computation = run(self.state, message, ctx)
+        if computation.is_error:
+            raise ContractCallError(computation.error)
+        return computation
+
+    def deploy(self, bytecode):
+        """Run `bytecode` as initcode and return the new contract's address"""
+        from eth._utils.address import generate_contract_address
+        from eth.vm.message import Message
+
+        address = generate_contract_address(self.SENDER, self._nonce)
+        self._nonce += 1
+        message = Message(
+            to=b"",
+            sender=self.SENDER,
+            gas=self.GAS_LIMIT,
+            value=0,
+            code=bytecode,
+            create_address=address,
+            data=b"",
+        )
+        self._run(message, create=True)
+        return to_checksum_address(address)
+
+    def call(self, to, data):
+        from eth.vm.message import Message
+
+        address = to_canonical_address(to)
+        message = Message(
+            to=address,
+            sender=self.SENDER,
+            gas=self.GAS_LIMIT,
+            value=0,
+            code=self.state.get_code(address),
+            data=data,
+            is_static=True,
+        )
+        return self._run(message).output
+
+    def batch_call(self, to, datas):
+        return [self.call(to, data) for data in datas]
+
+    def storage(self, address, slots):
+        return [
+            self.state.get_storage(to_canonical_address(address), slot)
+            for slot in slots
+        ]
+
+    proof_storage = storage
+
+
+class _Function:
+    def __init__(self, abi_item):
+        self.name = abi_item["name"]
+        self.input_types = [abi_type(i) for i in abi_item["inputs"]]
+        self.output_types = [abi_type(o) for o in abi_item["outputs"]]
+        signature = f"{self.name}({','.join(self.input_types)})"
+        self.selector = keccak(text=signature)[:4]
+
+    def encode(self, args):
+        return self.selector + encode(self.input_types, list(args))
+
+    def decode(self, data):
+        result = _checksum(decode(self.output_types, data))
+        return result[0] if len(result) == 1 else result
+
+
+def _checksum(value):
+    # eth_abi returns lowercase addresses; match boa and the explorers
+    if isinstance(value, tuple):
+        return tuple(_checksum(v) for v in value)
+    if isinstance(value, str) and value.startswith("0x") and len(value) == 42:
+        return to_checksum_address(value)
+    return value
+
+
+class SquidDaoVoteClient:
+    """
+    Thin ABI client. Every view function in the artifact is exposed as a method;
+    overloads (e.g. `squid_lp_equivalent()` / `squid_lp_equivalent(uint256)`) are
+    picked by argument count.
+    """
+
+    def __init__(self, address, transport, artifact_path=ARTIFACT_PATH):
+        self.address = to_checksum_address(address)
+        self.transport = transport
+        self.artifact = load_artifacts(artifact_path)
+
+        self._functions = {}
+        for item in self.artifact["abi"]:
+            if item["type"] == "function":
+                fn = _Function(item)
+                self._functions.setdefault(fn.name, {})[len(fn.input_types)] = fn
+
+    @classmethod
+    def from_rpc(cls, url, address=DEPLOYED_ADDRESS, block="latest", **kwargs):
+        return cls(address, RPCTransport(url, block=block, **kwargs))
+
+    @classmethod
+    def from_boa(cls, address, env=None):
+        return cls(address, BoaTransport(env))
+
+    def _function(self, name, nargs):
+        try:
+            return self._functions[name][nargs]
+        except KeyError:
+            raise AttributeError(
+                f"No function {name} taking {nargs} arguments"
+            ) from None
+
+    def call(self, name, *args):
+        fn = self._function(name, len(args))
+        return fn.decode(self.transport.call(self.address, fn.encode(args)))
+
+    def batch(self, name, args_list):
+        """Call `name` once per argument tuple, batched by the transport."""
+        args_list = [args if isinstance(args, tuple) else (args,) for args in args_list]
+        if not args_list:
+            return []
+        fn = self._function(name, len(args_list[0]))
+        datas = [fn.encode(args) for args in args_list]
+        return [
+            fn.decode(out) for out in self.transport.batch_call(self.address, datas)
+        ]
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name not in self.__dict__.get("_functions", {}):
+            raise AttributeError(name)
+        return lambda *args: self.call(name, *args)
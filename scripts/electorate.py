@@ -0,0 +1,268 @@
+"""
+Synthetic electorate on a local boa chain.
+
+Deploys SQUID, eight LP wrappers (``contracts/test/ERC20.vy``), the mock
+Curve pools and SquidDaoVote, then fills them with a seeded population of
+holders: Zipf-distributed balances, LP positions spread across tentacles with
+configurable overlap, and dust positions under the 10_000_000 wei threshold.
+Balances and supplies are written straight into ERC20 storage, so building
+a million voters costs hashing and storage writes rather than transactions.
+
+    python -m scripts.electorate --voters 100000 --seed 1
+"""
+
+import argparse
+import random
+import time
+from dataclasses import dataclass, field
+
+from scripts import mocks, model
+from scripts.model import DUST_THRESHOLD, PoolState
+
+N_TENTACLES = 9
+# Share of each pool's LP supply held through the wrappers
+LP_SHARE = 0.9
+
+
+@dataclass
+class ElectorateConfig:
+    voters: int = 1_000
+    seed: int = 0
+    zipf_exponent: float = 1.1  # balance of rank r ~ r ** -exponent
+    top_balance: int = 5_000_000 * 10**18  # naked SQUID of the largest holder
+    naked_rate: float = 0.85  # voters holding naked SQUID
+    lp_rate: float = 0.25  # voters holding any LP
+    overlap: float = 0.4  # chance an LP holder adds one more tentacle, repeated
+    dust_rate: float = 0.05  # LP positions that are dust
+    empty_rate: float = 0.03  # registered voters holding nothing
+
+
+@dataclass
+class Electorate:
+    """
+    A deployed population. `balances[k]` maps voter -> balance of tentacle k
+    (0 is naked SQUID); voters missing from it hold none of that token.
+    """
+
+    config: ElectorateConfig
+    squid: object
+    pools: tuple
+    wrappers: list
+    census: object
+    tentacles: list
+    voters: list
+    balances: list
+    build_seconds: float = 0.0
+    stats: dict = field(default_factory=dict)
+
+    @property
+    def tokens(self):
+        return [self.squid] + self.wrappers
+
+    def pool_states(self):
+        """PoolState per LP pool id, as used by `scripts.model.voting_power`"""
+        return {
+            k: PoolState(
+                balances=(pool.balances(0), pool.balances(1)),
+                total_supply=pool.totalSupply(),
+                fee=pool.fee(),
+                price_oracle=pool.price_oracle(),
+            )
+            for k, pool in enumerate(self.pools[:2])
+        }
+
+    def expected_power(self, voter, pool_states=None):
+        """Voting power of `voter` from the off-chain model"""
+        balances = [held.get(voter, 0) for held in self.balances]
+        return model.voting_power(
+            self.tentacles, balances, pool_states or self.pool_states()
+        )
+
+
+# ============================================================================
+# Population
+# ============================================================================
+
+
+def zipf_balances(rng, n, exponent, top):
+    """`n` Zipf-like balances: rank r gets ~top / r**exponent, ranks shuffled"""
+    ranks = list(range(1, n + 1))
+    rng.shuffle(ranks)
+    return [int(top / r**exponent * rng.lognormvariate(0, 0.25)) for r in ranks]
+
+
+def voter_addresses(rng, n):
+    """Distinct lowercase addresses, deterministic in `rng`"""
+    addresses = {}
+    while len(addresses) < n:
+        addresses.setdefault(rng.getrandbits(160), None)
+    return [f"0x{a:040x}" for a in addresses]
+
+
+def generate(config, tentacles):
+    """
+    Draw balances for `config.voters` voters over `tentacles` (model form:
+    ``(pool_id | None, index)``). LP amounts are weights at this point; they
+    are scaled to each pool's supply in `populate`.
+    """
+    rng = random.Random(config.seed)
+    voters = voter_addresses(rng, config.voters)
+    weights = zipf_balances(
+        rng, config.voters, config.zipf_exponent, config.top_balance
+    )
+    lp_tentacles = [k for k, (pool, _) in enumerate(tentacles) if pool is not None]
+
+    balances = [{} for _ in tentacles]
+    dust = {}
+    for voter, weight in zip(voters, weights):
+        if rng.random() < config.empty_rate:
+            continue
+        if rng.random() < config.naked_rate:
+            balances[0][voter] = weight
+        if rng.random() >= config.lp_rate or not lp_tentacles:
+            continue
+
+        held = [rng.choice(lp_tentacles)]
+        while len(held) < len(lp_tentacles) and rng.random() < config.overlap:
+            held.append(rng.choice([k for k in lp_tentacles if k not in held]))
+        for k in held:
+            if rng.random() < config.dust_rate:
+                dust[(k, voter)] = rng.randrange(1, DUST_THRESHOLD)
+            else:
+                balances[k][voter] = max(1, weight // len(held))
+    return voters, balances, dust
+
+
+# ============================================================================
+# Chain state
+# ============================================================================
+
+
+def write_balances(token, balances):
+    """Bulk-write {holder: amount} into an ERC20 and set its total supply"""
+    import boa
+
+    state = boa.env.evm.vm.state
+    address = bytes.fromhex(token.address[2:])
+    for holder, amount in balances.items():
+        state.set_storage(
+            address, mocks.hashmap_slot(mocks.ERC20_BALANCE_SLOT, holder), amount
+        )
+    mocks.set_token_supply(token, sum(balances.values()))
+
+
+def populate(balances, dust, tentacles, pool_supplies):
+    """
+    Scale LP weights so each pool's wrappers hold LP_SHARE of its supply,
+    then merge dust positions back in (unscaled).
+    """
+    for pool, supply in pool_supplies.items():
+        members = [k for k, (p, _) in enumerate(tentacles) if p == pool]
+        total = sum(sum(balances[k].values()) for k in members)
+        if total == 0:
+            continue
+        target = int(supply * LP_SHARE)
+        for k in members:
+            balances[k] = {v: w * target // total for v, w in balances[k].items()}
+    for (k, voter), amount in dust.items():
+        balances[k][voter] = balances[k].get(voter, 0) + amount
+    for k in range(1, len(balances)):
+        balances[k] = {v: b for v, b in balances[k].items() if b}
+    return balances
+
+
+def build(config=None, **overrides):
+    """Deploy and populate an electorate in the active boa env"""
+    config = config or ElectorateConfig(**overrides)
+    start = time.perf_counter()
+
+    squid = mocks.deploy_token("Squid", "SQUID")
+    pools = mocks.deploy_mock_pools(squid)
+    registry, wrappers = mocks.deploy_wrappers(squid, pools, N_TENTACLES)
+    census = mocks.deploy_census(squid, pools, registry)
+
+    pool_ids = {p.address: k for k, p in enumerate(pools[:2])}
+    tentacles = [
+        (None if pool == mocks.ZERO_ADDRESS else pool_ids[pool], index)
+        for _, pool, index in registry
+    ]
+
+    voters, balances, dust = generate(config, tentacles)
+    supplies = {k: pool.totalSupply() for k, pool in enumerate(pools[:2])}
+    balances = populate(balances, dust, tentacles, supplies)
+    for token, held in zip([squid] + wrappers, balances):
+        write_balances(token, held)
+
+    electorate = Electorate(
+        config=config,
+        squid=squid,
+        pools=pools,
+        wrappers=wrappers,
+        census=census,
+        tentacles=tentacles,
+        voters=voters,
+        balances=balances,
+    )
+    electorate.build_seconds = time.perf_counter() - start
+    electorate.stats = describe(electorate, dust)
+    return electorate
+
+
+def describe(electorate, dust=()):
+    lp = [
+        held
+        for held, (pool, _) in zip(electorate.balances, electorate.tentacles)
+        if pool is not None
+    ]
+    lp_holders = set().union(*lp) if lp else set()
+    positions = {}
+    for held in lp:
+        for voter in held:
+            positions[voter] = positions.get(voter, 0) + 1
+    holders = set(electorate.balances[0]) | lp_holders
+    return {
+        "voters": len(electorate.voters),
+        "holders": len(holders),
+        "naked_holders": len(electorate.balances[0]),
+        "lp_holders": len(lp_holders),
+        "multi_tentacle_lp": sum(n > 1 for n in positions.values()),
+        "lp_positions": sum(positions.values()),
+        "dust_positions": len(dust),
+        "storage_writes": sum(len(held) + 1 for held in electorate.balances),
+    }
+
+
+def main(argv=None):
+    import boa
+
+    parser = argparse.ArgumentParser(
+        description="Build a synthetic SquidDaoVote electorate"
+    )
+    parser.add_argument("--voters", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--score", type=int, default=1_000, help="voters to score after building"
+    )
+    args = parser.parse_args(argv)
+
+    from scripts import packed
+    from scripts.client import SquidDaoVoteClient
+
+    with boa.swap_env(boa.Env()):
+        electorate = build(voters=args.voters, seed=args.seed)
+        for name, value in electorate.stats.items():
+            print(f"{name:<20} {value:>12,}")
+        print(f"{'build_seconds':<20} {electorate.build_seconds:>12.2f}")
+
+        client = SquidDaoVoteClient.from_boa(electorate.census.address)
+        sample = electorate.voters[: args.score]
+        start = time.perf_counter()
+        packed.packed_voting_power(client, sample)
+        elapsed = time.perf_counter() - start
+        print(
+            f"Scored {len(sample):,} voters in {elapsed:.2f}s ({len(sample) / elapsed:,.0f}/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
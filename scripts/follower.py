@@ -0,0 +1,477 @@
+"""
+Live head-following census.
+
+Keeps every holder's SquidDaoVote power current as blocks arrive, instead of
+re-running the census. Starting from balances seeded at one block, the
+follower polls a JSON-RPC endpoint for new heads and, for each block:
+
+- applies the ``Transfer`` logs of the tentacle tokens as balance deltas and
+  re-prices only the holders they touch
+- re-reads a pool's state only when the pool emitted a log in that block, and
+  re-prices that pool's LP holders only if the state actually changed
+- keeps the block's deltas in a ring buffer, so a reorg up to ``depth`` blocks
+  deep is undone delta by delta rather than by recomputing everyone. Only a
+  hash mismatch the node confirms rolls a block back; a block the node does
+  not return (a lagging replica behind a load balancer) is retried with
+  backoff and otherwise left for the next poll
+
+Holders are keyed by lowercase address, as they appear in logs. A block is
+applied all or nothing: new balances, pricers and powers are computed first
+and stored only once nothing is left that can fail.
+
+    python -m scripts.follower --holders holders.txt --rpc https://rpc.frax.com
+"""
+
+import argparse
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from eth_abi import encode
+from eth_utils import keccak
+
+from scripts import packed
+from scripts.metrics import Metrics
+from scripts.model import (
+    DUST_THRESHOLD,
+    PoolState,
+    lp_balance_in_squid,
+    mock_pool_withdraw,
+)
+from scripts.tentacles import FRAXTAL_TENTACLES, ZERO_ADDRESS
+
+TRANSFER_TOPIC = "0x" + keccak(text="Transfer(address,address,uint256)").hex()
+REORG_DEPTH = 64
+POLL_INTERVAL = 2.0  # seconds
+RETRIES = 3
+BACKOFF = 0.5  # seconds, doubled per retry
+BALANCE_OF = keccak(text="balanceOf(address)")[:4]
+# PoolState field -> calldata of the pool view it is read from
+POOL_VIEWS = {
+    "balance0": keccak(text="balances(uint256)")[:4] + encode(["uint256"], [0]),
+    "balance1": keccak(text="balances(uint256)")[:4] + encode(["uint256"], [1]),
+    "total_supply": keccak(text="totalSupply()")[:4],
+    "fee": keccak(text="fee()")[:4],
+    "price_oracle": keccak(text="price_oracle()")[:4],
+}
+
+
+class ReorgTooDeep(Exception):
+    """The chain reorganised past the oldest block in the ring buffer"""
+
+
+@dataclass
+class BlockDelta:
+    """What applying one block changed, enough to undo it"""
+
+    number: int
+    hash: str
+    parent_hash: str
+    transfers: dict  # (holder, tentacle) -> net balance change
+    pools: dict  # pool -> PoolState before the block
+
+
+def _word_address(topic):
+    return "0x" + topic[-40:].lower()
+
+
+# ============================================================================
+# Follower
+# ============================================================================
+
+
+class Follower:
+    """
+    Incrementally maintained voting power for one registry.
+
+    `source` is a `scripts.client.RPCTransport`, or anything with its
+    `request(method, params)` and `batch(calls)`. `registry` is the constructor form ``[(token, pool, index)]`` (``pool`` is
+    the zero address for naked SQUID). `withdraw(pool, index, state, block)`
+    returns the ``calc_withdraw`` callable LP is priced with; the default is the
+    exact MockTwoCrypto model, live pools want `scripts.lp_curve.rpc_withdraw`.
+    A callable with a ``many(quantities)`` method is handed every position a
+    block reprices at once. A block the node does not return is retried
+    `retries` times, `backoff` seconds apart and doubling.
+    """
+
+    def __init__(
+        self,
+        source,
+        registry=FRAXTAL_TENTACLES,
+        depth=REORG_DEPTH,
+        withdraw=None,
+        metrics=None,
+        retries=RETRIES,
+        backoff=BACKOFF,
+    ):
+        self.source = source
+        self.retries = retries
+        self.backoff = backoff
+        self.tokens = [token.lower() for token, _, _ in registry]
+        self.tentacles = [
+            (None if pool == ZERO_ADDRESS else pool.lower(), index)
+            for _, pool, index in registry
+        ]
+        self.token_index = {token: k for k, token in enumerate(self.tokens)}
+        self.pools = sorted({pool for pool, _ in self.tentacles if pool})
+        self.addresses = sorted(set(self.tokens) | set(self.pools))
+        self.withdraw_factory = withdraw or (
+            lambda pool, index, state, block: mock_pool_withdraw(state, index)
+        )
+        self.metrics = metrics or Metrics()
+        self.history = deque(maxlen=depth)
+
+        self.number = self.hash = None
+        self.balances = {}  # holder -> [balance per tentacle]
+        self.powers = {}
+        self.total_power = 0
+        self.pool_states = {}
+        self.lp_holders = {pool: set() for pool in self.pools}
+        self._withdraw = {}
+
+    # ------------------------------------------------------------------ state
+
+    def seed(self, number, block_hash, balances, pool_states):
+        """
+        Start from a known block. `balances[k]` maps holder -> balance of
+        tentacle k (the `scripts.electorate.Electorate.balances` shape) and must
+        cover every holder; `pool_states` maps pool address -> PoolState.
+        """
+        self.number, self.hash = number, block_hash
+        self.history.clear()
+        self.pool_states, self._withdraw = {}, {}
+        self.balances, self.powers, self.total_power = {}, {}, 0
+        self.lp_holders = {pool: set() for pool in self.pools}
+        transfers = {}
+        for k, held in enumerate(balances):
+            for holder, bal in held.items():
+                if bal:
+                    key = (holder.lower(), k)
+                    transfers[key] = transfers.get(key, 0) + bal
+        with self.metrics.stage("seed"):
+            self._transition(
+                transfers,
+                {pool.lower(): state for pool, state in pool_states.items()},
+                number,
+            )
+        return self
+
+    def bootstrap(self, holders, block="latest", batch_size=packed.MAX_BATCH):
+        """
+        Seed from chain state at `block` for `holders` (e.g. a census output),
+        `batch_size` ``balanceOf`` calls per JSON-RPC batch.
+        """
+        head = self.source.request("eth_getBlockByNumber", [block, False])
+        at = {"blockHash": head["hash"]}
+        holders = [h.lower() for h in holders]
+        calls = [
+            (
+                "eth_call",
+                [
+                    {
+                        "to": token,
+                        "data": "0x" + (BALANCE_OF + encode(["address"], [h])).hex(),
+                    },
+                    at,
+                ],
+            )
+            for token in self.tokens
+            for h in holders
+        ]
+        results = []
+        with self.metrics.stage("bootstrap"):
+            for chunk in packed.chunks(calls, batch_size):
+                results.extend(self.source.batch(chunk))
+        results = iter(results)
+        balances = [{h: int(next(results), 16) for h in holders} for _ in self.tokens]
+        states = {pool: self._pool_state(pool, head["hash"]) for pool in self.pools}
+        return self.seed(int(head["number"], 16), head["hash"], balances, states)
+
+    def _pool_state(self, pool, block_hash):
+        calls = [
+            (
+                "eth_call",
+                [{"to": pool, "data": "0x" + data.hex()}, {"blockHash": block_hash}],
+            )
+            for data in POOL_VIEWS.values()
+        ]
+        self.metrics.count("pool_reads")
+        values = dict(zip(POOL_VIEWS, (int(r, 16) for r in self.source.batch(calls))))
+        return PoolState(
+            balances=(values["balance0"], values["balance1"]),
+            total_supply=values["total_supply"],
+            fee=values["fee"],
+            price_oracle=values["price_oracle"],
+        )
+
+    def _holdings(self, bals):
+        """(naked SQUID, {(pool, index): summed LP}) for one holder"""
+        naked = 0
+        lp = {}
+        for (pool, index), bal in zip(self.tentacles, bals):
+            if pool is None:
+                naked += bal
+            elif bal:
+                lp[(pool, index)] = lp.get((pool, index), 0) + bal
+        return naked, lp
+
+    def _power(self, bals, withdraw):
+        naked, lp = self._holdings(bals)
+        return naked + sum(
+            lp_balance_in_squid(withdraw[key], bal) for key, bal in lp.items()
+        )
+
+    @staticmethod
+    def _prefetch(withdraw, holdings):
+        """
+        Pricers for one transition. Those with ``many`` price every non-dust
+        position the transition needs in one call, e.g. one JSON-RPC batch
+        rather than an eth_call per LP holder; the rest are used as they are.
+        """
+        wanted = {}
+        for _, lp in holdings:
+            for key, bal in lp.items():
+                if bal >= DUST_THRESHOLD:
+                    wanted.setdefault(key, set()).add(bal)
+        pricers = dict(withdraw)
+        for key, quantities in wanted.items():
+            many = getattr(withdraw[key], "many", None)
+            if many is not None:
+                quantities = sorted(quantities)
+                pricers[key] = dict(zip(quantities, many(quantities))).__getitem__
+        return pricers
+
+    def _transition(self, transfers, states, number):
+        """
+        Apply balance changes `transfers` {(holder, tentacle): change} and pool
+        `states` {pool: PoolState} at block `number`. Everything that can fail
+        (a balance going negative, a pricer, a power) is computed before the
+        first write, so an exception leaves the follower as it was.
+        """
+        withdraw = dict(self._withdraw)
+        for pool, state in states.items():
+            for p, index in self.tentacles:
+                if p == pool:
+                    withdraw[(p, index)] = self.withdraw_factory(
+                        p, index, state, number
+                    )
+
+        zeros = [0] * len(self.tokens)
+        bals = {}
+        for (holder, k), change in transfers.items():
+            new = bals.get(holder) or list(self.balances.get(holder, zeros))
+            new[k] += change
+            if new[k] < 0:
+                raise ValueError(
+                    f"{holder} balance of tentacle {k} went negative; the seed is missing holders"
+                )
+            bals[holder] = new
+
+        affected = set(bals)
+        for pool in states:
+            affected |= self.lp_holders[pool]
+        with self.metrics.stage("reprice"):
+            holdings = {
+                h: self._holdings(bals[h] if h in bals else self.balances.get(h, zeros))
+                for h in affected
+            }
+            pricers = self._prefetch(withdraw, holdings.values())
+            powers = {
+                h: naked
+                + sum(lp_balance_in_squid(pricers[key], bal) for key, bal in lp.items())
+                for h, (naked, lp) in holdings.items()
+            }
+
+        # Nothing below raises
+        self.pool_states.update(states)
+        self._withdraw = withdraw
+        for holder, new in bals.items():
+            self._store(holder, new)
+        for holder, power in powers.items():
+            self.total_power += power - self.powers.get(holder, 0)
+            if power:
+                self.powers[holder] = power
+            else:
+                self.powers.pop(holder, None)
+        self.metrics.count("repriced", len(affected))
+
+    def _store(self, holder, bals):
+        for pool in self.pools:
+            if any(b for (p, _), b in zip(self.tentacles, bals) if p == pool):
+                self.lp_holders[pool].add(holder)
+            else:
+                self.lp_holders[pool].discard(holder)
+        if any(bals):
+            self.balances[holder] = bals
+        else:
+            self.balances.pop(holder, None)
+
+    # ----------------------------------------------------------------- blocks
+
+    def _block(self, number):
+        return self.source.request("eth_getBlockByNumber", [hex(number), False])
+
+    def _block_retrying(self, number):
+        """`_block`, backing off while the node does not return it"""
+        delay = self.backoff
+        for _ in range(self.retries):
+            block = self._block(number)
+            if block is not None:
+                return block
+            self.metrics.count("missing_blocks")
+            time.sleep(delay)
+            delay *= 2
+        return self._block(number)
+
+    def _known_hash(self, number):
+        if number == self.number:
+            return self.hash
+        for delta in self.history:
+            if delta.number == number:
+                return delta.hash
+            if delta.number == number + 1:
+                return delta.parent_hash
+        return None
+
+    def _reorged(self, patient=True):
+        """
+        True once the node confirms our head is no longer canonical. A
+        missing head block is only a mismatch if the node's own head block
+        disagrees with ours at that height; a node that is merely behind,
+        or one we cannot compare against, is not a reorg.
+        """
+        block = (
+            self._block_retrying(self.number) if patient else self._block(self.number)
+        )
+        if block is not None:
+            return block["hash"] != self.hash
+        latest = int(self.source.request("eth_blockNumber", []), 16)
+        if latest >= self.number:
+            return False
+        expected = self._known_hash(latest)
+        if expected is None:
+            return False
+        block = self._block(latest)
+        return block is not None and block["hash"] != expected
+
+    def _apply(self, block):
+        number = int(block["number"], 16)
+        with self.metrics.stage("logs"):
+            logs = self.source.request(
+                "eth_getLogs", [{"blockHash": block["hash"], "address": self.addresses}]
+            )
+
+        transfers, touched = {}, set()
+        for log in logs:
+            address, topics = log["address"].lower(), log["topics"]
+            if address in self.pool_states:
+                touched.add(address)
+            k = self.token_index.get(address)
+            if k is None or len(topics) != 3 or topics[0] != TRANSFER_TOPIC:
+                continue
+            value = int(log["data"], 16)
+            src, dst = _word_address(topics[1]), _word_address(topics[2])
+            if src != ZERO_ADDRESS:
+                transfers[(src, k)] = transfers.get((src, k), 0) - value
+            if dst != ZERO_ADDRESS:
+                transfers[(dst, k)] = transfers.get((dst, k), 0) + value
+            self.metrics.count("transfers")
+
+        states = {}
+        with self.metrics.stage("pools"):
+            for pool in sorted(touched):
+                state = self._pool_state(pool, block["hash"])
+                if state != self.pool_states[pool]:
+                    states[pool] = state
+
+        transfers = {key: value for key, value in transfers.items() if value}
+        before = {pool: self.pool_states[pool] for pool in states}
+        self._transition(transfers, states, number)
+        self.history.append(
+            BlockDelta(number, block["hash"], block["parentHash"], transfers, before)
+        )
+        self.number, self.hash = number, block["hash"]
+        self.metrics.count("blocks")
+
+    def _rollback(self):
+        if not self.history:
+            raise ReorgTooDeep(
+                f"block {self.number} was reorganised out beyond the ring buffer"
+            )
+        delta = self.history[-1]
+        self._transition(
+            {key: -value for key, value in delta.transfers.items()},
+            delta.pools,
+            delta.number - 1,
+        )
+        self.history.pop()
+        self.number, self.hash = delta.number - 1, delta.parent_hash
+        self.metrics.count("rolled_back")
+
+    def poll(self):
+        """Catch up with the chain head, unwinding any reorg first; returns blocks applied"""
+        rolled_back = 0
+        # Once a reorg is confirmed, missing blocks above the new head are expected
+        while self._reorged(patient=not rolled_back):
+            self._rollback()
+            rolled_back += 1
+        if rolled_back:
+            self.metrics.count("reorgs")
+            self.metrics.observe("reorg_depth", rolled_back)
+
+        latest = int(self.source.request("eth_blockNumber", []), 16)
+        applied = 0
+        for number in range(self.number + 1, latest + 1):
+            block = self._block(number)
+            if block is None or block["parentHash"] != self.hash:
+                break  # the head moved while catching up; the next poll unwinds it
+            self._apply(block)
+            applied += 1
+        return applied
+
+    def follow(self, interval=POLL_INTERVAL, on_block=None):
+        """Poll forever, calling `on_block(follower)` after every poll that moved the head"""
+        while True:
+            if self.poll() and on_block:
+                on_block(self)
+            time.sleep(interval)
+
+
+def main(argv=None):
+    from scripts.client import RPCTransport
+    from scripts.lp_curve import rpc_withdraw
+
+    parser = argparse.ArgumentParser(
+        description="Follow the chain head and keep voting power current"
+    )
+    parser.add_argument(
+        "--holders", required=True, help="file with one address per line"
+    )
+    parser.add_argument("--rpc", default="https://rpc.frax.com")
+    parser.add_argument("--depth", type=int, default=REORG_DEPTH)
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL)
+    args = parser.parse_args(argv)
+
+    with open(args.holders) as f:
+        holders = [line.strip() for line in f if line.strip()]
+
+    def withdraw(pool, index, state, block):
+        return rpc_withdraw(args.rpc, pool, index, block)
+
+    follower = Follower(
+        RPCTransport(args.rpc), depth=args.depth, withdraw=withdraw
+    ).bootstrap(holders)
+
+    def report(f):
+        m = f.metrics.counters
+        print(
+            f"block {f.number:,}: total {f.total_power / 10**18:,.2f} SQUID over {len(f.powers):,} holders"
+            f" (repriced {m.get('repriced', 0):,}, reorgs {m.get('reorgs', 0)})"
+        )
+
+    report(follower)
+    follower.follow(args.interval, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Differential fuzzer: SquidDaoVote on local mocks vs. the exact off-chain model.
+
+Each case draws two pool states and a 9-tentacle balance vector, writes them
+straight into storage inside a boa snapshot, calls ``balanceOf`` and reverts.
+Its result (including whether it reverts) must match ``scripts.model``
+exactly. Every ``batch_every``-th case also calls ``balanceOfBatch`` and
+``balanceOfPacked``, which must agree with ``balanceOf``; interpreting the
+batch views on every case would triple the EVM time for little extra
+coverage.  Workers run in separate processes, each with its own deployment.
+
+    python -m scripts.fuzz --cases 5000 --workers 8 --seed 1
+"""
+
+import argparse
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from scripts import model, packed
+from scripts.model import DUST_THRESHOLD, ModelRevert, PoolState
+
+HOLDER = "0x00000000000000000000000000000000DeaDBeef"
+N_TENTACLES = 9
+REVERT = "revert"
+VIEWS = ("balanceOf", "balanceOfBatch", "balanceOfPacked")
+BATCH_EVERY = 8
+
+
+@dataclass
+class FuzzCase:
+    pools: list
+    balances: list
+
+
+@dataclass
+class Mismatch:
+    case: FuzzCase
+    contract: object
+    model: object
+
+
+@dataclass
+class FuzzReport:
+    cases: int = 0
+    reverts: int = 0
+    batch_checked: int = 0
+    elapsed: float = 0.0
+    mismatches: list = field(default_factory=list)
+
+    @property
+    def cases_per_second(self):
+        return self.cases / self.elapsed if self.elapsed else 0.0
+
+    def merge(self, other):
+        # Workers run side by side, so wall-clock is the slowest of them
+        return FuzzReport(
+            cases=self.cases + other.cases,
+            reverts=self.reverts + other.reverts,
+            batch_checked=self.batch_checked + other.batch_checked,
+            elapsed=max(self.elapsed, other.elapsed),
+            mismatches=self.mismatches + other.mismatches,
+        )
+
+
+# ============================================================================
+# Case generation
+# ============================================================================
+
+
+def random_amount(rng):
+    """Balances biased toward zero, dust, the dust threshold and extremes"""
+    r = rng.random()
+    if r < 0.25:
+        return 0
+    if r < 0.40:
+        return rng.randrange(1, DUST_THRESHOLD)
+    if r < 0.50:
+        return DUST_THRESHOLD + rng.randint(-3, 3)
+    if r < 0.995:
+        return int(10 ** rng.uniform(7, 26))
+    return rng.randrange(2**128, 2**255)
+
+
+def random_pool(rng):
+    """Mostly healthy pools, with empty reserves, tiny supply and >100% fees mixed in"""
+
+    def reserve():
+        return 0 if rng.random() < 0.01 else int(10 ** rng.uniform(0, 30))
+
+    r = rng.random()
+    if r < 0.5:
+        fee = 0
+    elif r < 0.99:
+        fee = rng.randrange(0, 5 * 10**7)
+    else:
+        fee = rng.randrange(10**10, 2 * 10**10)
+
+    return PoolState(
+        balances=(reserve(), reserve()),
+        total_supply=int(
+            10 ** rng.uniform(7, 30)
+            if rng.random() < 0.05
+            else 10 ** rng.uniform(26, 30)
+        ),
+        fee=fee,
+        price_oracle=int(10 ** rng.uniform(12, 24)),
+    )
+
+
+def random_case(rng):
+    return FuzzCase(
+        pools=[random_pool(rng), random_pool(rng)],
+        balances=[random_amount(rng) for _ in range(N_TENTACLES)],
+    )
+
+
+# ============================================================================
+# Harness
+# ============================================================================
+
+
+class DifferentialFuzzer:
+    """
+    Deploys the 9-tentacle layout on mocks in the active boa env once, then
+    evaluates cases under snapshot/revert. `reference` can be swapped to check
+    that a deliberately wrong model is caught.
+    """
+
+    def __init__(self, seed=0, reference=model.voting_power):
+        from scripts import mocks
+        from scripts.client import SquidDaoVoteClient
+
+        self.rng = random.Random(seed)
+        self.reference = reference
+        self._mocks = mocks
+
+        self.squid = mocks.deploy_token("Squid", "SQUID")
+        all_pools = mocks.deploy_mock_pools(self.squid)
+        self.pools = all_pools[:2]
+        registry, self.wrappers = mocks.deploy_wrappers(
+            self.squid, all_pools, N_TENTACLES
+        )
+        self.census = mocks.deploy_census(self.squid, all_pools, registry)
+        self.client = SquidDaoVoteClient.from_boa(self.census.address)
+
+        self.tokens = [self.squid] + self.wrappers
+        pool_ids = {p.address: k for k, p in enumerate(self.pools)}
+        self.tentacles = [
+            (None if pool == mocks.ZERO_ADDRESS else pool_ids[pool], index)
+            for _, pool, index in registry
+        ]
+
+    def evaluate_views(self, case, views=VIEWS):
+        """{view: power or REVERT} for each of `views`"""
+        import boa
+
+        with boa.env.anchor():
+            for pool, state in zip(self.pools, case.pools):
+                self._mocks.set_pool_state(pool, state)
+            for token, bal in zip(self.tokens, case.balances):
+                self._mocks.set_token_balance(token, HOLDER, bal)
+            return {view: self._call(view) for view in views}
+
+    def _call(self, view):
+        import boa
+
+        from scripts.client import ContractCallError
+
+        try:
+            if view == "balanceOfBatch":
+                return self.client.balanceOfBatch([HOLDER])[0]
+            if view == "balanceOfPacked":
+                return packed.decode_powers(
+                    self.client.balanceOfPacked(packed.encode_voters([HOLDER]))
+                )[0]
+            # Hot path: straight on the boa contract, no client ABI round-trip
+            return self.census.balanceOf(HOLDER)
+        except (boa.BoaError, ContractCallError):
+            return REVERT
+
+    def evaluate_contract(self, case, views=VIEWS):
+        """The views' common result, or all of them by name when they disagree"""
+        results = self.evaluate_views(case, views)
+        values = set(results.values())
+        return values.pop() if len(values) == 1 else results
+
+    def evaluate_model(self, case):
+        try:
+            return self.reference(
+                self.tentacles, case.balances, dict(enumerate(case.pools))
+            )
+        except ModelRevert:
+            return REVERT
+
+    def run(self, n_cases, batch_every=BATCH_EVERY):
+        report = FuzzReport()
+        start = time.perf_counter()
+        for i in range(n_cases):
+            case = random_case(self.rng)
+            views = VIEWS if i % batch_every == 0 else VIEWS[:1]
+            contract, expected = self.evaluate_contract(
+                case, views
+            ), self.evaluate_model(case)
+            report.cases += 1
+            report.batch_checked += len(views) > 1
+            if contract != expected:
+                report.mismatches.append(Mismatch(case, contract, expected))
+            elif expected == REVERT:
+                report.reverts += 1
+        report.elapsed = time.perf_counter() - start
+        return report
+
+
+def _worker(seed, n_cases, batch_every):
+    return DifferentialFuzzer(seed).run(n_cases, batch_every)
+
+
+def run_parallel(n_cases, workers=None, seed=0, batch_every=BATCH_EVERY):
+    """Split `n_cases` across `workers` processes (seeded seed, seed+1, ...)."""
+    workers = workers or multiprocessing.cpu_count()
+    shares = [n_cases // workers + (k < n_cases % workers) for k in range(workers)]
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        seeds = [seed + k for k in range(workers)]
+        reports = list(pool.map(_worker, seeds, shares, [batch_every] * workers))
+
+    merged = FuzzReport()
+    for report in reports:
+        merged = merged.merge(report)
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SquidDaoVote differential fuzzer")
+    parser.add_argument("--cases", type=int, default=1_000)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--batch-every",
+        type=int,
+        default=BATCH_EVERY,
+        help="check the batch views every N cases",
+    )
+    args = parser.parse_args(argv)
+
+    report = run_parallel(args.cases, args.workers, args.seed, args.batch_every)
+    print(
+        f"{report.cases:,} cases ({report.reverts:,} reverting, {report.batch_checked:,} batch-checked) "
+        f"in {report.elapsed:.2f}s "
+        f"on {args.workers} workers: {report.cases_per_second:,.0f} cases/s"
+    )
+    for mismatch in report.mismatches[:10]:
+        print(
+            f"MISMATCH contract={mismatch.contract} model={mismatch.model}\n  {mismatch.case}"
+        )
+    return 1 if report.mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
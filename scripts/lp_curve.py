@@ -0,0 +1,446 @@
+"""
+Precomputed LP valuation curves.
+
+``_lp_equivalent`` prices a position at ``calc_withdraw_one_coin(quantity)``,
+so the SQUID-per-LP rate depends on position size and every voter needs its
+own solve.  An ``LPCurve`` samples ``calc_withdraw_one_coin`` once per pool at a
+pinned block on a log-spaced grid, from the dust threshold up to LP total
+supply, and then values any number of positions by table lookup. Real
+twocrypto pools revert well before the full supply is withdrawn, so the grid
+stops at the first quantity that reverts; that quantity is kept as
+``reverts_at`` and larger positions are solved exactly.
+
+Bounds hold for curves that are monotone and concave in quantity, which
+single-sided Curve withdrawals are (slippage only grows with size), as long
+as the pool's rounding noise stays within ``slack``. Inside a segment
+``[a, b]`` the chord is a lower bound. The neighbouring secants, and ``f(b)``
+itself, give upper bounds. Segments whose samples break concavity always fall
+back to an exact solve, as does any position whose bound exceeds the tolerance.
+
+``slack`` is measured, not derived: the largest one-wei step seen in short
+probe runs, then widened until seeded off-grid exact solves land inside their
+bounds. The bounds are therefore empirical. Rounding noise the probes miss
+can push a lookup outside them; use ``tolerance=0`` where that matters.
+
+    curve = LPCurve.sample(withdraw, total_supply, block=block)
+    valuer = CurveValuer(curve, withdraw, tolerance=1e-6)
+    powers = valuer.value_many(lp_balances)
+
+    python -m scripts.lp_curve --block 12345678 --out lp_curves.json
+    curves = load_curves("lp_curves.json")  # {"squid_eth": LPCurve, ...}
+"""
+
+import bisect
+import json
+import math
+import random
+from dataclasses import dataclass, field
+
+from scripts.client import ContractCallError
+from scripts.model import DUST_THRESHOLD, PRECISION, ModelRevert, lp_balance_in_squid
+
+# Rounding allowance on top of the measured one-wei step of the curve
+DEFAULT_SLACK = 2
+PROBE_RUN = 32
+CALIBRATION_CHECKS = 64
+# What a `withdraw` raises when the pool reverts: the exact model and eth_call
+REVERTS = (ModelRevert, ContractCallError)
+
+
+def log_grid(lo, hi, points):
+    """Integer log-spaced grid from `lo` to `hi` inclusive, deduplicated"""
+    if hi <= lo:
+        return [lo]
+    if points < 2:
+        raise ValueError(
+            f"a grid from {lo} to {hi} needs at least 2 points, got {points}"
+        )
+    ratio = math.log(hi / lo) / (points - 1)
+    grid = {lo, hi}
+    for k in range(1, points - 1):
+        grid.add(min(hi, max(lo, round(lo * math.exp(ratio * k)))))
+    return sorted(grid)
+
+
+def rounding_step(withdraw, quantities, run=PROBE_RUN):
+    """
+    Largest one-wei step of `withdraw` over short runs at the start, middle
+    and end of the grid. Pools floor intermediate shares, so samples sit up to
+    one such step below the smooth curve; the mock's floored share of the
+    other coin is scaled by the price, ~1500 wei on SQUID/ETH. Sawtooth
+    periods longer than `run` wei are not seen; pass `slack` for those pools.
+    """
+    starts = {
+        quantities[0],
+        quantities[len(quantities) // 2],
+        max(quantities[-1] - run, 0),
+    }
+    step = 0
+    for start in starts:
+        outs = [withdraw(start + i) for i in range(run + 1)]
+        step = max(step, max(b - a for a, b in zip(outs, outs[1:])))
+    return step
+
+
+def contract_value(out, bal):
+    """
+    SQUID credited for `bal` LP that withdraws to `out` SQUID, with the
+    contract's rate rounding. Monotone in `out`, so it maps bounds to bounds.
+    """
+    rate = out * PRECISION // bal
+    return bal * rate // PRECISION
+
+
+def _ceil_div(a, b):
+    return -(-a // b)
+
+
+@dataclass
+class LPCurve:
+    quantities: list
+    outputs: list
+    block: object = None
+    pool: str = None
+    index: int = None
+    slack: int = DEFAULT_SLACK
+    concave: list = field(default=None)
+    reverts_at: int = None
+
+    def __post_init__(self):
+        if self.concave is None:
+            self.concave = self._check_concavity()
+
+    @classmethod
+    def sample(
+        cls,
+        withdraw,
+        total_supply,
+        points=256,
+        lo=DUST_THRESHOLD,
+        checks=CALIBRATION_CHECKS,
+        reverts=REVERTS,
+        **meta,
+    ):
+        """
+        Sample `withdraw(quantity) -> SQUID out` on a log grid from `lo` to `total_supply`.
+        `meta` (block, pool, index) is stored alongside so tables can be audited;
+        Unless `slack` is given it starts at the curve's measured rounding
+        step and is then calibrated against exact solves, see `calibrate`.
+        The grid is truncated at the first quantity whose withdraw raises one
+        of `reverts`, recorded as `reverts_at`.
+        """
+        quantities, outputs = [], []
+        for q in log_grid(lo, total_supply, points):
+            try:
+                outputs.append(withdraw(q))
+            except reverts:
+                meta["reverts_at"] = q
+                break
+            quantities.append(q)
+        if len(quantities) < 2:
+            raise ValueError(
+                f"withdraw reverts from {meta.get('reverts_at')}, too close to {lo} to sample"
+            )
+        if "slack" in meta:
+            return cls(quantities=quantities, outputs=outputs, **meta)
+
+        meta["slack"] = DEFAULT_SLACK + rounding_step(withdraw, quantities)
+        curve = cls(quantities=quantities, outputs=outputs, **meta)
+        curve.calibrate(withdraw, checks)
+        return curve
+
+    def calibrate(self, withdraw, checks=CALIBRATION_CHECKS, seed=0):
+        """
+        Solve `checks` seeded off-grid quantities exactly and widen `slack`
+        until every one lands inside its bounds. Catches rounding sawtooth
+        too coarse for rounding_step to see. This is an empirical check on a
+        sample, not a proof: the bounds are only as good as the probes.
+        """
+        rng = random.Random(seed)
+        lo, hi = self.quantities[0], self.quantities[-1]
+        probes = [round(lo * (hi / lo) ** rng.random()) for _ in range(checks)]
+        exact = {q: withdraw(q) for q in probes}
+
+        while True:
+            excess = 0
+            for q, out in exact.items():
+                bounds = self.bounds(q)
+                if bounds is not None:
+                    excess = max(excess, bounds[0] - out, out - bounds[1])
+            if excess <= 0:
+                return self
+            self.slack = 2 * self.slack + excess
+            self.concave = self._check_concavity()
+
+    def _check_concavity(self):
+        """concave[k] is True when segment k sits between non-increasing secants"""
+        q, f, s = self.quantities, self.outputs, self.slack
+        n = len(q) - 1
+        ok = [f[k + 1] + 2 * s >= f[k] for k in range(n)]  # monotone
+        for k in range(n - 1):
+            # secant(k) >= secant(k + 1), cross-multiplied, with rounding slack
+            left = (f[k + 1] - f[k] + 2 * s) * (q[k + 2] - q[k + 1])
+            right = (f[k + 2] - f[k + 1] - 2 * s) * (q[k + 1] - q[k])
+            if left < right:
+                ok[k] = ok[k + 1] = False
+        return ok
+
+    def _segment(self, quantity):
+        k = bisect.bisect_right(self.quantities, quantity) - 1
+        return min(k, len(self.quantities) - 2)
+
+    def bounds(self, quantity):
+        """
+        (low, high) for calc_withdraw_one_coin(quantity) given `slack`, or None if
+        the quantity is outside the table or its segment is not concave.
+        """
+        q, f, s = self.quantities, self.outputs, self.slack
+        if len(q) < 2 or quantity < q[0] or quantity > q[-1]:
+            return None
+        if quantity in (q[0], q[-1]):
+            exact = f[0] if quantity == q[0] else f[-1]
+            return exact, exact
+
+        k = self._segment(quantity)
+        if not self.concave[k]:
+            return None
+        a, b = q[k], q[k + 1]
+        fa, fb = f[k], f[k + 1]
+
+        # Samples sit within `s` of a concave, non-decreasing curve g, so:
+        # g lies above its chord, below g(b), and below both neighbouring
+        # secants extended into the segment. Each line through two samples
+        # carries up to 2s of noise, scaled by how far it is extrapolated.
+        low = fa + (fb - fa) * (quantity - a) // (b - a) - 2 * s
+
+        high = fb + 2 * s
+        if k > 0:
+            width = a - q[k - 1]
+            reach = quantity - a
+            ext = fa + _ceil_div((fa - f[k - 1]) * reach, width)
+            high = min(high, ext + 2 * s + _ceil_div(2 * s * reach, width))
+        if k + 2 < len(q):
+            width = q[k + 2] - b
+            reach = b - quantity
+            ext = fb - (f[k + 2] - fb) * reach // width
+            high = min(high, ext + 2 * s + _ceil_div(2 * s * reach, width))
+        return max(low, 0), high
+
+    def segment_errors(self):
+        """Worst-case bound width (SQUID wei) per segment, None where not concave"""
+        errors = []
+        for k in range(len(self.quantities) - 1):
+            if not self.concave[k]:
+                errors.append(None)
+                continue
+            a, b = self.quantities[k], self.quantities[k + 1]
+            # The width is concave piecewise-linear; sample its breakpoints densely enough
+            probes = {a + (b - a) * i // 16 for i in range(1, 16)}
+            errors.append(max(hi - lo for lo, hi in map(self.bounds, probes)))
+        return errors
+
+    def to_dict(self):
+        return {
+            "block": self.block,
+            "pool": self.pool,
+            "index": self.index,
+            "slack": self.slack,
+            "reverts_at": None if self.reverts_at is None else str(self.reverts_at),
+            "quantities": [str(q) for q in self.quantities],
+            "outputs": [str(o) for o in self.outputs],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            quantities=[int(q) for q in data["quantities"]],
+            outputs=[int(o) for o in data["outputs"]],
+            block=data.get("block"),
+            pool=data.get("pool"),
+            index=data.get("index"),
+            slack=data.get("slack", DEFAULT_SLACK),
+            reverts_at=(
+                None if data.get("reverts_at") is None else int(data["reverts_at"])
+            ),
+        )
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def save_curves(curves, path):
+    """Write {name: LPCurve} to one JSON file, the format `main` produces"""
+    with open(path, "w") as f:
+        json.dump({name: curve.to_dict() for name, curve in curves.items()}, f)
+
+
+def load_curves(path):
+    """{name: LPCurve} from a file written by `save_curves`"""
+    with open(path) as f:
+        return {name: LPCurve.from_dict(data) for name, data in json.load(f).items()}
+
+
+@dataclass
+class ValuationStats:
+    lookups: int = 0
+    exact: int = 0
+    dust: int = 0
+
+
+class CurveValuer:
+    """
+    Value LP balances the way SquidDaoVote does, from an LPCurve.
+
+    A position is priced from the table when its error bound is within
+    `tolerance` (relative to its value) and `abs_tolerance` (SQUID wei).
+    Otherwise it falls back to `withdraw`, the exact solve.
+    """
+
+    def __init__(self, curve, withdraw, tolerance=1e-6, abs_tolerance=0):
+        self.curve = curve
+        self.withdraw = withdraw
+        self.tolerance = tolerance
+        self.abs_tolerance = abs_tolerance
+        self.stats = ValuationStats()
+
+    def estimate(self, bal):
+        """(value, error) in SQUID wei, or None when the table cannot bound `bal`"""
+        bounds = self.curve.bounds(bal)
+        if bounds is None:
+            return None
+        low, high = contract_value(bounds[0], bal), contract_value(bounds[1], bal)
+        return (low + high) // 2, _ceil_div(high - low, 2)
+
+    def value(self, bal):
+        if bal < DUST_THRESHOLD:
+            self.stats.dust += 1
+            return 0
+
+        est = self.estimate(bal)
+        if est is not None:
+            value, error = est
+            if error <= max(self.abs_tolerance, self.tolerance * value):
+                self.stats.lookups += 1
+                return value
+
+        self.stats.exact += 1
+        return lp_balance_in_squid(self.withdraw, bal)
+
+    def value_many(self, balances):
+        return [self.value(bal) for bal in balances]
+
+
+def _rpc_view(transport, address, signature, args=(), types=()):
+    from eth_abi import decode, encode
+    from eth_utils import keccak
+
+    selector = keccak(text=signature)[:4]
+    return decode(
+        ["uint256"], transport.call(address, selector + encode(list(types), list(args)))
+    )[0]
+
+
+class RPCWithdraw:
+    """
+    `withdraw` callable for a live pool, pinned to `block` through eth_call.
+    `many(quantities)` prices a list of quantities in JSON-RPC batches of
+    `batch_size` calls, for callers repricing many holders at once.
+    """
+
+    SIGNATURE = "calc_withdraw_one_coin(uint256,uint256)"
+
+    def __init__(self, url, pool, index, block, session=None, batch_size=256):
+        from eth_utils import keccak
+
+        from scripts.client import RPCTransport
+
+        self.transport = RPCTransport(url, block=block, session=session)
+        self.pool = pool
+        self.index = index
+        self.batch_size = batch_size
+        self._selector = keccak(text=self.SIGNATURE)[:4]
+
+    def _data(self, quantity):
+        from eth_abi import encode
+
+        return self._selector + encode(["uint256", "uint256"], [quantity, self.index])
+
+    def __call__(self, quantity):
+        return int.from_bytes(
+            self.transport.call(self.pool, self._data(quantity)), "big"
+        )
+
+    def many(self, quantities):
+        outputs = []
+        for start in range(0, len(quantities), self.batch_size):
+            datas = [self._data(q) for q in quantities[start : start + self.batch_size]]
+            outputs.extend(
+                int.from_bytes(r, "big")
+                for r in self.transport.batch_call(self.pool, datas)
+            )
+        return outputs
+
+
+def rpc_withdraw(url, pool, index, block, session=None):
+    """`withdraw` callable for a live pool, pinned to `block`; see `RPCWithdraw`"""
+    return RPCWithdraw(url, pool, index, block, session=session)
+
+
+def sample_pool(url, pool, index, block, points=256):
+    """Sample a live pool from the dust threshold to its LP supply at `block`"""
+    from scripts.client import RPCTransport
+
+    total_supply = _rpc_view(RPCTransport(url, block=block), pool, "totalSupply()")
+    withdraw = rpc_withdraw(url, pool, index, block)
+    return LPCurve.sample(
+        withdraw, total_supply, points, block=block, pool=pool, index=index
+    )
+
+
+def main(argv=None):
+    import argparse
+
+    from scripts.tentacles import (
+        SQUID_ETH_INDEX,
+        SQUID_ETH_POOL,
+        SQUILL_SQUID_INDEX,
+        SQUILL_SQUID_POOL,
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Sample LP valuation curves at a pinned block"
+    )
+    parser.add_argument("--rpc", default="https://rpc.frax.com")
+    parser.add_argument("--block", type=int, required=True)
+    parser.add_argument("--points", type=int, default=256)
+    parser.add_argument("--out", default="lp_curves.json")
+    args = parser.parse_args(argv)
+
+    curves = {}
+    for name, pool, index in (
+        ("squid_eth", SQUID_ETH_POOL, SQUID_ETH_INDEX),
+        ("squill_squid", SQUILL_SQUID_POOL, SQUILL_SQUID_INDEX),
+    ):
+        curve = sample_pool(args.rpc, pool, index, args.block, args.points)
+        concave = sum(curve.concave)
+        print(
+            f"{name}: {len(curve.quantities)} points, slack {curve.slack:,} wei, {concave} segments concave"
+        )
+        if curve.reverts_at is not None:
+            print(
+                f"  reverts from {curve.reverts_at:,} LP wei, larger positions are solved exactly"
+            )
+        curves[name] = curve
+
+    save_curves(curves, args.out)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Census run metrics.
+
+Per-stage wall-clock timers, counters and batch-size summaries for a census
+run, with derived rates (RPC calls per voter, cache hit ratio, voters/s) and
+export as JSON or a Prometheus textfile. Any stage can be wrapped by a
+profiling hook, either ``cProfile`` or a stdlib stack sampler.
+
+    metrics = Metrics(hooks={"evm": CProfileHook("evm.prof")})
+    with metrics.stage("evm"):
+        ...
+    metrics.count("voters", 256)
+    metrics.write("census.prom")
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+PROMETHEUS_PREFIX = "squid_census"
+
+
+@dataclass
+class StageTimer:
+    seconds: float = 0.0
+    calls: int = 0
+
+
+@dataclass
+class Summary:
+    count: int = 0
+    total: int = 0
+    min: int = None
+    max: int = None
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+# ============================================================================
+# Profiling hooks
+# ============================================================================
+
+
+class CProfileHook:
+    """
+    Deterministic profile of a stage, accumulated across calls and dumped to
+    `path`. Python allows one active cProfile at a time, so don't hook two
+    stages that nest.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def dump(self):
+        self.profiler.dump_stats(self.path)
+
+
+class SamplingHook:
+    """
+    Stack sampler: a background thread records the profiled thread's stack
+    every `interval` seconds while the stage runs. `dump` writes collapsed
+    stacks (``frame;frame;frame count``), the input format of flamegraph tools.
+    """
+
+    def __init__(self, path, interval=0.001):
+        self.path = path
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self, target):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(threading.get_ident(),), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self):
+        with open(self.path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# ============================================================================
+# Metrics
+# ============================================================================
+
+
+class Metrics:
+    """
+    Collects one census run. Stage timers nest freely, so a stage's time
+    includes any stage opened inside it. `hooks` maps stage names to
+    profiling hooks that wrap every entry into that stage.
+    """
+
+    def __init__(self, hooks=None):
+        self.stages = defaultdict(StageTimer)
+        self.counters = Counter()
+        self.summaries = defaultdict(Summary)
+        self.hooks = dict(hooks or {})
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @contextmanager
+    def stage(self, name):
+        hook = self.hooks.get(name)
+        if hook:
+            hook.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timer = self.stages[name]
+            timer.seconds += time.perf_counter() - start
+            timer.calls += 1
+            if hook:
+                hook.stop()
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def observe(self, name, value):
+        self.summaries[name].observe(value)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        for hook in self.hooks.values():
+            hook.dump()
+        return self
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def derived(self):
+        voters = self.counters["voters"]
+        lookups = self.counters["cache_hits"] + self.counters["cache_misses"]
+        return {
+            "elapsed_seconds": self.elapsed,
+            "voters_per_second": voters / self.elapsed if self.elapsed else 0.0,
+            "rpc_calls_per_voter": (
+                self.counters["rpc_calls"] / voters if voters else 0.0
+            ),
+            "cache_hit_ratio": (
+                self.counters["cache_hits"] / lookups if lookups else 0.0
+            ),
+        }
+
+    def to_dict(self):
+        return {
+            "stages": {
+                name: {"seconds": t.seconds, "calls": t.calls}
+                for name, t in self.stages.items()
+            },
+            "counters": dict(self.counters),
+            "summaries": {
+                name: {
+                    "count": s.count,
+                    "sum": s.total,
+                    "min": s.min,
+                    "max": s.max,
+                    "mean": s.mean,
+                }
+                for name, s in self.summaries.items()
+            },
+            **self.derived(),
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        lines = []
+
+        def metric(name, kind, help_, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        stages = sorted(self.stages.items())
+        metric(
+            "stage_seconds_total",
+            "counter",
+            "Wall-clock seconds spent in each census stage",
+            [(f'{{stage="{n}"}}', t.seconds) for n, t in stages],
+        )
+        metric(
+            "stage_calls_total",
+            "counter",
+            "Entries into each census stage",
+            [(f'{{stage="{n}"}}', t.calls) for n, t in stages],
+        )
+        for name, value in sorted(self.counters.items()):
+            metric(
+                f"{name}_total",
+                "counter",
+                f"Census {name.replace('_', ' ')}",
+                [("", value)],
+            )
+        for name, s in sorted(self.summaries.items()):
+            metric(
+                name,
+                "summary",
+                f"Census {name.replace('_', ' ')}",
+                [("_count", s.count), ("_sum", s.total)],
+            )
+            metric(
+                f"{name}_max",
+                "gauge",
+                f"Largest census {name.replace('_', ' ')}",
+                [("", s.max)],
+            )
+        for name, value in self.derived().items():
+            metric(name, "gauge", f"Census {name.replace('_', ' ')}", [("", value)])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write `.prom` (Prometheus textfile) or JSON, atomically"""
+        text = self.to_prometheus() if str(path).endswith(".prom") else self.to_json()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def report(self):
+        """Human-readable table of stages, counters and rates"""
+        rows = [f"{'Stage':<12} {'seconds':>9} {'calls':>7} {'share':>6}"]
+        for name, t in sorted(self.stages.items(), key=lambda kv: -kv[1].seconds):
+            share = t.seconds / self.elapsed if self.elapsed else 0.0
+            rows.append(f"{name:<12} {t.seconds:>9.3f} {t.calls:>7,} {share:>6.1%}")
+        for name, value in sorted(self.counters.items()):
+            rows.append(f"{name:<24} {value:>12,}")
+        for name, value in self.derived().items():
+            rows.append(f"{name:<24} {value:>12,.3f}")
+        return "\n".join(rows)
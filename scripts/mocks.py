@@ -0,0 +1,125 @@
+"""
+Local stand-ins for the Fraxtal contracts behind SquidDaoVote.
+
+Everything here deploys into whatever ``boa.env`` is active, so callers can
+swap in a fresh environment (e.g. for gas measurements) and rebuild.
+"""
+
+import boa
+from eth_utils import keccak, to_canonical_address
+
+from scripts.artifacts import deploy_from_artifacts
+from scripts.tentacles import ZERO_ADDRESS
+
+ERC20_PATH = "contracts/test/ERC20.vy"
+TWOCRYPTO_PATH = "contracts/test/MockTwoCrypto.vy"
+THREECRYPTO_PATH = "contracts/test/MockThreeCrypto.vy"
+CENSUS_PATH = "contracts/SquidDaoVote.vy"
+
+SQUID_ETH_INDEX = 1
+SQUILL_SQUID_INDEX = 0
+
+# Storage layout of the 0.3.10 mocks (`vyper -f layout`)
+ERC20_BALANCE_SLOT = 6
+ERC20_SUPPLY_SLOT = 8
+TWOCRYPTO_BALANCES_SLOT = 2
+TWOCRYPTO_SUPPLY_SLOT = 4
+TWOCRYPTO_ORACLE_SLOT = 5
+TWOCRYPTO_FEE_SLOT = 6
+
+
+def deploy_token(name, symbol, decimals=18):
+    return boa.load(ERC20_PATH, name, symbol, decimals)
+
+
+def deploy_mock_pools(squid):
+    """
+    Deploy SQUID/ETH (SQUID at index 1), SQUID/SQUILL (SQUID at index 0)
+    and an ETH/USD oracle, seeded with roughly mainnet-shaped reserves.
+    """
+    weth = deploy_token("Wrapped Ether", "WETH")
+    squill = deploy_token("Squill", "SQUILL")
+
+    squid_eth = boa.load(
+        TWOCRYPTO_PATH,
+        [weth.address, squid.address],
+        [50 * 10**18, 75_000 * 10**18],
+        1_000 * 10**18,
+        666 * 10**12,
+    )
+    squill_squid = boa.load(
+        TWOCRYPTO_PATH,
+        [squid.address, squill.address],
+        [40_000 * 10**18, 3_200 * 10**18],
+        6_000 * 10**18,
+        125 * 10**17,
+    )
+    eth_usd = boa.load(THREECRYPTO_PATH, [3_000 * 10**18, 60_000 * 10**18])
+    return squid_eth, squill_squid, eth_usd
+
+
+def deploy_census(squid, pools, tentacles):
+    """Deploy SquidDaoVote from precompiled artifacts (no compile step)."""
+    squid_eth, squill_squid, eth_usd = pools
+    return deploy_from_artifacts(
+        squid.address,
+        squid_eth.address,
+        squill_squid.address,
+        eth_usd.address,
+        tentacles,
+    )
+
+
+def deploy_wrappers(squid, pools, n, one_pool=False):
+    """
+    Build an `n` tentacle registry: naked SQUID first, then fresh LP wrappers
+    alternating between the two pools (or all on SQUID/ETH with `one_pool`).
+    """
+    squid_eth, squill_squid, _ = pools
+    tentacles = [(squid.address, ZERO_ADDRESS, 0)]
+    wrappers = []
+    for i in range(n - 1):
+        wrapper = deploy_token(f"Wrapper {i}", f"W{i}")
+        if one_pool or i % 2 == 0:
+            tentacles.append((wrapper.address, squid_eth.address, SQUID_ETH_INDEX))
+        else:
+            tentacles.append(
+                (wrapper.address, squill_squid.address, SQUILL_SQUID_INDEX)
+            )
+        wrappers.append(wrapper)
+    return tentacles, wrappers
+
+
+# ============================================================================
+# Direct storage writes, for building state without transactions
+# ============================================================================
+
+
+def hashmap_slot(slot, key):
+    """Vyper HashMap slot: keccak256(slot . key)"""
+    # Hex strings skip to_canonical_address, which dominates bulk electorate writes
+    key = (
+        bytes.fromhex(key[2:])
+        if isinstance(key, str) and len(key) == 42
+        else to_canonical_address(key)
+    )
+    return int.from_bytes(
+        keccak(slot.to_bytes(32, "big") + key.rjust(32, b"\0")), "big"
+    )
+
+
+def set_token_balance(token, holder, amount):
+    boa.env.set_storage(token.address, hashmap_slot(ERC20_BALANCE_SLOT, holder), amount)
+
+
+def set_token_supply(token, amount):
+    boa.env.set_storage(token.address, ERC20_SUPPLY_SLOT, amount)
+
+
+def set_pool_state(pool, state):
+    """Write a `scripts.model.PoolState` into a MockTwoCrypto pool"""
+    boa.env.set_storage(pool.address, TWOCRYPTO_BALANCES_SLOT, state.balances[0])
+    boa.env.set_storage(pool.address, TWOCRYPTO_BALANCES_SLOT + 1, state.balances[1])
+    boa.env.set_storage(pool.address, TWOCRYPTO_SUPPLY_SLOT, state.total_supply)
+    boa.env.set_storage(pool.address, TWOCRYPTO_ORACLE_SLOT, state.price_oracle)
+    boa.env.set_storage(pool.address, TWOCRYPTO_FEE_SLOT, state.fee)
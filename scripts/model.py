@@ -0,0 +1,116 @@
+"""
+Exact off-chain model of SquidDaoVote and the mock Curve pools.
+
+Integer arithmetic mirrors the contracts line by line, including where they
+revert (uint256 overflow, underflow, division by zero), which surfaces as
+``ModelRevert``.  Pool valuation takes a ``calc_withdraw`` callable so the
+same code path can be driven by the mock pool formula or any other curve.
+"""
+
+from dataclasses import dataclass
+
+UINT256_MAX = 2**256 - 1
+PRECISION = 10**18
+FEE_PRECISION = 10**10
+DUST_THRESHOLD = 10_000_000
+
+
+class ModelRevert(Exception):
+    pass
+
+
+def _add(a, b):
+    if a + b > UINT256_MAX:
+        raise ModelRevert("overflow")
+    return a + b
+
+
+def _sub(a, b):
+    if b > a:
+        raise ModelRevert("underflow")
+    return a - b
+
+
+def _mul(a, b):
+    if a * b > UINT256_MAX:
+        raise ModelRevert("overflow")
+    return a * b
+
+
+def _div(a, b):
+    if b == 0:
+        raise ModelRevert("division by zero")
+    return a // b
+
+
+@dataclass(frozen=True)
+class PoolState:
+    """Storage of a MockTwoCrypto pool that valuation depends on"""
+
+    balances: tuple
+    total_supply: int
+    fee: int = 0
+    price_oracle: int = PRECISION
+
+
+def calc_withdraw_one_coin(pool, token_amount, i):
+    """MockTwoCrypto.calc_withdraw_one_coin"""
+    if token_amount > pool.total_supply:
+        raise ModelRevert("amount exceeds supply")
+    j = _sub(1, i)
+    b_i, b_j = pool.balances[i], pool.balances[j]
+
+    share_i = _div(_mul(b_i, token_amount), pool.total_supply)
+    share_j = _div(_mul(b_j, token_amount), pool.total_supply)
+    swapped = _div(_mul(_sub(b_i, share_i), share_j), b_j)
+
+    out = _add(share_i, swapped)
+    return _sub(out, _div(_mul(out, pool.fee), FEE_PRECISION))
+
+
+def lp_equivalent(calc_withdraw, quantity):
+    """SquidDaoVote._lp_equivalent: SQUID per 10**18 LP at `quantity`"""
+    if quantity == 0:
+        return 0
+    return _div(_mul(calc_withdraw(quantity), PRECISION), quantity)
+
+
+def lp_balance_in_squid(calc_withdraw, bal):
+    """SquidDaoVote._lp_balance_in_squid"""
+    if bal < DUST_THRESHOLD:
+        return 0
+    rate = lp_equivalent(calc_withdraw, bal)
+    return _div(_mul(bal, rate), PRECISION)
+
+
+def mock_pool_withdraw(pool, index):
+    """`calc_withdraw` callable for a MockTwoCrypto pool state"""
+    return lambda quantity: calc_withdraw_one_coin(pool, quantity, index)
+
+
+def voting_power(tentacles, balances, pools, withdraw=None):
+    """
+    SquidDaoVote.balanceOf.
+
+    `tentacles` is the registry as ``(pool, index)`` pairs (``pool`` is None for
+    naked SQUID), `balances` the holder's balance of each tentacle token and
+    `pools` maps each pool to its PoolState. `withdraw(pool, index)`, when
+    given, returns the ``calc_withdraw`` callable a pool is priced with
+    instead of the MockTwoCrypto model of its state.
+    """
+    total = 0
+    lp_bals = {}
+    for (pool, index), bal in zip(tentacles, balances):
+        if pool is None:
+            total = _add(total, bal)
+        else:
+            lp_bals[(pool, index)] = _add(lp_bals.get((pool, index), 0), bal)
+
+    for (pool, index), bal in lp_bals.items():
+        calc = (
+            withdraw(pool, index)
+            if withdraw
+            else mock_pool_withdraw(pools[pool], index)
+        )
+        total = _add(total, lp_balance_in_squid(calc, bal))
+    return total
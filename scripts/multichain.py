@@ -0,0 +1,222 @@
+"""
+Concurrent multi-chain census.
+
+Holders keep SQUID and LP on more than one network. Every network has its
+own SquidDaoVote-compatible deployment, so each one is scored through a
+`scripts.census.Census` of its own. All networks run concurrently, and each
+is pinned to its own snapshot block: the last block at or before one shared
+timestamp. Powers are merged per address with a per-chain breakdown. The
+run takes about as long as the slowest chain, not the sum of all of them.
+
+    python -m scripts.multichain --voters voters.txt --timestamp 1700000000 \\
+        --chain fraxtal https://rpc.frax.com 0x... \\
+        --chain ethereum https://eth.example 0x... --out powers.csv
+"""
+
+import argparse
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from eth_utils import to_checksum_address
+
+from scripts import packed
+from scripts.census import Census
+from scripts.client import RPCTransport, SquidDaoVoteClient
+from scripts.metrics import Metrics
+
+
+class ChainError(Exception):
+    """A chain failed; the message names it"""
+
+
+class RPCEndpoint:
+    """A chain reached over JSON-RPC: block headers, and transports pinned to a block"""
+
+    def __init__(self, url, timeout=30):
+        import requests
+
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._rpc = RPCTransport(url, timeout=timeout, session=self.session)
+
+    def block(self, tag):
+        """{"number": int, "timestamp": int} for a block number or tag"""
+        tag = hex(tag) if isinstance(tag, int) else tag
+        header = self._rpc.request("eth_getBlockByNumber", [tag, False])
+        return {
+            "number": int(header["number"], 16),
+            "timestamp": int(header["timestamp"], 16),
+        }
+
+    def transport(self, block):
+        return RPCTransport(
+            self.url, block=block, timeout=self.timeout, session=self.session
+        )
+
+
+@dataclass
+class Chain:
+    name: str
+    endpoint: object  # RPCEndpoint or anything with block() / transport()
+    address: str  # SquidDaoVote deployment on this chain
+
+
+@dataclass
+class ChainRun:
+    block: int
+    timestamp: int
+    powers: dict
+    seconds: float
+    metrics: Metrics
+
+
+@dataclass
+class MultiChainResult:
+    powers: dict  # address -> total power across chains
+    breakdown: dict  # address -> {chain: power}, chains with power only
+    chains: dict = field(default_factory=dict)  # chain -> ChainRun
+    seconds: float = 0.0
+
+    def to_rows(self):
+        names = list(self.chains)
+        yield ["address", "power", *names]
+        for address, power in self.powers.items():
+            by_chain = self.breakdown.get(address, {})
+            yield [address, power, *(by_chain.get(name, 0) for name in names)]
+
+
+# ============================================================================
+# Snapshot blocks
+# ============================================================================
+
+
+def block_at(endpoint, timestamp):
+    """
+    Last block with timestamp <= `timestamp`. Interpolates on block times,
+    which lands within a block or two on chains with a steady cadence, and
+    bisects every other step so irregular chains still take O(log n) requests.
+    """
+    hi = endpoint.block("latest")
+    if hi["timestamp"] <= timestamp:
+        return hi
+    lo = endpoint.block(0)
+    if lo["timestamp"] > timestamp:
+        raise ValueError(f"timestamp {timestamp} is before genesis")
+
+    step = 0
+    while hi["number"] - lo["number"] > 1:
+        if step % 2 == 0:
+            span = hi["timestamp"] - lo["timestamp"]
+            guess = (
+                lo["number"]
+                + (timestamp - lo["timestamp"]) * (hi["number"] - lo["number"]) // span
+            )
+        else:
+            guess = (lo["number"] + hi["number"]) // 2
+        guess = min(max(guess, lo["number"] + 1), hi["number"] - 1)
+        probe = endpoint.block(guess)
+        if probe["timestamp"] <= timestamp:
+            lo = probe
+        else:
+            hi = probe
+        step += 1
+    return lo
+
+
+# ============================================================================
+# Census
+# ============================================================================
+
+
+def run_chain(chain, voters, timestamp, batch_size=packed.MAX_BATCH):
+    start = time.perf_counter()
+    try:
+        snapshot = block_at(chain.endpoint, timestamp)
+        client = SquidDaoVoteClient(
+            chain.address, chain.endpoint.transport(snapshot["number"])
+        )
+        census = Census(client, batch_size=batch_size)
+        powers = census.run(voters)
+    except Exception as e:
+        raise ChainError(f"{chain.name}: {e}") from e
+    return ChainRun(
+        block=snapshot["number"],
+        timestamp=snapshot["timestamp"],
+        powers=powers,
+        seconds=time.perf_counter() - start,
+        metrics=census.metrics.finish(),
+    )
+
+
+def merge(runs):
+    """{chain: ChainRun} -> (total powers, per-chain breakdown)"""
+    powers, breakdown = {}, {}
+    for name, run in runs.items():
+        for address, power in run.powers.items():
+            powers[address] = powers.get(address, 0) + power
+            if power:
+                breakdown.setdefault(address, {})[name] = power
+    return powers, breakdown
+
+
+def multichain_census(
+    chains, voters, timestamp=None, batch_size=packed.MAX_BATCH, concurrency=None
+):
+    """
+    Score `voters` on every chain at `timestamp` (default: now) and merge.
+    `concurrency=1` runs the chains one after another.
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    voters = [to_checksum_address(v) for v in voters]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency or len(chains)) as pool:
+        futures = {
+            c.name: pool.submit(run_chain, c, voters, timestamp, batch_size)
+            for c in chains
+        }
+        runs = {name: future.result() for name, future in futures.items()}
+    powers, breakdown = merge(runs)
+    return MultiChainResult(powers, breakdown, runs, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="SquidDaoVote census across several chains"
+    )
+    parser.add_argument(
+        "--voters", required=True, help="file with one address per line"
+    )
+    parser.add_argument(
+        "--chain",
+        nargs=3,
+        action="append",
+        required=True,
+        metavar=("NAME", "RPC", "ADDRESS"),
+    )
+    parser.add_argument("--timestamp", type=int, help="snapshot time (default: now)")
+    parser.add_argument("--batch-size", type=int, default=packed.MAX_BATCH)
+    parser.add_argument("--out", default="powers.csv")
+    args = parser.parse_args(argv)
+
+    with open(args.voters) as f:
+        voters = [line.strip() for line in f if line.strip()]
+
+    chains = [
+        Chain(name, RPCEndpoint(url), address) for name, url, address in args.chain
+    ]
+    result = multichain_census(chains, voters, args.timestamp, args.batch_size)
+
+    with open(args.out, "w", newline="") as f:
+        csv.writer(f).writerows(result.to_rows())
+    for name, run in result.chains.items():
+        print(
+            f"{name:<12} block {run.block:>12,}  {run.seconds:6.2f}s  {run.metrics.counters['rpc_calls']} round trips"
+        )
+    print(f"{'total':<12} {len(result.powers):,} voters in {result.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Packed calldata for SquidDaoVote.balanceOfPacked.
+
+Voters go in as concatenated 20-byte addresses and powers come back as
+concatenated 32-byte big-endian words, saving the 12 zero bytes of ABI
+padding per voter that an ``address[]`` argument carries.
+"""
+
+from eth_utils import to_canonical_address
+
+ADDRESS_SIZE = 20
+WORD_SIZE = 32
+MAX_BATCH = 256
+
+
+def encode_voters(voters):
+    return b"".join(to_canonical_address(voter) for voter in voters)
+
+
+def decode_powers(data):
+    if len(data) % WORD_SIZE:
+        raise ValueError(f"packed powers must be a multiple of {WORD_SIZE} bytes")
+    return [
+        int.from_bytes(data[i : i + WORD_SIZE], "big")
+        for i in range(0, len(data), WORD_SIZE)
+    ]
+
+
+def chunks(voters, size=MAX_BATCH):
+    for i in range(0, len(voters), size):
+        yield voters[i : i + size]
+
+
+def packed_voting_power(client, voters, batch_size=MAX_BATCH):
+    """
+    Score `voters` through a SquidDaoVoteClient, `batch_size` voters per call.
+    """
+    powers = []
+    for batch in chunks(list(voters), batch_size):
+        powers.extend(decode_powers(client.balanceOfPacked(encode_voters(batch))))
+    return powers
+
+
+def calldata_gas(data):
+    """EIP-2028 calldata cost: 4 gas per zero byte, 16 per non-zero byte."""
+    zeros = data.count(0)
+    return 4 * zeros + 16 * (len(data) - zeros)
@@ -0,0 +1,240 @@
+"""
+Zero-power prefilter for census runs.
+
+Most addresses submitted for scoring hold nothing: connected wallets and
+airdrop hunters. `HolderPrefilter` answers "definitely zero" for them
+without touching the chain. It combines two structures:
+
+- a bloom filter over the holder set of the tentacle tokens at one block
+  (naked SQUID > 0, or LP at or above the dust threshold in some pool).
+  An address that is not in it has zero power.
+- an exact negative cache of addresses that got past the bloom filter
+  (false positives, dust-only LP) but scored zero at that block.
+
+The filter only rules addresses out, never in. A holder is never skipped
+as long as the holder set is complete for the block. A superset is fine,
+e.g. every address that ever received a tentacle token.
+
+    python -m scripts.prefilter --block 12345678 --from-block 9000000 --out holders.bloom
+    python -m scripts.census --voters voters.txt --address 0x... --block 12345678 --prefilter holders.bloom
+"""
+
+import argparse
+import hashlib
+import json
+import math
+
+from eth_utils import to_canonical_address
+
+from scripts.model import DUST_THRESHOLD
+
+ERROR_RATE = 0.01
+NEGATIVE_LIMIT = 1_000_000  # exact zero-power entries kept per block
+LOG_STEP = 50_000  # blocks per eth_getLogs range
+
+
+class BloomFilter:
+    """Bloom filter over 20-byte addresses, keyed blake2b double hashing"""
+
+    def __init__(self, capacity, error_rate=ERROR_RATE, salt=b"squid"):
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.salt = salt
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key, digest_size=16, key=self.salt).digest()
+        h1, h2 = (
+            int.from_bytes(digest[:8], "little"),
+            int.from_bytes(digest[8:], "little") | 1,
+        )
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[p >> 3] >> (p & 7) & 1 for p in self._positions(key))
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+
+def relevant_holders(tentacles, balances):
+    """
+    Addresses whose power can be non-zero: naked SQUID > 0, or LP summed per
+    ``(pool, index)`` at or above the dust threshold. `tentacles` and
+    `balances` are the `scripts.electorate.Electorate` shapes.
+    """
+    holders = set()
+    lp = {}
+    for (pool, index), held in zip(tentacles, balances):
+        for holder, bal in held.items():
+            if not bal:
+                continue
+            if pool is None:
+                holders.add(holder)
+            else:
+                key = (holder, pool, index)
+                lp[key] = lp.get(key, 0) + bal
+    holders.update(
+        holder for (holder, _, _), bal in lp.items() if bal >= DUST_THRESHOLD
+    )
+    return holders
+
+
+class HolderPrefilter:
+    """Bloom filter plus negative cache, both valid for `block` only"""
+
+    def __init__(
+        self,
+        block,
+        holders,
+        error_rate=ERROR_RATE,
+        negative_limit=NEGATIVE_LIMIT,
+        capacity=None,
+    ):
+        holders = [to_canonical_address(h) for h in holders]
+        self.block = block
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity or len(holders), error_rate)
+        for key in holders:
+            self.bloom.add(key)
+        self.negative = set()
+        self.negative_limit = negative_limit
+        self.stats = {"lookups": 0, "bloom_skips": 0, "negative_hits": 0, "passed": 0}
+
+    @classmethod
+    def from_balances(cls, block, tentacles, balances, **kwargs):
+        return cls(block, relevant_holders(tentacles, balances), **kwargs)
+
+    def definitely_zero(self, voter):
+        """True only if `voter` certainly has zero power at `self.block`"""
+        key = to_canonical_address(voter)
+        self.stats["lookups"] += 1
+        if key not in self.bloom:
+            self.stats["bloom_skips"] += 1
+            return True
+        if key in self.negative:
+            self.stats["negative_hits"] += 1
+            return True
+        self.stats["passed"] += 1
+        return False
+
+    def remember_zero(self, voter):
+        """Record an address that scored zero at `self.block`"""
+        if len(self.negative) < self.negative_limit:
+            self.negative.add(to_canonical_address(voter))
+
+    def advance(self, block, touched=(), pools_changed=False):
+        """
+        Move to `block`. `touched` must hold every address whose tentacle
+        balances changed since the previous block; they join the bloom filter
+        and leave the negative cache. A pool change can lift a zero LP value,
+        so it clears the negative cache.
+        """
+        self.block = block
+        for holder in touched:
+            key = to_canonical_address(holder)
+            self.bloom.add(key)
+            self.negative.discard(key)
+        if pools_changed:
+            self.negative.clear()
+
+    @property
+    def skip_rate(self):
+        lookups = self.stats["lookups"]
+        return (
+            (self.stats["bloom_skips"] + self.stats["negative_hits"]) / lookups
+            if lookups
+            else 0.0
+        )
+
+    def save(self, path):
+        """A JSON header line, then the raw bloom bits"""
+        header = {
+            "block": self.block,
+            "size": self.bloom.size,
+            "hashes": self.bloom.hashes,
+            "salt": self.bloom.salt.hex(),
+            "error_rate": self.error_rate,
+        }
+        with open(path, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            f.write(self.bloom.bits)
+
+    @classmethod
+    def load(cls, path, negative_limit=NEGATIVE_LIMIT):
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            bits = f.read()
+        prefilter = cls(header["block"], [], header["error_rate"], negative_limit)
+        bloom = prefilter.bloom
+        bloom.size, bloom.hashes, bloom.salt = (
+            header["size"],
+            header["hashes"],
+            bytes.fromhex(header["salt"]),
+        )
+        bloom.bits = bytearray(bits)
+        return prefilter
+
+
+def holders_from_logs(source, tokens, from_block, to_block, step=LOG_STEP):
+    """
+    Every address that received a tentacle token in [from_block, to_block].
+    This is a superset of the holders at `to_block`, which is what the
+    prefilter needs. `source` is a `scripts.client.RPCTransport`.
+    """
+    from scripts.follower import TRANSFER_TOPIC
+
+    holders = set()
+    for start in range(from_block, to_block + 1, step):
+        query = {
+            "fromBlock": hex(start),
+            "toBlock": hex(min(start + step - 1, to_block)),
+            "address": list(tokens),
+            "topics": [TRANSFER_TOPIC],
+        }
+        logs = source.request("eth_getLogs", [query])
+        holders.update(
+            "0x" + log["topics"][2][-40:] for log in logs if len(log["topics"]) == 3
+        )
+    holders.discard("0x" + "00" * 20)
+    return holders
+
+
+def main(argv=None):
+    from scripts.client import RPCTransport
+    from scripts.tentacles import FRAXTAL_TENTACLES
+
+    parser = argparse.ArgumentParser(
+        description="Build a zero-power prefilter from Transfer logs"
+    )
+    parser.add_argument("--rpc", default="https://rpc.frax.com")
+    parser.add_argument("--block", type=int, required=True)
+    parser.add_argument(
+        "--from-block", type=int, default=0, help="first block with tentacle transfers"
+    )
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE)
+    parser.add_argument("--out", default="holders.bloom")
+    args = parser.parse_args(argv)
+
+    tokens = sorted({token for token, _, _ in FRAXTAL_TENTACLES})
+    holders = holders_from_logs(
+        RPCTransport(args.rpc), tokens, args.from_block, args.block
+    )
+    prefilter = HolderPrefilter(args.block, holders, args.error_rate)
+    prefilter.save(args.out)
+    print(
+        f"{len(holders):,} recipients -> {prefilter.bloom.nbytes:,} byte filter at block {args.block:,}"
+    )
+
+
+if __name__ == "__main__":
+    main()
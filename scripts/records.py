@@ -0,0 +1,388 @@
+"""
+Compact voter records for post-processing large census results.
+
+A dict of 20-byte keys to Python ints, plus a ranked list of (key, power)
+tuples, costs about 145 bytes per voter in small allocations. `VoterTable`
+keeps the same data in parallel columns instead, at about 58:
+
+- addresses: one bytearray of 20-byte keys
+- power: a `UintColumn`, uint256 values as four little-endian uint64 limb arrays
+- tentacle balances (optional): one `SparseColumn` per tentacle, holding only
+  non-zero entries as (position, value)
+
+Powers come straight from balanceOfPacked's 32-byte words: one `frombytes`,
+a byteswap and four strided slices, all in C, with no per-voter int. Totals,
+per-tentacle sums and ranks are computed over the columns. Merges add into
+them in place. Exports hand out the underlying buffers rather than copies.
+Addresses are checksummed only on export, row by row.
+
+    python -m scripts.records --voters 1000000
+"""
+
+import argparse
+import bisect
+import csv
+import sys
+import time
+from array import array
+
+from eth_utils import to_checksum_address
+
+from scripts.packed import ADDRESS_SIZE, WORD_SIZE, decode_powers
+
+LIMBS = WORD_SIZE // 8
+LIMB_MASK = (1 << 64) - 1
+UINT256_LIMIT = 1 << 256
+
+
+def _key(voter):
+    """20-byte key of a hex address, or the key itself"""
+    if isinstance(voter, bytes):
+        return voter
+    return bytes.fromhex(voter[2:] if voter[:2] in ("0x", "0X") else voter)
+
+
+def _rank_rows(order, limbs):
+    """
+    Sort row numbers in place by `limbs` (most significant first), descending
+    and stable. Each pass keys on one uint64 limb; only runs that tie on it
+    are re-sorted on the next limb down.
+    """
+    limb, rest = limbs[0], limbs[1:]
+    order.sort(key=limb.__getitem__, reverse=True)
+    if not rest:
+        return
+    keys = [limb[i] for i in order]
+    start = 0
+    for k in range(1, len(order) + 1):
+        if k == len(order) or keys[k] != keys[start]:
+            if k - start > 1:
+                run = order[start:k]
+                _rank_rows(run, rest)
+                order[start:k] = run
+            start = k
+
+
+class UintColumn:
+    """uint256 values as `LIMBS` parallel uint64 arrays, least significant limb first"""
+
+    __slots__ = ("limbs",)
+
+    def __init__(self, values=()):
+        self.limbs = [array("Q") for _ in range(LIMBS)]
+        self.extend(values)
+
+    def __len__(self):
+        return len(self.limbs[0])
+
+    def __getitem__(self, i):
+        a, b, c, d = (limb[i] for limb in self.limbs)
+        return a | b << 64 | c << 128 | d << 192
+
+    def __setitem__(self, i, value):
+        if not 0 <= value < UINT256_LIMIT:
+            raise OverflowError(f"{value} is not a uint256")
+        for k, limb in enumerate(self.limbs):
+            limb[i] = value >> 64 * k & LIMB_MASK
+
+    def __iter__(self):
+        for a, b, c, d in zip(*self.limbs):
+            yield a | b << 64 | c << 128 | d << 192
+
+    def append(self, value):
+        if not 0 <= value < UINT256_LIMIT:
+            raise OverflowError(f"{value} is not a uint256")
+        for k, limb in enumerate(self.limbs):
+            limb.append(value >> 64 * k & LIMB_MASK)
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def extend_packed(self, data):
+        """Append concatenated 32-byte big-endian words without building ints"""
+        if len(data) % WORD_SIZE:
+            raise ValueError(f"packed words must be a multiple of {WORD_SIZE} bytes")
+        words = array("Q")
+        words.frombytes(data)
+        if sys.byteorder == "little":
+            words.byteswap()
+        for k, limb in enumerate(self.limbs):
+            limb.extend(words[LIMBS - 1 - k :: LIMBS])
+
+    def add(self, i, value):
+        """In place: column[i] += value"""
+        self[i] = self[i] + value
+
+    def add_column(self, other):
+        """
+        In place: column[i] += other[i] for every row, one limb at a time
+        with carries, so no uint256 int is built per row. Limbs above the
+        highest non-zero limb of `other` are only touched by carries. Nothing
+        is written if any row would overflow.
+        """
+        if len(other) != len(self):
+            raise ValueError(f"columns differ in length: {len(self)} vs {len(other)}")
+        limbs = list(self.limbs)
+        carry = None
+        for k, (mine, theirs) in enumerate(zip(self.limbs, other.limbs)):
+            if carry is None:
+                sums = [a + b for a, b in zip(mine, theirs)]
+            elif not any(theirs):
+                if not any(carry):
+                    break
+                sums = [a + c for a, c in zip(mine, carry)]
+            else:
+                sums = [a + b + c for a, b, c in zip(mine, theirs, carry)]
+            limbs[k] = array("Q", [x & LIMB_MASK for x in sums])
+            carry = [x >> 64 for x in sums]
+        else:
+            if any(carry):
+                raise OverflowError("sum is not a uint256")
+        for limb, new in zip(self.limbs, limbs):
+            if limb is not new:
+                limb[:] = new
+
+    def sum(self):
+        return sum(sum(limb) << 64 * k for k, limb in enumerate(self.limbs))
+
+    def to_packed(self):
+        """The column as 32-byte big-endian words (the balanceOfPacked format)"""
+        words = array("Q")
+        words.frombytes(bytes(WORD_SIZE * len(self)))
+        for k, limb in enumerate(self.limbs):
+            words[LIMBS - 1 - k :: LIMBS] = limb
+        if sys.byteorder == "little":
+            words.byteswap()
+        return words.tobytes()
+
+    def buffers(self):
+        """Zero-copy views of the limb arrays. The column cannot grow while they are held."""
+        return [memoryview(limb) for limb in self.limbs]
+
+
+class SparseColumn:
+    """Non-zero uint256 entries by ascending position"""
+
+    __slots__ = ("positions", "values")
+
+    def __init__(self):
+        self.positions = array("I")
+        self.values = UintColumn()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def append(self, position, value):
+        if self.positions and position <= self.positions[-1]:
+            raise ValueError("positions must be appended in ascending order")
+        if value:
+            self.positions.append(position)
+            self.values.append(value)
+
+    def get(self, position, default=0):
+        i = bisect.bisect_left(self.positions, position)
+        if i < len(self.positions) and self.positions[i] == position:
+            return self.values[i]
+        return default
+
+    def sum(self):
+        return self.values.sum()
+
+
+class VoterTable:
+    """
+    Voters in input order with their power and, optionally, per-tentacle
+    balances. Row `i` is `address(i)`, `power[i]`, `tentacles[k].get(i)`.
+    """
+
+    __slots__ = ("addresses", "power", "tentacles")
+
+    def __init__(self, n_tentacles=0):
+        self.addresses = bytearray()
+        self.power = UintColumn()
+        self.tentacles = [SparseColumn() for _ in range(n_tentacles)]
+
+    def __len__(self):
+        return len(self.addresses) // ADDRESS_SIZE
+
+    def address(self, i):
+        return to_checksum_address(
+            bytes(self.addresses[i * ADDRESS_SIZE : (i + 1) * ADDRESS_SIZE])
+        )
+
+    def append(self, voter, power, holdings=()):
+        """`holdings` is one balance per tentacle, or empty"""
+        i = len(self)
+        self.addresses += _key(voter)
+        self.power.append(power)
+        for column, bal in zip(self.tentacles, holdings):
+            column.append(i, bal)
+
+    def extend_packed(self, voters, data):
+        """Append `voters` (hex or 20-byte keys) with their powers as balanceOfPacked returned them"""
+        if len(data) != WORD_SIZE * len(voters):
+            raise ValueError(
+                f"{len(voters)} voters but {len(data) // WORD_SIZE} powers"
+            )
+        self.addresses += b"".join(map(_key, voters))
+        self.power.extend_packed(data)
+
+    @classmethod
+    def from_powers(cls, powers):
+        """From {address: power}, as `scripts.census.Census.run` returns"""
+        table = cls()
+        table.addresses = bytearray(b"".join(map(_key, powers)))
+        table.power.extend(powers.values())
+        return table
+
+    @classmethod
+    def from_balances(cls, voters, balances, powers):
+        """
+        `balances[k]` maps voter -> balance of tentacle k (the
+        `scripts.electorate.Electorate` shape); `powers` is aligned with `voters`.
+        """
+        table = cls(len(balances))
+        table.addresses = bytearray(b"".join(map(_key, voters)))
+        table.power.extend(powers)
+        for column, held in zip(table.tentacles, balances):
+            for i, voter in enumerate(voters):
+                bal = held.get(voter)
+                if bal:
+                    column.positions.append(i)
+                    column.values.append(bal)
+        return table
+
+    def position(self, voter):
+        """Row of `voter`, or None. A linear scan of the address column."""
+        key = _key(voter)
+        start = self.addresses.find(key)
+        while start != -1 and start % ADDRESS_SIZE:
+            start = self.addresses.find(key, start + 1)
+        return None if start == -1 else start // ADDRESS_SIZE
+
+    # ------------------------------------------------------------------------
+    # Aggregation
+    # ------------------------------------------------------------------------
+
+    def total(self):
+        return self.power.sum()
+
+    def tentacle_sums(self):
+        return [column.sum() for column in self.tentacles]
+
+    def ranks(self):
+        """
+        Row numbers by power, highest first (ties by row). Compares limbs most
+        significant first and skips limbs that are zero in every row, so no
+        uint256 is built. The sort still holds a list of row numbers and one
+        limb's keys at a time, about 70 bytes per voter at peak.
+        """
+        order = list(range(len(self)))
+        limbs = [limb for limb in reversed(self.power.limbs) if any(limb)]
+        if order and limbs:
+            _rank_rows(order, limbs)
+        return array("I", order)
+
+    def accumulate(self, other):
+        """In place: add `other`'s powers limb-wise. Both tables must list the same voters."""
+        if self.addresses != other.addresses:
+            raise ValueError("tables list different voters")
+        self.power.add_column(other.power)
+
+    # ------------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------------
+
+    def rows(self):
+        for i, power in enumerate(self.power):
+            yield self.address(i), power
+
+    def write_csv(self, output):
+        """The same address,power CSV as `scripts.census.write_csv`"""
+        if isinstance(output, str):
+            with open(output, "w", newline="") as f:
+                return self.write_csv(f)
+        writer = csv.writer(output)
+        writer.writerow(["address", "power"])
+        writer.writerows(self.rows())
+
+    def buffers(self):
+        """Zero-copy views of every column, e.g. for `write(...)` or numpy.frombuffer"""
+        views = {"addresses": memoryview(self.addresses), "power": self.power.buffers()}
+        for k, column in enumerate(self.tentacles):
+            views[f"tentacle_{k}"] = (
+                memoryview(column.positions),
+                column.values.buffers(),
+            )
+        return views
+
+    def to_dict(self):
+        return dict(self.rows())
+
+
+# Both pipelines take the same 20-byte keys and packed words and produce
+# per-voter powers, a full ranking and the total. Neither checksums while
+# building; `_export_top` checksums the same rows for both.
+
+
+def _dict_pipeline(keys, words):
+    """The dict way: {key: power}, a ranked (key, power) list, the total"""
+    powers = dict(zip(keys, decode_powers(words)))
+    return (
+        powers,
+        sorted(powers.items(), key=lambda row: row[1], reverse=True),
+        sum(powers.values()),
+    )
+
+
+def _table_pipeline(keys, words):
+    table = VoterTable()
+    table.extend_packed(keys, words)
+    return table, table.ranks(), table.total()
+
+
+def _export_top(result, n=100):
+    """The top `n` (checksum address, power) rows of either pipeline's result"""
+    store, ranked, _ = result
+    if isinstance(store, VoterTable):
+        return [(store.address(i), store.power[i]) for i in ranked[:n]]
+    return [(to_checksum_address(key), power) for key, power in ranked[:n]]
+
+
+def main(argv=None):
+    import gc
+    import random
+    import tracemalloc
+
+    parser = argparse.ArgumentParser(
+        description="VoterTable vs dict memory and aggregation throughput"
+    )
+    parser.add_argument("--voters", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    keys = [rng.randbytes(ADDRESS_SIZE) for _ in range(args.voters)]
+    words = b"".join(rng.randrange(10**27).to_bytes(WORD_SIZE, "big") for _ in keys)
+
+    tops = []
+    for name, pipeline in (("dict", _dict_pipeline), ("table", _table_pipeline)):
+        gc.collect()
+        start = time.perf_counter()
+        tops.append(_export_top(pipeline(keys, words)))
+        seconds = time.perf_counter() - start
+        gc.collect()
+        tracemalloc.start()
+        result = pipeline(keys, words)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del result
+        print(
+            f"{name:<6} {size / len(keys):6.1f} bytes/voter, build + rank + total + top 100 {seconds:.2f}s"
+        )
+    assert tops[0] == tops[1]
+
+
+if __name__ == "__main__":
+    main()
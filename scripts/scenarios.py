@@ -0,0 +1,502 @@
+"""
+What-if scenarios for voting power under pool and price shocks.
+
+A `Snapshot` is a pinned census: every voter's tentacle balances and both
+pools' state at one block. A `Scenario` swaps in hypothetical pool states,
+and optionally some voters' balances (a whale pulling liquidity). It then
+revalues the whole electorate through the ``_lp_equivalent`` path of
+`scripts.model`, with no redeploying and no ``balanceOf`` calls.
+
+Naked SQUID does not depend on pools, so it is summed once per snapshot. LP
+balances are kept as sparse columns per ``(pool, index)``. Each scenario
+values every column in one exact-integer pass and adds it onto the naked
+totals. A grid of scenarios runs across worker processes.
+
+Snapshots come from the synthetic electorate (`Snapshot.from_electorate`) or
+from live balances read by `scripts.slots.BalanceReader`
+(`Snapshot.from_reader`). Synthetic pools are valued with MockTwoCrypto's
+withdraw formula. Live pools are valued by their own code: a `ForkPool`
+writes the scenario's balances and supply into the pool's storage on a boa
+fork, recomputes ``D`` with the pool's math contract, and calls
+``calc_withdraw_one_coin``.
+
+    python -m scripts.scenarios --voters 100000 --moves=-30,-10,10,30 --workers 4
+    python -m scripts.scenarios --rpc https://rpc.frax.com --block 12345678 --voters-file voters.txt
+"""
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field, replace
+
+from scripts.model import (
+    PRECISION,
+    PoolState,
+    lp_balance_in_squid,
+    mock_pool_withdraw,
+    voting_power,
+)
+from scripts.slots import MAX_SLOT
+from scripts.tentacles import ZERO_ADDRESS
+
+
+def _view(name, inputs=(), output="uint256"):
+    return {
+        "type": "function",
+        "name": name,
+        "stateMutability": "view",
+        "inputs": [{"name": f"arg{k}", "type": t} for k, t in enumerate(inputs)],
+        "outputs": [{"name": "", "type": output}],
+    }
+
+
+# The twocrypto-ng views a ForkPool reads; MockTwoCrypto has the first five
+POOL_ABI = [
+    _view("balances", ["uint256"]),
+    _view("totalSupply"),
+    _view("fee"),
+    _view("price_oracle"),
+    _view("calc_withdraw_one_coin", ["uint256", "uint256"]),
+    _view("D"),
+    _view("A"),
+    _view("gamma"),
+    _view("price_scale"),
+    _view("precisions", output="uint256[2]"),
+    _view("MATH", output="address"),
+]
+MATH_ABI = [_view("newton_D", ["uint256", "uint256", "uint256[2]", "uint256"])]
+
+
+@dataclass
+class Snapshot:
+    """
+    `balances[k]` maps voter -> balance of tentacle k, and `tentacles[k]` is
+    ``(pool, index)`` with ``pool`` None for naked SQUID (the
+    `scripts.electorate.Electorate` shapes). `pool_states` maps each pool
+    address in `tentacles` to its PoolState.
+    """
+
+    voters: list
+    tentacles: list
+    balances: list
+    pool_states: dict
+    block: int = None
+
+    def __post_init__(self):
+        position = {v: i for i, v in enumerate(self.voters)}
+        self.position = position
+        self.naked = [0] * len(self.voters)
+        lp = {}
+        for (pool, index), held in zip(self.tentacles, self.balances):
+            for voter, bal in held.items():
+                i = position[voter]
+                if pool is None:
+                    self.naked[i] += bal
+                else:
+                    column = lp.setdefault((pool, index), {})
+                    column[i] = column.get(i, 0) + bal
+        # (pool, index) -> (voter positions, LP balances), positions ascending
+        self.columns = {
+            key: (sorted(col), [col[i] for i in sorted(col)]) for key, col in lp.items()
+        }
+
+    @classmethod
+    def from_electorate(cls, electorate):
+        pools = {k: pool.address for k, pool in enumerate(electorate.pools[:2])}
+        tentacles = [
+            (None if p is None else pools[p], index)
+            for p, index in electorate.tentacles
+        ]
+        states = {pools[k]: state for k, state in electorate.pool_states().items()}
+        return cls(electorate.voters, tentacles, electorate.balances, states)
+
+    @classmethod
+    def from_reader(cls, reader, voters, registry, pool_states, block=None):
+        """
+        Live balances: `reader` is a `scripts.slots.BalanceReader` over the
+        tokens of `registry` (the constructor form ``[(token, pool, index)]``)
+        in registry order, pinned to the block `pool_states` were read at,
+        e.g. with `ForkPool.state`.
+        """
+        from eth_utils import to_checksum_address
+
+        if [to_checksum_address(token) for token, _, _ in registry] != reader.tokens:
+            raise ValueError("the reader's tokens are not the registry's, in order")
+        columns = reader.read_all(voters)
+        balances = [
+            {v: bal for v, bal in zip(voters, column) if bal} for column in columns
+        ]
+        tentacles = [
+            (None if pool == ZERO_ADDRESS else pool, index)
+            for _, pool, index in registry
+        ]
+        return cls(list(voters), tentacles, balances, dict(pool_states), block)
+
+    def holdings(self, voter):
+        return [held.get(voter, 0) for held in self.balances]
+
+
+@dataclass
+class Scenario:
+    """Pool states and voter balances that differ from the snapshot"""
+
+    name: str
+    pools: dict = field(default_factory=dict)  # pool -> PoolState
+    balances: dict = field(default_factory=dict)  # voter -> [balance per tentacle]
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    voters: list
+    powers: list
+    seconds: float = 0.0
+
+    @property
+    def total(self):
+        return sum(self.powers)
+
+    def ranking(self):
+        """Voter positions by power, highest first (ties by position)"""
+        return sorted(range(len(self.powers)), key=lambda i: (-self.powers[i], i))
+
+    def rank_changes(self, base, top=10):
+        """(voter, base rank, rank, base power, power) for this result's top `top`"""
+        base_rank = {i: r for r, i in enumerate(base.ranking())}
+        return [
+            (self.voters[i], base_rank[i] + 1, r + 1, base.powers[i], self.powers[i])
+            for r, i in enumerate(self.ranking()[:top])
+        ]
+
+
+# ============================================================================
+# Valuation
+# ============================================================================
+
+
+class ForkPool:
+    """
+    A pool in the active boa env, normally a fork of the live chain, valued
+    by its own ``calc_withdraw_one_coin``. `write` puts a PoolState into its
+    storage: both balances and ``totalSupply``, ``fee`` where storage backs
+    it (MockTwoCrypto), and ``D`` where the pool keeps one (twocrypto-ng),
+    recomputed from the new balances with the pool's ``MATH.newton_D`` so
+    the invariant stays consistent. ``price_scale`` and the curve parameters
+    are the pool's own.
+
+    Slots are found like `scripts.slots` finds balance mappings: a storage
+    word equal to the view's value, confirmed by rewriting it under a
+    snapshot and watching the view follow.
+    """
+
+    def __init__(self, address, max_slot=MAX_SLOT):
+        from boa.contracts.abi.abi_contract import ABIContractFactory
+
+        self.address = address
+        self.max_slot = max_slot
+        self.contract = ABIContractFactory.from_abi_dict(POOL_ABI, name="TwoCrypto").at(
+            address
+        )
+        c = self.contract
+        self.slots = {
+            "balance0": self._locate(lambda: c.balances(0)),
+            "balance1": self._locate(lambda: c.balances(1)),
+            "total_supply": self._locate(c.totalSupply),
+            "fee": self._locate(c.fee, required=False),
+            "D": self._locate(c.D, required=False),
+        }
+        self.math = None
+        if self.slots["D"] is not None:
+            self.math = ABIContractFactory.from_abi_dict(
+                MATH_ABI, name="TwoCryptoMath"
+            ).at(c.MATH())
+
+    def _locate(self, view, required=True):
+        """Storage slot whose word `view` returns, or None if not `required`"""
+        import boa
+
+        try:
+            value = view()
+        except boa.BoaError:
+            value = None
+        if value is not None:
+            for slot in range(self.max_slot):
+                if boa.env.get_storage(self.address, slot) != value:
+                    continue
+                with boa.env.anchor():
+                    boa.env.set_storage(self.address, slot, value ^ 1)
+                    moved = view() == value ^ 1
+                if moved:
+                    return slot
+        if required:
+            raise ValueError(f"{self.address}: no storage slot backs {view}")
+        return None
+
+    def state(self):
+        """The pool's current PoolState"""
+        c = self.contract
+        return PoolState(
+            balances=(c.balances(0), c.balances(1)),
+            total_supply=c.totalSupply(),
+            fee=c.fee(),
+            price_oracle=c.price_oracle(),
+        )
+
+    def newton_d(self, balances):
+        """The invariant ``D`` for `balances`, scaled the way twocrypto-ng scales them"""
+        c = self.contract
+        precisions = c.precisions()
+        xp = [
+            balances[0] * precisions[0],
+            balances[1] * precisions[1] * c.price_scale() // PRECISION,
+        ]
+        return self.math.newton_D(c.A(), c.gamma(), xp, 0)
+
+    def write(self, state):
+        """Write `state` into storage; the caller holds the boa snapshot"""
+        import boa
+
+        words = {
+            "balance0": state.balances[0],
+            "balance1": state.balances[1],
+            "total_supply": state.total_supply,
+            "fee": state.fee,
+        }
+        if self.math is not None:
+            words["D"] = self.newton_d(state.balances)
+        for name, word in words.items():
+            if self.slots[name] is not None:
+                boa.env.set_storage(self.address, self.slots[name], word)
+
+    def withdraw(self, index):
+        """`calc_withdraw` callable for whatever state is written"""
+        return lambda quantity: self.contract.calc_withdraw_one_coin(quantity, index)
+
+
+def value_column(state, index, quantities, withdraw=None):
+    """
+    `scripts.model.lp_balance_in_squid` for a column of LP quantities, priced
+    by `withdraw` (default: the MockTwoCrypto model of `state`)
+    """
+    withdraw = withdraw or mock_pool_withdraw(state, index)
+    return [lp_balance_in_squid(withdraw, q) for q in quantities]
+
+
+def revalue(snapshot, scenario, pools=None):
+    """
+    Every voter's power under `scenario`. `pools` maps pool addresses to
+    `ForkPool`s, which are priced by their own code with the scenario's
+    state written under a boa snapshot; other pools use the MockTwoCrypto
+    model.
+    """
+    pools = pools or {}
+    start = time.perf_counter()
+    states = {**snapshot.pool_states, **scenario.pools}
+    with ExitStack() as stack:
+        if pools:
+            import boa
+
+            stack.enter_context(boa.env.anchor())
+            for address, pool in pools.items():
+                pool.write(states[address])
+
+        def withdraw(pool, index):
+            return (
+                pools[pool].withdraw(index)
+                if pool in pools
+                else mock_pool_withdraw(states[pool], index)
+            )
+
+        powers = list(snapshot.naked)
+        for (pool, index), (positions, quantities) in snapshot.columns.items():
+            for i, value in zip(
+                positions,
+                value_column(states[pool], index, quantities, withdraw(pool, index)),
+            ):
+                powers[i] += value
+
+        for voter, holdings in scenario.balances.items():
+            powers[snapshot.position[voter]] = voting_power(
+                snapshot.tentacles, holdings, states, withdraw
+            )
+    return ScenarioResult(
+        scenario.name, snapshot.voters, powers, time.perf_counter() - start
+    )
+
+
+# ============================================================================
+# Shocks
+# ============================================================================
+
+
+def price_shock(state, squid_index, move):
+    """
+    Pool state after arbitrage moves SQUID's price by `move` (0.3 is +30%),
+    treating the pool as x*y=k: SQUID balance / sqrt(1+move), the other
+    side * sqrt(1+move). `price_oracle` (coin 1 priced in coin 0) follows.
+    """
+    root = math.isqrt(int((1 + move) * 10**36))  # sqrt(1+move) * 10**18
+    balances = list(state.balances)
+    balances[squid_index] = balances[squid_index] * PRECISION // root
+    balances[1 - squid_index] = balances[1 - squid_index] * root // PRECISION
+    ratio = root * root // PRECISION  # (1+move) * 10**18
+    oracle = (
+        state.price_oracle * ratio // PRECISION
+        if squid_index == 1
+        else state.price_oracle * PRECISION // ratio
+    )
+    return replace(state, balances=tuple(balances), price_oracle=oracle)
+
+
+def pull_liquidity(snapshot, voter, pool, name=None):
+    """Scenario where `voter` burns all their LP of `pool` for its underlying tokens"""
+    holdings = snapshot.holdings(voter)
+    burned = sum(bal for (p, _), bal in zip(snapshot.tentacles, holdings) if p == pool)
+    state = snapshot.pool_states[pool]
+    left = state.total_supply - burned
+    pulled = PoolState(
+        balances=tuple(b * left // state.total_supply for b in state.balances),
+        total_supply=left,
+        fee=state.fee,
+        price_oracle=state.price_oracle,
+    )
+    holdings = [
+        0 if p == pool else bal for (p, _), bal in zip(snapshot.tentacles, holdings)
+    ]
+    return Scenario(
+        name or f"{voter[:10]} pulls {pool[:10]}", {pool: pulled}, {voter: holdings}
+    )
+
+
+def price_grid(snapshot, squid_indices, moves):
+    """One scenario per (pool, move), plus every pool moved together per move"""
+    scenarios = []
+    for move in moves:
+        shocked = {
+            pool: price_shock(snapshot.pool_states[pool], squid_indices[pool], move)
+            for pool in squid_indices
+        }
+        for pool, state in shocked.items():
+            scenarios.append(Scenario(f"{pool[:10]} {move:+.0%}", {pool: state}))
+        scenarios.append(Scenario(f"all pools {move:+.0%}", shocked))
+    return scenarios
+
+
+# ============================================================================
+# Grid
+# ============================================================================
+
+_worker_snapshot = None
+
+
+def _init_worker(snapshot):
+    global _worker_snapshot
+    _worker_snapshot = snapshot
+
+
+def _revalue_in_worker(scenario):
+    return revalue(_worker_snapshot, scenario)
+
+
+def run_grid(snapshot, scenarios, workers=None, pools=None):
+    """
+    Revalue every scenario, in `workers` processes (default: one per CPU).
+    The snapshot is shipped to each worker once, not once per scenario.
+    `ForkPool`s live in this process's boa env, so with `pools` the grid
+    runs here, one scenario after another.
+    """
+    workers = workers or os.cpu_count() or 1
+    if pools or workers == 1 or len(scenarios) == 1:
+        return [revalue(snapshot, s, pools) for s in scenarios]
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(snapshot,)
+    ) as pool:
+        return list(pool.map(_revalue_in_worker, scenarios))
+
+
+def _live_snapshot(rpc, block, voters_file):
+    """Fork `rpc` at `block`, read the Fraxtal registry's balances for the voters in `voters_file`"""
+    import boa
+
+    from scripts.client import RPCTransport
+    from scripts.slots import BalanceReader
+    from scripts.tentacles import FRAXTAL_TENTACLES
+
+    with open(voters_file) as f:
+        voters = [line.strip() for line in f if line.strip()]
+    boa.fork(rpc, block_identifier=block)
+    pools = {
+        address: ForkPool(address)
+        for address in sorted({p for _, p, _ in FRAXTAL_TENTACLES} - {ZERO_ADDRESS})
+    }
+    reader = BalanceReader(
+        RPCTransport(rpc, block=block), [token for token, _, _ in FRAXTAL_TENTACLES]
+    )
+    states = {address: pool.state() for address, pool in pools.items()}
+    return Snapshot.from_reader(reader, voters, FRAXTAL_TENTACLES, states, block), pools
+
+
+def main(argv=None):
+    import boa
+
+    from scripts import electorate as synth
+    from scripts.mocks import SQUID_ETH_INDEX, SQUILL_SQUID_INDEX
+
+    parser = argparse.ArgumentParser(
+        description="Voting power under pool and price shocks"
+    )
+    parser.add_argument(
+        "--voters", type=int, default=10_000, help="synthetic electorate size"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--rpc", help="value live balances and pools on a fork of this endpoint"
+    )
+    parser.add_argument("--block", type=int, help="block to fork at, with --rpc")
+    parser.add_argument("--voters-file", help="one address per line, with --rpc")
+    parser.add_argument(
+        "--moves", default="-30,-10,10,30", help="SQUID price moves in percent"
+    )
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.rpc:
+        from scripts import tentacles
+
+        if args.block is None or args.voters_file is None:
+            parser.error("--rpc needs --block and --voters-file")
+        snapshot, pools = _live_snapshot(args.rpc, args.block, args.voters_file)
+        squid_indices = {
+            tentacles.SQUID_ETH_POOL: tentacles.SQUID_ETH_INDEX,
+            tentacles.SQUILL_SQUID_POOL: tentacles.SQUILL_SQUID_INDEX,
+        }
+    else:
+        with boa.swap_env(boa.Env()):
+            electorate = synth.build(voters=args.voters, seed=args.seed)
+        snapshot, pools = Snapshot.from_electorate(electorate), None
+        squid_eth, squill_squid = (pool.address for pool in electorate.pools[:2])
+        squid_indices = {squid_eth: SQUID_ETH_INDEX, squill_squid: SQUILL_SQUID_INDEX}
+    moves = [int(m) / 100 for m in args.moves.split(",")]
+    scenarios = [Scenario("base")] + price_grid(snapshot, squid_indices, moves)
+
+    start = time.perf_counter()
+    base, *results = run_grid(snapshot, scenarios, args.workers, pools)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(scenarios)} scenarios x {len(snapshot.voters):,} voters in {elapsed:.2f}s"
+    )
+
+    for result in results:
+        print(
+            f"\n{result.name}: total {result.total / 10**18:,.0f} SQUID ({result.total / base.total - 1:+.2%})"
+        )
+        for voter, was, now, _, power in result.rank_changes(base, args.top):
+            print(f"  #{now:<3} (was #{was:<4}) {voter}  {power / 10**18:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Bulk token balances read straight from storage.
+
+For a standard token, ``balanceOf(holder)`` is a single storage word. It is a
+mapping entry at ``keccak(slot . holder)`` under Vyper and at
+``keccak(holder . slot)`` under Solidity. `BalanceReader` finds each token's
+mapping slot once, by matching storage against ``balanceOf`` calls for a few
+holders. After that, thousands of balances come back as batched
+``eth_getStorageAt`` (or ``eth_getProof``) reads at the transport's pinned
+block, with no EVM execution.
+
+Some wrappers keep balances somewhere else: rebasing, computed or accrued
+balances. Detection finds no matching slot for these, so they are read with
+calls. Every storage read also spot-checks a few holders against calls, and
+falls back for good if a token stops matching its layout. A batch in which
+no holder has a balance proves nothing about the layout: it is read with
+calls, and detection is retried on the next batch.
+
+    reader = BalanceReader(RPCTransport(url, block=12345678), tokens)
+    balances = reader.read_all(voters)  # balances[k][i]: token k, voter i
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+
+from eth_abi import encode
+from eth_utils import keccak, to_canonical_address, to_checksum_address
+
+from scripts import packed
+from scripts.metrics import Metrics
+
+VYPER = "vyper"  # keccak(slot . key)
+SOLIDITY = "solidity"  # keccak(key . slot)
+CALL = "call"  # no plain mapping: read with balanceOf
+
+BALANCE_OF = keccak(text="balanceOf(address)")[:4]
+MAX_SLOT = 64  # candidate mapping slots tried per layout
+PROBES = 8  # holders with a balance that a layout must reproduce
+PROBE_POOL = 256  # holders called to find them
+SPOT_CHECKS = 2  # holders re-checked with calls on every storage read
+STORAGE_BATCH = 1_000
+
+
+@dataclass(frozen=True)
+class SlotLayout:
+    kind: str
+    slot: int = None
+
+    def slot_of(self, holder):
+        """Storage slot of `holder`'s balance"""
+        key = to_canonical_address(holder).rjust(32, b"\0")
+        base = self.slot.to_bytes(32, "big")
+        return int.from_bytes(
+            keccak(base + key if self.kind == VYPER else key + base), "big"
+        )
+
+
+class BalanceReader:
+    """
+    Reads `balanceOf` for many holders across `tokens` through a
+    `scripts.client` transport (RPC or boa). Layouts are detected lazily on the
+    first read of each token, or up front with `detect`.
+    """
+
+    def __init__(
+        self,
+        transport,
+        tokens,
+        batch_size=STORAGE_BATCH,
+        proof=False,
+        probes=PROBES,
+        max_slot=MAX_SLOT,
+        spot_checks=SPOT_CHECKS,
+        metrics=None,
+    ):
+        self.transport = transport
+        self.tokens = [to_checksum_address(t) for t in tokens]
+        self.batch_size = batch_size
+        self.proof = proof
+        self.probes = probes
+        self.max_slot = max_slot
+        self.spot_checks = spot_checks
+        self.metrics = metrics or Metrics()
+        self.layouts = {}
+
+    # ------------------------------------------------------------------ reads
+
+    def _calls(self, token, holders):
+        out = []
+        for chunk in packed.chunks(holders, self.batch_size):
+            datas = [BALANCE_OF + encode(["address"], [h]) for h in chunk]
+            with self.metrics.stage("calls"):
+                out += self.transport.batch_call(token, datas)
+        self.metrics.count("eth_calls", len(holders))
+        return [int.from_bytes(o[:32], "big") for o in out]
+
+    def _storage(self, token, slots):
+        fetch = self.transport.proof_storage if self.proof else self.transport.storage
+        out = []
+        for chunk in packed.chunks(slots, self.batch_size):
+            with self.metrics.stage("storage"):
+                out += fetch(token, chunk)
+        self.metrics.count("storage_reads", len(slots))
+        return out
+
+    # -------------------------------------------------------------- detection
+
+    def detect(self, token, holders):
+        """
+        Find `token`'s balance mapping from the first `PROBE_POOL` of
+        `holders` (any with balances will do) and cache it. Returns None, and
+        caches nothing, when none of them has a balance.
+        """
+        pool = list(holders[:PROBE_POOL])
+        return self._detect(
+            to_checksum_address(token), dict(zip(pool, self._calls(token, pool)))
+        )
+
+    def _detect(self, token, called):
+        """
+        Detection from `called` {holder: balanceOf}. Candidates are screened
+        against one holder's balance, then the survivors are checked against
+        all probes and one empty holder.
+        """
+        with self.metrics.stage("detect"):
+            funded = [h for h, bal in called.items() if bal][: self.probes]
+            if not funded:
+                self.metrics.count("layout_undetected")
+                return None
+            empty = [h for h, bal in called.items() if not bal][:1]
+
+            layout = SlotLayout(CALL)
+            candidates = [
+                SlotLayout(kind, slot)
+                for slot in range(self.max_slot)
+                for kind in (VYPER, SOLIDITY)
+            ]
+            first = funded[0]
+            words = self._storage(token, [c.slot_of(first) for c in candidates])
+            survivors = [
+                c for c, word in zip(candidates, words) if word == called[first]
+            ]
+            for candidate in survivors:
+                probes = funded[1:] + empty
+                words = self._storage(token, [candidate.slot_of(h) for h in probes])
+                if words == [called[h] for h in probes]:
+                    layout = candidate
+                    break
+        self.layouts[token] = layout
+        self.metrics.count(f"layout_{layout.kind}")
+        return layout
+
+    def read(self, token, holders):
+        """`balanceOf` of every holder, from storage where the layout allows"""
+        token = to_checksum_address(token)
+        layout = self.layouts.get(token)
+        if layout is None:
+            pool = list(holders[:PROBE_POOL])
+            head = self._calls(token, pool)
+            layout = self._detect(token, dict(zip(pool, head)))
+            if layout is None:
+                # The probed holders are all empty: call the rest, and detect
+                # from any of them that hold a balance
+                balances = head + self._calls(token, holders[len(pool) :])
+                self._detect(token, dict(zip(holders, balances)))
+                return balances
+        if layout.kind == CALL:
+            return self._calls(token, holders)
+
+        with self.metrics.stage("hash"):
+            slots = [layout.slot_of(h) for h in holders]
+        balances = self._storage(token, slots)
+
+        checks = [i for i, bal in enumerate(balances) if bal][: self.spot_checks]
+        if [balances[i] for i in checks] != self._calls(
+            token, [holders[i] for i in checks]
+        ):
+            self.layouts[token] = SlotLayout(CALL)
+            self.metrics.count("layout_fallbacks")
+            return self._calls(token, holders)
+        return balances
+
+    def read_all(self, holders):
+        """balances[k][i]: balance of token k for holders[i]"""
+        return [self.read(token, holders) for token in self.tokens]
+
+
+def main(argv=None):
+    from scripts.client import RPCTransport
+    from scripts.tentacles import FRAXTAL_TENTACLES
+
+    parser = argparse.ArgumentParser(
+        description="Read tentacle balances straight from storage"
+    )
+    parser.add_argument(
+        "--voters", required=True, help="file with one address per line"
+    )
+    parser.add_argument("--rpc", default="https://rpc.frax.com")
+    parser.add_argument("--block", required=True, type=int)
+    parser.add_argument(
+        "--proof",
+        action="store_true",
+        help="use eth_getProof instead of eth_getStorageAt",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.voters) as f:
+        voters = [line.strip() for line in f if line.strip()]
+
+    transport = RPCTransport(args.rpc, block=args.block)
+    reader = BalanceReader(
+        transport, [token for token, _, _ in FRAXTAL_TENTACLES], proof=args.proof
+    )
+    start = time.perf_counter()
+    reader.read_all(voters)
+    elapsed = time.perf_counter() - start
+
+    for token, layout in reader.layouts.items():
+        where = f"slot {layout.slot}" if layout.slot is not None else "balanceOf calls"
+        print(f"{token}  {layout.kind:<8} {where}")
+    reads = len(voters) * len(reader.tokens)
+    print(f"Read {reads:,} balances in {elapsed:.2f}s ({reads / elapsed:,.0f}/s)")
+    print(reader.metrics.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Weighted vote tally over SquidDaoVote voting power.
+
+Ballots stream in (from CSV, JSONL or any iterable) and are joined against
+voting power at the snapshot block chunk by chunk, so power is fetched only
+for addresses that voted. Memory stays bounded by the chunk size, the choice
+totals and one 20-byte key per distinct voter (needed to reject duplicate
+ballots).
+
+Three proposal kinds:
+
+- ``single``: a ballot names one choice, which gets the voter's full power
+- ``approval``: a ballot lists choices, each gets the voter's full power
+- ``weighted``: a ballot maps choices to weights; power is split
+  proportionally with largest-remainder rounding, so splits sum exactly
+
+The first valid ballot from each voter counts; later ones are reported as
+duplicates without being validated.
+
+    python -m scripts.tally ballots.jsonl --kind weighted --choices 3 \\
+        --address 0x... --block 12345678 --total-power-from powers.csv --quorum 0.1
+"""
+
+import argparse
+import csv
+import json
+from dataclasses import dataclass, field
+from fractions import Fraction
+from itertools import islice
+
+from eth_utils import to_checksum_address
+
+KINDS = ("single", "approval", "weighted")
+CHUNK_SIZE = 4_096
+
+
+class InvalidBallot(ValueError):
+    pass
+
+
+def voter_key(voter):
+    """20-byte key of a hex address, without eth_utils' per-call overhead"""
+    if not isinstance(voter, str) or len(voter) != 42 or voter[:2] not in ("0x", "0X"):
+        raise InvalidBallot(f"bad voter address {voter!r}")
+    return bytes.fromhex(voter[2:])
+
+
+@dataclass
+class Ballot:
+    voter: str
+    choice: object  # int, list of ints, or {choice: weight}
+
+
+@dataclass
+class TallyResult:
+    kind: str
+    totals: dict
+    total_power: int = None
+    quorum: Fraction = None
+    ballots: int = 0
+    counted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    zero_power: int = 0
+    participation: int = 0  # power behind counted ballots
+    errors: list = field(default_factory=list)
+
+    @property
+    def quorum_met(self):
+        if self.quorum is None or self.total_power is None:
+            return None
+        return self.participation >= self.quorum * self.total_power
+
+    @property
+    def turnout(self):
+        return self.participation / self.total_power if self.total_power else None
+
+    @property
+    def winner(self):
+        """Choice with the most power, or None on a tie or no power at all"""
+        ranked = sorted(self.totals.items(), key=lambda kv: -kv[1])
+        if (
+            not ranked
+            or ranked[0][1] == 0
+            or (len(ranked) > 1 and ranked[0][1] == ranked[1][1])
+        ):
+            return None
+        return ranked[0][0]
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "totals": {str(k): v for k, v in self.totals.items()},
+            "winner": self.winner,
+            "ballots": self.ballots,
+            "counted": self.counted,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "zero_power": self.zero_power,
+            "participation": self.participation,
+            "total_power": self.total_power,
+            "turnout": self.turnout,
+            "quorum": str(self.quorum) if self.quorum is not None else None,
+            "quorum_met": self.quorum_met,
+        }
+
+
+# ============================================================================
+# Allocation
+# ============================================================================
+
+
+def split_weighted(power, weights):
+    """
+    Split `power` across {choice: weight} proportionally. Floors first, then
+    hands leftover wei to the largest remainders (ties to the lower choice).
+    """
+    total = sum(weights.values())
+    shares = {c: power * w // total for c, w in weights.items()}
+    leftover = power - sum(shares.values())
+    by_remainder = sorted(weights, key=lambda c: (-(power * weights[c] % total), c))
+    for c in by_remainder[:leftover]:
+        shares[c] += 1
+    return shares
+
+
+def normalize(kind, choice, n_choices):
+    """Validate a ballot's choice for `kind`, returning its canonical form"""
+
+    def check(c):
+        if isinstance(c, bool) or not isinstance(c, int) or not 0 <= c < n_choices:
+            raise InvalidBallot(f"choice {c!r} out of range")
+        return c
+
+    if kind == "single":
+        return check(choice)
+    if kind == "approval":
+        if isinstance(choice, int) and not isinstance(choice, bool):
+            choice = [choice]  # approving a single choice
+        if not isinstance(choice, (list, tuple)) or not choice:
+            raise InvalidBallot("approval ballots list at least one choice")
+        choices = sorted({check(c) for c in choice})
+        if len(choices) != len(choice):
+            raise InvalidBallot("approval ballot repeats a choice")
+        return choices
+    if kind == "weighted":
+        if not isinstance(choice, dict) or not choice:
+            raise InvalidBallot("weighted ballots map choices to weights")
+        weights = {check(int(c)): w for c, w in choice.items()}
+        if any(
+            isinstance(w, bool) or not isinstance(w, int) or w < 0
+            for w in weights.values()
+        ):
+            raise InvalidBallot("weights are non-negative integers")
+        if not sum(weights.values()):
+            raise InvalidBallot("weights sum to zero")
+        return weights
+    raise ValueError(f"unknown proposal kind {kind!r}")
+
+
+# ============================================================================
+# Engine
+# ============================================================================
+
+
+class Tally:
+    """
+    Joins ballots against `census` power (a scripts.census.Census pinned to the
+    snapshot block). `total_power` is the electorate's total voting power for
+    turnout and quorum; `quorum` is the fraction of it that must participate.
+    """
+
+    def __init__(
+        self,
+        census,
+        kind,
+        n_choices,
+        total_power=None,
+        quorum=None,
+        chunk_size=CHUNK_SIZE,
+    ):
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}")
+        self.census = census
+        self.kind = kind
+        self.n_choices = n_choices
+        self.chunk_size = chunk_size
+        self.result = TallyResult(
+            kind=kind,
+            totals={c: 0 for c in range(n_choices)},
+            total_power=total_power,
+            quorum=Fraction(str(quorum)) if quorum is not None else None,
+        )
+        self._seen = set()
+
+    def _accept(self, ballot):
+        """Canonical (voter, choice) for a countable ballot, else None"""
+        result = self.result
+        try:
+            key = voter_key(ballot.voter)
+            if key in self._seen:
+                result.duplicates += 1
+                return None
+            choice = normalize(self.kind, ballot.choice, self.n_choices)
+        except (InvalidBallot, ValueError, TypeError) as e:
+            result.invalid += 1
+            if len(result.errors) < 100:
+                result.errors.append((ballot.voter, str(e)))
+            return None
+        self._seen.add(key)
+        return to_checksum_address(key), choice
+
+    def _count(self, choice, power):
+        totals = self.result.totals
+        if self.kind == "single":
+            totals[choice] += power
+        elif self.kind == "approval":
+            for c in choice:
+                totals[c] += power
+        else:
+            for c, share in split_weighted(power, choice).items():
+                totals[c] += share
+
+    def add(self, ballots):
+        """Count one chunk of ballots"""
+        ballots = list(ballots)
+        self.result.ballots += len(ballots)
+        accepted = [a for a in map(self._accept, ballots) if a is not None]
+        if not accepted:
+            return
+        powers = self.census.score([voter for voter, _ in accepted])
+        for (_, choice), power in zip(accepted, powers):
+            self.result.counted += 1
+            self.result.participation += power
+            self.result.zero_power += power == 0
+            self._count(choice, power)
+
+    def run(self, ballots):
+        """Stream `ballots` through in chunks and return the TallyResult"""
+        ballots = iter(ballots)
+        while chunk := list(islice(ballots, self.chunk_size)):
+            self.add(chunk)
+        return self.result
+
+
+# ============================================================================
+# Ballot sources
+# ============================================================================
+
+
+def parse_choice(text, kind=None):
+    """
+    CSV choice cell: ``2``, ``0;2`` (approval) or ``0:60;2:40`` (weighted).
+    For approval ballots a lone ``2`` approves just that choice.
+    """
+    text = text.strip()
+    if ":" in text:
+        return {
+            int(c): int(w) for c, w in (part.split(":") for part in text.split(";"))
+        }
+    if ";" in text or kind == "approval":
+        return [int(c) for c in text.split(";")]
+    return int(text)
+
+
+def read_ballots_csv(path, kind=None):
+    """Lazily read `voter,choice` rows (header optional), choices parsed for `kind`"""
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0] == "voter":
+                continue
+            try:
+                choice = parse_choice(row[1], kind)
+            except (ValueError, IndexError):
+                choice = None
+            yield Ballot(row[0], choice)
+
+
+def read_ballots_jsonl(path):
+    """Lazily read ``{"voter": ..., "choice": ...}`` lines"""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                data = json.loads(line)
+                yield Ballot(data["voter"], data["choice"])
+
+
+def read_ballots(path, kind=None):
+    return (
+        read_ballots_jsonl(path)
+        if str(path).endswith(".jsonl")
+        else read_ballots_csv(path, kind)
+    )
+
+
+def total_power_from_csv(path):
+    """Sum the power column of a scripts.census output file, streaming"""
+    with open(path, newline="") as f:
+        return sum(int(row["power"]) for row in csv.DictReader(f))
+
+
+def main(argv=None):
+    from scripts.census import Census
+    from scripts.client import SquidDaoVoteClient
+
+    parser = argparse.ArgumentParser(
+        description="Tally ballots by SquidDaoVote voting power"
+    )
+    parser.add_argument("ballots", help=".csv (voter,choice) or .jsonl")
+    parser.add_argument("--kind", choices=KINDS, default="single")
+    parser.add_argument("--choices", type=int, required=True)
+    parser.add_argument("--rpc", default="https://rpc.frax.com")
+    parser.add_argument(
+        "--address",
+        required=True,
+        help="SquidDaoVote deployment with balanceOfPacked (not DEPLOYED_ADDRESS)",
+    )
+    parser.add_argument("--block", type=int, required=True, help="snapshot block")
+    parser.add_argument("--total-power", type=int)
+    parser.add_argument(
+        "--total-power-from", help="census output CSV to sum for total power"
+    )
+    parser.add_argument(
+        "--quorum", type=float, help="fraction of total power, e.g. 0.1"
+    )
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    total_power = args.total_power
+    if args.total_power_from:
+        total_power = total_power_from_csv(args.total_power_from)
+
+    client = SquidDaoVoteClient.from_rpc(args.rpc, args.address, block=args.block)
+    tally = Tally(
+        Census(client),
+        args.kind,
+        args.choices,
+        total_power,
+        args.quorum,
+        args.chunk_size,
+    )
+    result = tally.run(read_ballots(args.ballots, args.kind))
+    print(json.dumps(result.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
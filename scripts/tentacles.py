@@ -0,0 +1,65 @@
+"""
+Tentacle registry configuration for SquidDaoVote.
+
+Each tentacle is a ``(token, pool, index)`` tuple: the wrapper token holders
+keep, the Curve pool behind it (the zero address for naked SQUID) and the
+SQUID coin index in that pool.  The order here is the order ``balanceOf``
+walks the registry.
+"""
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# NAKED SQUID 🦑🛀
+SQUID_TOKEN = "0x6e58089d8E8f664823d26454f49A5A0f2fF697Fe"
+
+# PRICE ORACLES ⚖️
+SQUID_ETH_POOL = "0x277FA53c8a53C880E0625c92C92a62a9F60f3f04"
+SQUILL_SQUID_POOL = "0xb2B1458960E4d64716c8C472c114441A02fBA1De"
+ETH_USD_POOL = "0xa0D3911349e701A1F49C1Ba2dDA34b4ce9636569"
+
+SQUID_ETH_INDEX = 1
+SQUILL_SQUID_INDEX = 0
+
+FRAXTAL_TENTACLES = [
+    # NAKED SQUID 🦑🛀
+    (SQUID_TOKEN, ZERO_ADDRESS, 0),
+    # SQUID/ETH LP 🦑💎
+    ("0x277FA53c8a53C880E0625c92C92a62a9F60f3f04", SQUID_ETH_POOL, SQUID_ETH_INDEX),
+    ("0xe5E5ed1B50AE33E66ca69dF17Aa6381FDe4e9C7e", SQUID_ETH_POOL, SQUID_ETH_INDEX),
+    ("0x29FF8F9ACb27727D8A2A52D16091c12ea56E9E4d", SQUID_ETH_POOL, SQUID_ETH_INDEX),
+    ("0x8CDCDccAB3fC79c267B8361AdDAefD3aADaB9778", SQUID_ETH_POOL, SQUID_ETH_INDEX),
+    # SQUID/SQUILL LP 🦑🪶
+    (
+        "0xb2B1458960E4d64716c8C472c114441A02fBA1De",
+        SQUILL_SQUID_POOL,
+        SQUILL_SQUID_INDEX,
+    ),
+    (
+        "0x9bC291018e0434a21218A16005B0e198b4814ba8",
+        SQUILL_SQUID_POOL,
+        SQUILL_SQUID_INDEX,
+    ),
+    (
+        "0x1CC03c1C714f767ca866A3Fa58c9153b1C087E85",
+        SQUILL_SQUID_POOL,
+        SQUILL_SQUID_INDEX,
+    ),
+    (
+        "0x9C1a1b52Bf2c42B6e7E2dCdAEF260b60386Ad76b",
+        SQUILL_SQUID_POOL,
+        SQUILL_SQUID_INDEX,
+    ),
+]
+
+
+def fraxtal_constructor_args():
+    """
+    Constructor arguments that reproduce the live Fraxtal deployment.
+    """
+    return (
+        SQUID_TOKEN,
+        SQUID_ETH_POOL,
+        SQUILL_SQUID_POOL,
+        ETH_USD_POOL,
+        FRAXTAL_TENTACLES,
+    )
@@ -1,14 +1,34 @@
 import os
+import sys
 
 import boa
 import pytest
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import mocks  # noqa: E402
+from scripts.artifacts import deploy_from_artifacts  # noqa: E402
+from scripts.electorate import build as build_electorate  # noqa: E402
+from scripts.tentacles import fraxtal_constructor_args  # noqa: E402
+
 # Fork mode configuration
 load_dotenv()
 FORK_RPC_URI = f"https://rpc.frax.com"
 SQUID_ADDR = "0x6e58089d8E8f664823d26454f49A5A0f2fF697Fe"
 
+# Isolation: titanoboa's pytest plugin opens a `boa.env.anchor()` (an EVM
+# journal checkpoint) around every fixture setup and every test, so the
+# session-scoped fork or local deployment below is built once per process and
+# each test runs on a cheap reverted copy of it. Tests may mutate state freely
+# (deal LP, rewrite pool storage); nothing leaks into the next test.
+#
+# Parallel runs (`pytest -n auto`): each pytest-xdist worker is its own
+# process with its own env. The controller pins one fork block for all
+# workers, and each worker keeps its own on-disk RPC cache, so workers never
+# contend for one sqlite file and later runs start warm.
+
+
 @pytest.fixture(scope="session")
 def fork_mode(request):
     """Fixture to determine if tests should run against a fork"""
@@ -18,6 +38,12 @@ def fork_mode(request):
 def pytest_addoption(parser):
     """Add fork option to pytest"""
     parser.addoption("--fork", action="store_true", help="run tests against fork")
+    parser.addoption(
+        "--fork-block",
+        default=None,
+        help="block to fork at (default: the current safe block)",
+    )
+    parser.addoption("--slow", action="store_true", help="also run slow benchmarks")
 
 
 def pytest_configure(config):
@@ -25,12 +51,53 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "fork_only: mark test to run only when --fork is used"
     )
+    config.addinivalue_line(
+        "markers", "slow: mark test to run only when --slow is used"
+    )
+
+
+def resolve_fork_block(config):
+    """Block number every process forks at, resolved once per run"""
+    if hasattr(config, "workerinput"):
+        return config.workerinput["fork_block"]
+    if config.getoption("--fork-block"):
+        return int(config.getoption("--fork-block"))
+    if not hasattr(config, "_fork_block"):
+        import requests
+
+        response = requests.post(
+            FORK_RPC_URI,
+            json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "eth_getBlockByNumber",
+                "params": ["safe", False],
+            },
+            timeout=30,
+        )
+        config._fork_block = int(response.json()["result"]["number"], 16)
+    return config._fork_block
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """xdist controller: hand every worker the same fork block"""
+    config = node.config
+    node.workerinput["fork_block"] = (
+        resolve_fork_block(config) if config.getoption("--fork") else None
+    )
+
+
+def worker_id(config):
+    return getattr(config, "workerinput", {}).get("workerid", "main")
 
 
 def pytest_runtest_setup(item):
-    """Skip fork_only marks when not in fork mode"""
+    """Skip fork_only marks when not in fork mode, and slow marks without --slow"""
     if "fork_only" in item.keywords and not item.config.getoption("--fork"):
         pytest.skip("test requires fork network")
+    if "slow" in item.keywords and not item.config.getoption("--slow"):
+        pytest.skip("slow benchmark, run with --slow")
 
 
 @pytest.fixture(scope="session")
@@ -48,19 +115,23 @@ def squid(env, fork_mode, zero_address):
 
 
 @pytest.fixture(scope="session")
-def env(fork_mode):
-    """Set up the boa environment based on fork mode"""
+def env(request, fork_mode):
+    """Set up the boa environment based on fork mode, once per worker"""
     if fork_mode:
-        boa.fork(FORK_RPC_URI, allow_dirty=True)
+        config = request.config
+        cache_dir = config.cache.mkdir(f"boa-fork-{worker_id(config)}")
+        boa.fork(
+            FORK_RPC_URI,
+            block_identifier=resolve_fork_block(config),
+            allow_dirty=True,
+            cache_dir=str(cache_dir),
+        )
     return boa.env
 
 
-
 @pytest.fixture(scope="session")
 def census(env, fork_mode):
-    contract = boa.load_partial("contracts/SquidDaoVote.vy")
-    deployment = contract.deploy()
-    return deployment
+    return deploy_from_artifacts(*fraxtal_constructor_args())
 
 
 @pytest.fixture(scope="session")
@@ -78,3 +149,24 @@ def voter_addresses(zero_address):
         zero_address,
     ]
 
+
+# ============================================================================
+# Local mocks (no fork required)
+# ============================================================================
+
+
+@pytest.fixture(scope="session")
+def mock_squid(env):
+    return mocks.deploy_token("Squid", "SQUID")
+
+
+@pytest.fixture(scope="session")
+def mock_pools(env, mock_squid):
+    """SQUID/ETH (SQUID at index 1), SQUID/SQUILL (SQUID at index 0) and ETH/USD"""
+    return mocks.deploy_mock_pools(mock_squid)
+
+
+@pytest.fixture(scope="session")
+def electorate(env):
+    """Seeded 1k-voter synthetic electorate on the 9-tentacle layout"""
+    return build_electorate(voters=1_000, seed=0)
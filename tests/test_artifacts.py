@@ -0,0 +1,138 @@
+import json
+import subprocess
+import sys
+
+import boa
+import pytest
+
+from scripts import artifacts, bench_startup, mocks
+from scripts.client import ContractCallError, PyEVMTransport, SquidDaoVoteClient
+
+HOLDER = "0x00000000000000000000000000000000DeaDBeef"
+
+
+@pytest.fixture
+def census_9(env, mock_squid, mock_pools):
+    tentacles, wrappers = mocks.deploy_wrappers(mock_squid, mock_pools, 9)
+    census = mocks.deploy_census(mock_squid, mock_pools, tentacles)
+
+    mock_squid._mint_for_testing(HOLDER, 1_000 * 10**18)
+    for i, wrapper in enumerate(wrappers):
+        wrapper._mint_for_testing(HOLDER, (i + 1) * 10**18)
+    return census
+
+
+def test_artifact_is_fresh():
+    """Fails when SquidDaoVote.vy changed without `python -m scripts.artifacts`"""
+    artifacts.load_artifacts(check=True)
+
+
+def test_artifact_matches_compiler(tmp_path):
+    built = artifacts.build_artifacts(artifact_path=str(tmp_path / "SquidDaoVote.json"))
+    committed = artifacts.load_artifacts()
+
+    for key in [
+        "abi",
+        "bytecode",
+        "bytecode_runtime",
+        "method_identifiers",
+        "storage_layout",
+    ]:
+        assert built[key] == committed[key], f"{key} differs from the compiler output"
+
+    assert committed["method_identifiers"]["balanceOf(address)"] == "0x70a08231"
+    assert committed["storage_layout"]["owner"]["slot"] == 0
+
+
+def test_stale_artifact_detected(tmp_path):
+    artifact = artifacts.load_artifacts()
+    artifact["source_sha256"] = "00" * 32
+    stale = tmp_path / "stale.json"
+    stale.write_text(json.dumps(artifact))
+
+    with pytest.raises(artifacts.StaleArtifactError):
+        artifacts.load_artifacts(str(stale))
+    artifacts.load_artifacts(str(stale), check=False)
+
+
+def test_client_matches_contract(census_9):
+    client = SquidDaoVoteClient.from_boa(census_9.address)
+
+    for fn in [
+        "balanceOf",
+        "squid_balance",
+        "squid_lp_balance",
+        "squill_lp_balance_in_squid",
+    ]:
+        assert client.call(fn, HOLDER) == getattr(census_9, fn)(HOLDER)
+
+    assert client.squid_lp_equivalent() == census_9.squid_lp_equivalent()
+    assert client.squid_lp_equivalent(10**17) == census_9.squid_lp_equivalent(10**17)
+    assert client.tentacles(1) == census_9.tentacles(1)
+    assert client.batch("balanceOf", [HOLDER, mocks.ZERO_ADDRESS]) == [
+        census_9.balanceOf(HOLDER),
+        0,
+    ]
+
+
+def test_client_surfaces_reverts(census_9):
+    client = SquidDaoVoteClient.from_boa(census_9.address)
+    with pytest.raises(ContractCallError):
+        client.tentacles(100)
+    with pytest.raises(AttributeError):
+        client.not_a_function(HOLDER)
+
+
+def test_deploy_from_artifacts_matches_compiled(census_9, mock_squid, mock_pools):
+    tentacles = [census_9.tentacles(i) for i in range(census_9.tentacle_count())]
+    compiled = boa.load(
+        mocks.CENSUS_PATH,
+        mock_squid.address,
+        *[p.address for p in mock_pools],
+        tentacles,
+    )
+    assert compiled.balanceOf(HOLDER) == census_9.balanceOf(HOLDER)
+
+
+def test_client_import_is_compiler_free():
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, scripts.client; print('vyper' in sys.modules, 'boa' in sys.modules)",
+        ],
+        cwd=artifacts.ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.split() == ["False", "False"]
+
+
+def test_pyevm_transport_runs_artifact():
+    """The artifact path's bare py-evm chain serves the same views as a boa deployment"""
+    placeholders = ["0x" + f"{k:040x}" for k in range(1, 5)]
+    transport = PyEVMTransport()
+    client = SquidDaoVoteClient(
+        transport.deploy(artifacts.deploy_bytecode(*placeholders, [])), transport
+    )
+
+    assert client.balanceOf(HOLDER) == 0
+    assert client.tentacle_count() == 0
+    owner = int.from_bytes(PyEVMTransport.SENDER, "big")
+    assert int(client.owner(), 16) == owner
+    assert transport.storage(client.address, [0]) == [owner]  # owner is slot 0
+    with pytest.raises(ContractCallError):
+        client.tentacles(0)
+
+
+@pytest.mark.slow
+def test_startup_benchmark():
+    """Compare cold startup of the compile path against the artifact path"""
+    results = bench_startup.compare()
+    bench_startup.print_table(results)
+
+    compiled, artifact = results["compile (local)"], results["artifact (local)"]
+    assert not artifact["vyper_imported"]
+    assert artifact["import"] < compiled["import"]
+    assert artifact["load"] < compiled["load"]
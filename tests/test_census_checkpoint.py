@@ -0,0 +1,231 @@
+import io
+import os
+import random
+import subprocess
+import sys
+
+import boa
+import pytest
+
+from scripts import electorate as synth
+from scripts import mocks
+from scripts.census import Census, Checkpoint, CheckpointMismatch, journal_path
+from scripts.client import BoaTransport, RPCTransport, SquidDaoVoteClient
+from scripts.model import PoolState
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BATCH = 8
+VOTERS = 96
+
+
+class FlakyTransport(BoaTransport):
+    """Boa transport that dies with a connection error after `fail_after` calls"""
+
+    def __init__(self, fail_after):
+        super().__init__()
+        self.remaining = fail_after
+
+    def call(self, to, data):
+        if self.remaining == 0:
+            raise ConnectionError("RPC went away")
+        self.remaining -= 1
+        return super().call(to, data)
+
+
+def _run(census_address, voters, transport, checkpoint, every=2):
+    client = SquidDaoVoteClient(census_address, transport)
+    out = io.StringIO()
+    census = Census(client, batch_size=BATCH)
+    census.run(voters, output=out, checkpoint=checkpoint, checkpoint_every=every)
+    return out.getvalue(), census
+
+
+@pytest.fixture(scope="module")
+def electorate(env):
+    """Smaller than the shared fixture: every test here scores it several times"""
+    return synth.build(voters=VOTERS, seed=3)
+
+
+@pytest.fixture(scope="module")
+def expected(electorate):
+    return _reference(electorate)
+
+
+def _reference(electorate):
+    client = SquidDaoVoteClient.from_boa(electorate.census.address)
+    out = io.StringIO()
+    Census(client, batch_size=BATCH).run(electorate.voters, output=out)
+    return out.getvalue()
+
+
+def _run_until_done(electorate, checkpoint, rng):
+    """Crash at random call counts until a run completes; returns (output, crashes)"""
+    crashes = 0
+    while True:
+        transport = FlakyTransport(fail_after=rng.randint(2, 10))
+        try:
+            output, census = _run(
+                electorate.census.address, electorate.voters, transport, checkpoint
+            )
+            return output, crashes, census
+        except ConnectionError:
+            crashes += 1
+            assert crashes < 100
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_crashes_resume_identically(electorate, expected, tmp_path, seed):
+    checkpoint = str(tmp_path / "census.ckpt")
+
+    output, crashes, census = _run_until_done(
+        electorate, checkpoint, random.Random(seed)
+    )
+
+    print(
+        f"\nseed {seed}: {crashes} crashes, resumed {census.metrics.counters['resumed_voters']} voters"
+    )
+    assert crashes > 0
+    assert output == expected
+    assert not os.path.exists(checkpoint)
+    assert not os.path.exists(journal_path(checkpoint))
+
+
+def test_checkpoint_contents(electorate, tmp_path):
+    checkpoint = str(tmp_path / "census.ckpt")
+    # 1 rate snapshot (2 calls) + 5 batches, then the RPC dies
+    with pytest.raises(ConnectionError):
+        _run(
+            electorate.census.address, electorate.voters, FlakyTransport(7), checkpoint
+        )
+
+    ckpt = Checkpoint.load(checkpoint)
+    assert ckpt.cursor == 4 * BATCH  # checkpoints after batches 2 and 4
+    assert ckpt.block == boa.env.evm.patch.block_number
+    assert ckpt.census == electorate.census.address
+    assert set(ckpt.pool_rates) == {"squid_lp_equivalent", "squill_lp_equivalent"}
+    with open(journal_path(checkpoint)) as f:
+        assert len(f.read().splitlines()) == ckpt.cursor
+
+
+def test_torn_journal_and_checkpoint_write(electorate, expected, tmp_path, monkeypatch):
+    """Bytes past the checkpointed offset and a half-written checkpoint are both ignored"""
+    checkpoint = str(tmp_path / "census.ckpt")
+
+    with pytest.raises(ConnectionError):
+        _run(
+            electorate.census.address, electorate.voters, FlakyTransport(9), checkpoint
+        )
+    with open(journal_path(checkpoint), "ab") as f:
+        f.write(b"0xdeadbeef,12")  # torn line from the batch that died
+
+    real_replace = os.replace
+
+    def replace_once_then_die(src, dst):
+        monkeypatch.setattr(os, "replace", real_replace)
+        raise OSError("killed mid-rename")
+
+    monkeypatch.setattr(os, "replace", replace_once_then_die)
+    with pytest.raises(OSError):
+        _run(electorate.census.address, electorate.voters, BoaTransport(), checkpoint)
+    assert os.path.exists(f"{checkpoint}.tmp")
+
+    output, _ = _run(
+        electorate.census.address, electorate.voters, BoaTransport(), checkpoint
+    )
+    assert output == expected
+
+
+def test_resume_refuses_mismatched_runs(electorate, tmp_path):
+    checkpoint = str(tmp_path / "census.ckpt")
+    with pytest.raises(ConnectionError):
+        _run(
+            electorate.census.address, electorate.voters, FlakyTransport(6), checkpoint
+        )
+
+    with pytest.raises(CheckpointMismatch):
+        _run(
+            electorate.census.address,
+            electorate.voters[:-1],
+            BoaTransport(),
+            checkpoint,
+        )
+
+    squid_eth = electorate.pools[0]
+    mocks.set_pool_state(
+        squid_eth,
+        PoolState(
+            balances=(squid_eth.balances(0), squid_eth.balances(1) * 2),
+            total_supply=squid_eth.totalSupply(),
+            price_oracle=squid_eth.price_oracle(),
+        ),
+    )
+    with pytest.raises(CheckpointMismatch):
+        _run(electorate.census.address, electorate.voters, BoaTransport(), checkpoint)
+
+
+def test_unpinned_rpc_cannot_checkpoint(electorate, tmp_path):
+    client = SquidDaoVoteClient(
+        electorate.census.address, RPCTransport("http://rpc", block="latest")
+    )
+    with pytest.raises(ValueError):
+        Census(client).run(electorate.voters, checkpoint=str(tmp_path / "census.ckpt"))
+
+    pinned = SquidDaoVoteClient(
+        electorate.census.address, RPCTransport("http://rpc", block=7)
+    )
+    assert Census(pinned).pinned_block() == 7
+
+
+CHILD = """
+import os, sys
+sys.path.insert(0, {root!r})
+from scripts import electorate
+from scripts.census import Census
+from scripts.client import BoaTransport, SquidDaoVoteClient
+
+class Killer(BoaTransport):
+    calls = 0
+    def call(self, to, data):
+        Killer.calls += 1
+        if Killer.calls > {kill_after}:
+            os._exit(9)
+        return super().call(to, data)
+
+e = electorate.build(voters={voters}, seed=7)
+client = SquidDaoVoteClient(e.census.address, Killer())
+census = Census(client, batch_size={batch})
+census.run(e.voters, {output!r}, checkpoint={checkpoint!r}, checkpoint_every=1)
+print(census.metrics.counters["resumed_voters"])
+"""
+
+
+def test_killed_process_resumes(tmp_path):
+    """A process killed with os._exit mid-run; a fresh process on the same seeded chain resumes"""
+    checkpoint = str(tmp_path / "census.ckpt")
+    output = str(tmp_path / "powers.csv")
+
+    def child(kill_after):
+        script = CHILD.format(
+            root=ROOT,
+            kill_after=kill_after,
+            voters=VOTERS,
+            batch=BATCH,
+            output=output,
+            checkpoint=checkpoint,
+        )
+        return subprocess.run(
+            [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True
+        )
+
+    killed = child(kill_after=5)  # 2 rate calls, 3 batches, dies on the 4th
+    assert killed.returncode == 9
+    assert Checkpoint.load(checkpoint).cursor == 3 * BATCH
+
+    resumed = child(kill_after=10**9)
+    assert resumed.returncode == 0, resumed.stderr
+    assert int(resumed.stdout) == 3 * BATCH
+
+    with boa.swap_env(boa.Env()):
+        expected = _reference(synth.build(voters=VOTERS, seed=7))
+    with open(output, newline="") as f:
+        assert f.read() == expected
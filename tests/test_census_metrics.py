@@ -0,0 +1,180 @@
+import io
+import json
+import pstats
+import time
+
+import pytest
+
+from scripts import mocks
+from scripts.census import Census, InstrumentedTransport, parse_profile
+from scripts.client import RPCTransport, SquidDaoVoteClient
+from scripts.metrics import CProfileHook, Metrics, SamplingHook
+
+DUST_THRESHOLD = 10_000_000
+
+
+@pytest.fixture
+def electorate(env, mock_squid, mock_pools):
+    """20 voters: naked, LP, dust LP, mixed and empty in rotation"""
+    tentacles, wrappers = mocks.deploy_wrappers(mock_squid, mock_pools, 3)
+    census = mocks.deploy_census(mock_squid, mock_pools, tentacles)
+    voters = [f"0x{i + 1:040x}" for i in range(20)]
+    for i, voter in enumerate(voters):
+        kind = i % 5
+        if kind in (0, 3):
+            mock_squid._mint_for_testing(voter, (i + 1) * 10**18)
+        if kind in (1, 3):
+            wrappers[0]._mint_for_testing(voter, (i + 1) * 10**17)
+            wrappers[1]._mint_for_testing(voter, (i + 1) * 10**17)
+        if kind == 2:
+            wrappers[i % 2]._mint_for_testing(voter, DUST_THRESHOLD - 1)
+    return SquidDaoVoteClient.from_boa(census.address), census, voters
+
+
+def test_run_matches_balance_of(electorate):
+    client, census, voters = electorate
+    run = Census(client, batch_size=8, count_dust=True)
+    out = io.StringIO()
+    powers = run.run(voters, output=out)
+
+    assert list(powers.values()) == [census.balanceOf(v) for v in voters]
+    rows = out.getvalue().splitlines()
+    assert rows[0] == "address,power" and len(rows) == 21
+
+    counters = run.metrics.counters
+    assert counters["voters"] == 20
+    assert counters["dust_filtered"] == 4
+    assert counters["zero_power"] == 8  # dust voters and empty voters
+    assert run.metrics.summaries["batch_size"].max == 8
+    assert run.metrics.summaries["batch_size"].count == 3
+
+    print("\n" + run.metrics.finish().report())
+    assert {"prepare", "encode", "evm", "decode", "dust", "write"} <= set(
+        run.metrics.stages
+    )
+
+
+def test_cache_and_call_counters(electorate):
+    client, _, voters = electorate
+    run = Census(client, batch_size=10)
+
+    run.run(voters + voters[:5])
+    assert run.metrics.counters["cache_misses"] == 20
+    assert run.metrics.counters["cache_hits"] == 5
+    assert run.metrics.counters["rpc_calls"] == 2
+
+    run.run(voters)
+    derived = run.metrics.derived()
+    assert derived["cache_hit_ratio"] == pytest.approx(25 / 45)
+    assert derived["rpc_calls_per_voter"] == pytest.approx(2 / 45)
+    assert derived["voters_per_second"] > 0
+
+
+def test_rpc_batch_is_one_round_trip():
+    class Response:
+        def __init__(self, payload):
+            self.payload = payload
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return self.payload
+
+    class Session:
+        def __init__(self):
+            self.posts = 0
+
+        def post(self, url, json, timeout):
+            self.posts += 1
+            answer = {"jsonrpc": "2.0", "result": "0x" + "00" * 31 + "07"}
+            if isinstance(json, list):
+                return Response([{**answer, "id": r["id"]} for r in json])
+            return Response({**answer, "id": json["id"]})
+
+    session = Session()
+    metrics = Metrics()
+    transport = InstrumentedTransport(
+        RPCTransport("http://rpc", session=session), metrics
+    )
+
+    assert (
+        transport.batch_call(mocks.ZERO_ADDRESS, [b"\x01", b"\x02", b"\x03"])[2][-1]
+        == 7
+    )
+    transport.call(mocks.ZERO_ADDRESS, b"\x01")
+    assert session.posts == 2
+    assert metrics.counters["rpc_calls"] == 2
+    assert metrics.counters["eth_calls"] == 4
+    assert metrics.stages["rpc"].calls == 2
+
+
+def test_prometheus_and_json_export(electorate, tmp_path):
+    client, _, voters = electorate
+    run = Census(client, count_dust=True)
+    run.run(voters)
+    metrics = run.metrics.finish()
+
+    text = metrics.to_prometheus()
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            assert line.split()[1] in ("HELP", "TYPE")
+            continue
+        name, value = line.rsplit(" ", 1)
+        samples[name] = float(value)
+
+    assert samples["squid_census_voters_total"] == 20
+    assert samples["squid_census_dust_filtered_total"] == 4
+    assert samples["squid_census_batch_size_count"] == 1
+    assert samples['squid_census_stage_calls_total{stage="evm"}'] >= 1
+    assert "squid_census_cache_hit_ratio" in samples
+
+    metrics.write(tmp_path / "census.prom")
+    assert (tmp_path / "census.prom").read_text() == metrics.to_prometheus()
+
+    metrics.write(tmp_path / "census.json")
+    data = json.loads((tmp_path / "census.json").read_text())
+    assert data["counters"]["voters"] == 20
+    assert data["summaries"]["batch_size"]["max"] == 20
+    # One packed call, plus two LP views per voter for the dust pass on boa
+    assert data["rpc_calls_per_voter"] == pytest.approx(41 / 20)
+
+
+def test_profiling_hooks(electorate, tmp_path):
+    client, _, voters = electorate
+    hooks = {
+        "evm": CProfileHook(str(tmp_path / "evm.prof")),
+        "decode": SamplingHook(str(tmp_path / "decode.folded")),
+    }
+    run = Census(client, batch_size=4, metrics=Metrics(hooks=hooks))
+    run.run(voters)
+    run.metrics.finish()
+
+    stats = pstats.Stats(str(tmp_path / "evm.prof"))
+    assert stats.total_calls > 0
+    assert (tmp_path / "decode.folded").exists()
+
+
+def test_sampling_hook_sees_hot_function(tmp_path):
+    def busy():
+        end = time.perf_counter() + 0.05
+        while time.perf_counter() < end:
+            pass
+
+    hook = SamplingHook(str(tmp_path / "busy.folded"))
+    metrics = Metrics(hooks={"busy": hook})
+    with metrics.stage("busy"):
+        busy()
+    metrics.finish()
+
+    folded = (tmp_path / "busy.folded").read_text().splitlines()
+    assert folded and any(":busy" in line for line in folded)
+    assert metrics.stages["busy"].seconds >= 0.05
+
+
+def test_parse_profile(tmp_path):
+    hooks = parse_profile(["rpc=sample", "decode"], prefix=str(tmp_path / "run"))
+    assert isinstance(hooks["rpc"], SamplingHook)
+    assert isinstance(hooks["decode"], CProfileHook)
+    assert hooks["decode"].path.endswith("run.decode.prof")
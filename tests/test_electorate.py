@@ -0,0 +1,88 @@
+import random
+import time
+
+import boa
+import pytest
+
+from scripts import electorate as synth
+from scripts import packed
+from scripts.client import SquidDaoVoteClient
+from scripts.model import DUST_THRESHOLD
+
+
+def _build(**kwargs):
+    with boa.swap_env(boa.Env()):
+        return synth.build(**kwargs)
+
+
+def _tentacles():
+    return [(None, 0)] + [(k % 2, 1 - k % 2) for k in range(8)]
+
+
+def test_seeded_and_reproducible():
+    a = synth.generate(synth.ElectorateConfig(voters=500, seed=4), _tentacles())
+    b = synth.generate(synth.ElectorateConfig(voters=500, seed=4), _tentacles())
+    c = synth.generate(synth.ElectorateConfig(voters=500, seed=5), _tentacles())
+    assert a == b
+    assert a[0] != c[0]
+
+
+def test_population_shape(electorate):
+    stats = electorate.stats
+    print("\n" + "\n".join(f"{k:<20} {v:>8,}" for k, v in stats.items()))
+
+    assert stats["voters"] == 1_000 == len(set(electorate.voters))
+    assert 0 < stats["holders"] < stats["voters"]  # some registered voters hold nothing
+    assert 0 < stats["multi_tentacle_lp"] < stats["lp_holders"]
+    assert stats["dust_positions"] > 0
+
+    naked = sorted(electorate.balances[0].values(), reverse=True)
+    # Zipf: the top 10% of holders own most of the naked SQUID
+    assert sum(naked[: len(naked) // 10]) > sum(naked) / 2
+
+    dust = [
+        b
+        for held in electorate.balances[1:]
+        for b in held.values()
+        if b < DUST_THRESHOLD
+    ]
+    assert dust
+
+
+def test_chain_state_matches_generated(electorate):
+    for token, held in zip(electorate.tokens, electorate.balances):
+        assert token.totalSupply() == sum(held.values())
+        for voter in list(held)[:5]:
+            assert token.balanceOf(voter) == held[voter]
+
+    # Wrapped LP never exceeds the pools it claims to be a share of
+    for k, pool in enumerate(electorate.pools[:2]):
+        wrapped = sum(
+            sum(held.values())
+            for held, (p, _) in zip(electorate.balances, electorate.tentacles)
+            if p == k
+        )
+        assert wrapped <= pool.totalSupply()
+
+
+def test_census_matches_model(electorate):
+    client = SquidDaoVoteClient.from_boa(electorate.census.address)
+    lp_holders = [v for held in electorate.balances[1:] for v in held]
+    sample = random.Random(0).sample(electorate.voters, 40) + lp_holders[:24]
+
+    states = electorate.pool_states()
+    expected = [electorate.expected_power(v, states) for v in sample]
+    assert packed.packed_voting_power(client, sample) == expected
+    assert any(expected) and not all(expected)
+
+
+@pytest.mark.parametrize("n", [1_000, 10_000, 50_000])
+def test_build_scaling(n):
+    start = time.perf_counter()
+    built = _build(voters=n, seed=1)
+    elapsed = time.perf_counter() - start
+    writes = built.stats["storage_writes"]
+    print(
+        f"\n{n:>7,} voters: {elapsed:.2f}s build, {writes:,} storage writes ({writes / elapsed:,.0f}/s)"
+    )
+    assert built.stats["voters"] == n
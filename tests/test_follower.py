@@ -0,0 +1,411 @@
+"""
+Head following against a scripted JSON-RPC stand-in: blocks of Transfer logs
+and pool states, with reorgs on demand.
+"""
+
+import random
+import time
+
+import pytest
+from eth_abi import decode, encode
+from eth_utils import keccak
+
+from scripts import mocks
+from scripts.follower import (
+    BALANCE_OF,
+    POOL_VIEWS,
+    TRANSFER_TOPIC,
+    Follower,
+    ReorgTooDeep,
+)
+from scripts.model import PoolState
+from scripts.model import mock_pool_withdraw as mocks_withdraw
+from scripts.tentacles import ZERO_ADDRESS
+
+POOL_EVENT = (
+    "0x" + keccak(text="TokenExchange(address,uint256,uint256,uint256,uint256)").hex()
+)
+
+
+def _topic(address):
+    return "0x" + address[2:].lower().rjust(64, "0")
+
+
+class LocalChain:
+    """In-memory chain answering the JSON-RPC calls the follower makes"""
+
+    def __init__(self, tokens, balances, pool_states):
+        self.tokens = [t.lower() for t in tokens]
+        self._forks = 0
+        genesis = {
+            "number": 0,
+            "hash": self._hash(b"genesis"),
+            "parentHash": "0x" + "00" * 32,
+            "logs": [],
+            "balances": [dict(held) for held in balances],
+            "pools": {p.lower(): s for p, s in pool_states.items()},
+        }
+        self.blocks = [genesis]
+        self.calls = 0
+        self.batches = []
+
+    def _hash(self, seed):
+        return "0x" + keccak(seed + self._forks.to_bytes(8, "big")).hex()
+
+    @property
+    def head(self):
+        return self.blocks[-1]
+
+    def mine(self, transfers=(), pools=None, pool_logs=()):
+        """`transfers`: (tentacle, src, dst, value); `pools`: {pool: PoolState}"""
+        parent = self.head
+        balances = [dict(held) for held in parent["balances"]]
+        logs = []
+        for k, src, dst, value in transfers:
+            if src != ZERO_ADDRESS:
+                assert balances[k].get(src, 0) >= value
+                balances[k][src] -= value
+            if dst != ZERO_ADDRESS:
+                balances[k][dst] = balances[k].get(dst, 0) + value
+            logs.append(
+                {
+                    "address": self.tokens[k],
+                    "topics": [TRANSFER_TOPIC, _topic(src), _topic(dst)],
+                    "data": "0x" + value.to_bytes(32, "big").hex(),
+                }
+            )
+        states = dict(parent["pools"])
+        for pool, state in (pools or {}).items():
+            states[pool.lower()] = state
+        for pool in set(pools or ()) | set(pool_logs):
+            logs.append({"address": pool.lower(), "topics": [POOL_EVENT], "data": "0x"})
+        number = parent["number"] + 1
+        self.blocks.append(
+            {
+                "number": number,
+                "hash": self._hash(bytes.fromhex(parent["hash"][2:])),
+                "parentHash": parent["hash"],
+                "logs": logs,
+                "balances": balances,
+                "pools": states,
+            }
+        )
+
+    def reorg(self, depth):
+        """Drop the last `depth` blocks; blocks mined afterwards get new hashes"""
+        del self.blocks[-depth:]
+        self._forks += 1
+
+    def _by_hash(self, block_hash):
+        return next(b for b in self.blocks if b["hash"] == block_hash)
+
+    def _call(self, tx, at):
+        block = self._by_hash(at["blockHash"])
+        data = bytes.fromhex(tx["data"][2:])
+        if data[:4] == BALANCE_OF:
+            (holder,) = decode(["address"], data[4:])
+            value = block["balances"][self.tokens.index(tx["to"].lower())].get(
+                holder.lower(), 0
+            )
+        else:
+            state = block["pools"][tx["to"].lower()]
+            field = next(f for f, d in POOL_VIEWS.items() if d == data)
+            value = {
+                "balance0": state.balances[0],
+                "balance1": state.balances[1],
+                "total_supply": state.total_supply,
+                "fee": state.fee,
+                "price_oracle": state.price_oracle,
+            }[field]
+        return "0x" + encode(["uint256"], [value]).hex()
+
+    def request(self, method, params):
+        self.calls += 1
+        if method == "eth_blockNumber":
+            return hex(self.head["number"])
+        if method == "eth_getBlockByNumber":
+            tag = params[0]
+            number = self.head["number"] if tag == "latest" else int(tag, 16)
+            if number >= len(self.blocks):
+                return None
+            block = self.blocks[number]
+            return {
+                "number": hex(number),
+                "hash": block["hash"],
+                "parentHash": block["parentHash"],
+            }
+        if method == "eth_getLogs":
+            (query,) = params
+            addresses = set(query["address"])
+            return [
+                log
+                for log in self._by_hash(query["blockHash"])["logs"]
+                if log["address"] in addresses
+            ]
+        if method == "eth_call":
+            return self._call(*params)
+        raise NotImplementedError(method)
+
+    def batch(self, calls):
+        self.calls += 1
+        self.batches.append(len(calls))
+        return [self.request(method, params) for method, params in calls]
+
+    def expected_powers(self):
+        """Every holder's power recomputed from scratch at the head"""
+        fresh = Follower(self, self.registry).seed(
+            self.head["number"],
+            self.head["hash"],
+            self.head["balances"],
+            self.head["pools"],
+        )
+        return fresh.powers
+
+
+def _registry(electorate):
+    pools = [p.address for p in electorate.pools[:2]]
+    return [
+        (token.address, ZERO_ADDRESS if pool is None else pools[pool], index)
+        for token, (pool, index) in zip(electorate.tokens, electorate.tentacles)
+    ]
+
+
+@pytest.fixture
+def chain(electorate):
+    states = {
+        p.address: s
+        for p, s in zip(electorate.pools, electorate.pool_states().values())
+    }
+    local = LocalChain(
+        [t.address for t in electorate.tokens], electorate.balances, states
+    )
+    local.registry = _registry(electorate)
+    return local
+
+
+def _follower(chain, **kwargs):
+    kwargs.setdefault("backoff", 0)
+    genesis = chain.blocks[0]
+    return Follower(chain, chain.registry, **kwargs).seed(
+        0, genesis["hash"], genesis["balances"], genesis["pools"]
+    )
+
+
+def _random_transfers(chain, rng, n):
+    """`n` transfers of up to a full balance between existing holders, plus mints to new ones"""
+    balances = chain.head["balances"]
+    transfers = []
+    for _ in range(n):
+        k = rng.randrange(len(balances))
+        holders = [h for h, b in balances[k].items() if b]
+        src = rng.choice(holders)
+        dst = (
+            rng.choice(holders)
+            if rng.random() < 0.8
+            else f"0x{rng.getrandbits(160):040x}"
+        )
+        value = rng.choice(
+            [balances[k][src], rng.randint(1, balances[k][src]), rng.randint(1, 10**7)]
+        )
+        value = min(value, balances[k][src])
+        transfers.append((k, src, dst, value))
+        balances = [dict(held) for held in balances]
+        balances[k][src] -= value
+        balances[k][dst] = balances[k].get(dst, 0) + value
+    return transfers
+
+
+def _pool_move(chain, pool, rng):
+    state = chain.head["pools"][pool.lower()]
+    grow = rng.randint(1, 10**20)
+    return PoolState(
+        balances=(state.balances[0] + grow, state.balances[1] - grow // 3),
+        total_supply=state.total_supply + rng.randint(0, 10**18),
+        fee=state.fee,
+        price_oracle=state.price_oracle,
+    )
+
+
+def test_follows_transfers_and_matches_contract(electorate, chain):
+    rng = random.Random(0)
+    follower = _follower(chain)
+    for _ in range(15):
+        chain.mine(_random_transfers(chain, rng, 5))
+    chain.mine(
+        pools={
+            electorate.pools[0].address: _pool_move(
+                chain, electorate.pools[0].address, rng
+            )
+        }
+    )
+    assert follower.poll() == 16
+
+    expected = chain.expected_powers()
+    assert follower.powers == expected
+    assert follower.total_power == sum(expected.values())
+
+    # The contract agrees once the head's balances and pool state are written on chain
+    head = chain.head
+    touched = sorted({h for block in chain.blocks[1:] for h in _holders(block)})[:40]
+    for token, held in zip(electorate.tokens, head["balances"]):
+        for holder in touched:
+            mocks.set_token_balance(token, holder, held.get(holder, 0))
+    mocks.set_pool_state(
+        electorate.pools[0], head["pools"][electorate.pools[0].address.lower()]
+    )
+    for holder in touched:
+        assert electorate.census.balanceOf(holder) == follower.powers.get(holder, 0)
+
+
+def _holders(block):
+    return {"0x" + t[-40:] for log in block["logs"] for t in log["topics"][1:]} - {
+        ZERO_ADDRESS
+    }
+
+
+def test_reprices_only_what_changed(electorate, chain):
+    squid_eth = electorate.pools[0].address
+    follower = _follower(chain)
+    rng = random.Random(1)
+    repriced = lambda: follower.metrics.counters.get("repriced", 0)  # noqa: E731
+
+    src, dst = rng.sample(sorted(chain.head["balances"][0]), 2)
+    chain.mine([(0, src, dst, 1)])
+    before = repriced()
+    follower.poll()
+    assert repriced() - before == 2
+
+    chain.mine(pool_logs=[squid_eth])  # a pool log, but the state did not change
+    before, reads = repriced(), follower.metrics.counters.get("pool_reads", 0)
+    follower.poll()
+    assert repriced() == before
+    assert follower.metrics.counters["pool_reads"] == reads + 1
+
+    chain.mine(pools={squid_eth: _pool_move(chain, squid_eth, rng)})
+    before = repriced()
+    follower.poll()
+    lp_holders = follower.lp_holders[squid_eth.lower()]
+    print(
+        f"\npool move repriced {repriced() - before} of {len(follower.powers)} holders"
+    )
+    assert repriced() - before == len(lp_holders) < len(follower.powers)
+    assert follower.powers == chain.expected_powers()
+
+
+@pytest.mark.parametrize("depth,replacement", [(4, 6), (3, 1), (5, 5)])
+def test_reorg_rolls_back(electorate, chain, depth, replacement):
+    rng = random.Random(depth)
+    squid_squill = electorate.pools[1].address
+    follower = _follower(chain, depth=8)
+    for n in range(10):
+        pools = {squid_squill: _pool_move(chain, squid_squill, rng)} if n == 8 else None
+        chain.mine(_random_transfers(chain, rng, 4), pools=pools)
+    follower.poll()
+    seen = dict(follower.powers)
+
+    chain.reorg(depth)
+    for _ in range(replacement):
+        chain.mine(_random_transfers(chain, rng, 4))
+    follower.poll()
+
+    print(
+        f"\nreorg {depth} -> {replacement}: rolled back {follower.metrics.counters['rolled_back']} blocks"
+    )
+    assert follower.metrics.counters["rolled_back"] == depth
+    assert (
+        follower.number == chain.head["number"] and follower.hash == chain.head["hash"]
+    )
+    assert follower.powers == chain.expected_powers() != seen
+    assert follower.pool_states == chain.head["pools"]
+
+
+def test_reorg_deeper_than_buffer(chain):
+    rng = random.Random(2)
+    follower = _follower(chain, depth=3)
+    for _ in range(6):
+        chain.mine(_random_transfers(chain, rng, 2))
+    follower.poll()
+    chain.reorg(5)
+    follower.poll()  # the node is behind us, and below the buffer: nothing to compare yet
+    assert follower.number == 6 and "rolled_back" not in follower.metrics.counters
+    for _ in range(5):
+        chain.mine()
+    with pytest.raises(ReorgTooDeep):
+        follower.poll()
+
+
+class LaggingNode:
+    """A replica that does not return the next `misses` block lookups"""
+
+    def __init__(self, chain, misses):
+        self.chain = chain
+        self.misses = misses
+
+    def request(self, method, params):
+        if method == "eth_getBlockByNumber" and self.misses:
+            self.misses -= 1
+            return None
+        return self.chain.request(method, params)
+
+    def batch(self, calls):
+        return self.chain.batch(calls)
+
+
+def test_missing_block_is_not_a_reorg(chain):
+    rng = random.Random(6)
+    follower = _follower(chain, depth=2, retries=2)
+    for _ in range(4):
+        chain.mine(_random_transfers(chain, rng, 2))
+    follower.poll()
+
+    # Fewer misses than retries: the head block turns up, nothing is rolled back
+    follower.source = LaggingNode(chain, misses=2)
+    chain.mine(_random_transfers(chain, rng, 2))
+    assert follower.poll() == 1
+    assert follower.metrics.counters["missing_blocks"] == 2
+
+    # A node that never returns our head, and whose own head agrees with us
+    follower.source = LaggingNode(chain, misses=10**9)
+    assert follower.poll() == 0
+    assert "rolled_back" not in follower.metrics.counters
+    assert follower.number == chain.head["number"]
+    assert follower.powers == chain.expected_powers()
+
+
+class BatchedWithdraw:
+    """Exact mock pricer that also exposes `many`, recording how it is called"""
+
+    calls = []
+
+    def __init__(self, state, index):
+        self.withdraw = mocks_withdraw(state, index)
+
+    def __call__(self, quantity):
+        self.calls.append("single")
+        return self.withdraw(quantity)
+
+    def many(self, quantities):
+        self.calls.append(len(quantities))
+        return [self.withdraw(q) for q in quantities]
+
+
+def test_pool_move_reprices_in_one_batch(electorate, chain):
+    rng = random.Random(7)
+    squid_eth = electorate.pools[0].address
+    follower = _follower(
+        chain, withdraw=lambda pool, index, state, block: BatchedWithdraw(state, index)
+    )
+    BatchedWithdraw.calls.clear()
+
+    chain.mine(pools={squid_eth: _pool_move(chain, squid_eth, rng)})
+    follower.poll()
+
+    holders = follower.lp_holders[squid_eth.lower()]
+    print(
+        f"\npool move: {len(holders)} LP holders priced in calls {BatchedWithdraw.calls}"
+    )
+    # At most one `many` per (pool, index) held by the repriced holders, never one call per holder
+    assert "single" not in BatchedWithdraw.calls
+    assert len(BatchedWithdraw.calls) <= len(set(follower.tentacles) - {(None, 0)})
+    assert all(n <= len(holders) for n in BatchedWithdraw.calls)
+    assert follower.powers == chain.expected_powers()
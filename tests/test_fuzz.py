@@ -0,0 +1,127 @@
+import random
+
+import pytest
+
+from scripts import fuzz, mocks, model
+from scripts.model import DUST_THRESHOLD, ModelRevert, PoolState
+
+HOLDER = fuzz.HOLDER
+
+
+@pytest.fixture(scope="module")
+def fuzzer(env):
+    return fuzz.DifferentialFuzzer(seed=1)
+
+
+def test_storage_writes(fuzzer):
+    squid_eth = fuzzer.pools[0]
+    state = PoolState(balances=(7, 11), total_supply=13, fee=17, price_oracle=19)
+
+    mocks.set_pool_state(squid_eth, state)
+    mocks.set_token_balance(fuzzer.wrappers[0], HOLDER, 12345)
+
+    assert (squid_eth.balances(0), squid_eth.balances(1)) == state.balances
+    assert squid_eth.totalSupply() == 13
+    assert squid_eth.fee() == 17
+    assert squid_eth.price_oracle() == 19
+    assert fuzzer.wrappers[0].balanceOf(HOLDER) == 12345
+
+
+@pytest.mark.parametrize(
+    "quantity", [1, DUST_THRESHOLD, 10**18, 999 * 10**18, 1_000 * 10**18]
+)
+@pytest.mark.parametrize("index", [0, 1])
+def test_model_matches_mock_pool(fuzzer, quantity, index):
+    pool = fuzzer.pools[0]
+    state = PoolState(
+        balances=(pool.balances(0), pool.balances(1)),
+        total_supply=pool.totalSupply(),
+        fee=pool.fee(),
+    )
+    assert model.calc_withdraw_one_coin(
+        state, quantity, index
+    ) == pool.calc_withdraw_one_coin(quantity, index)
+
+
+def test_model_reverts_like_mock_pool():
+    state = PoolState(balances=(10**18, 0), total_supply=10**18)
+    with pytest.raises(ModelRevert):
+        model.calc_withdraw_one_coin(state, 10**18 + 1, 0)
+    with pytest.raises(ModelRevert):
+        model.calc_withdraw_one_coin(state, 10**18, 0)  # empty other side
+
+
+def test_edge_cases(fuzzer):
+    """Hand-picked cases from test_lp_equivalent_edge_cases.py, run differentially"""
+    healthy = PoolState(balances=(10**24, 10**24), total_supply=10**26, fee=3 * 10**6)
+    amounts = [0, 1, DUST_THRESHOLD - 1, DUST_THRESHOLD, 10**18, 10**24, 10**27]
+
+    for amount in amounts:
+        for balances in ([amount] * 9, [0] + [amount] * 8, [amount] + [0] * 8):
+            case = fuzz.FuzzCase(pools=[healthy, healthy], balances=balances)
+            assert fuzzer.evaluate_contract(case) == fuzzer.evaluate_model(case), case
+
+
+def test_split_dust_crosses_threshold(fuzzer):
+    """Four dust positions on SQUID/ETH wrappers are summed before the dust check"""
+    healthy = PoolState(balances=(10**24, 10**24), total_supply=10**26)
+    quarter = DUST_THRESHOLD // 4 - 1
+    balances = [0, quarter, 0, quarter, 0, quarter, 0, quarter, 0]
+
+    case = fuzz.FuzzCase(pools=[healthy, healthy], balances=balances)
+    assert fuzzer.evaluate_model(case) == 0
+    assert fuzzer.evaluate_contract(case) == 0
+
+    balances[1] += 4
+    assert fuzzer.evaluate_contract(case) == fuzzer.evaluate_model(case) > 0
+
+
+def test_random_cases(fuzzer):
+    report = fuzzer.run(200)
+    print(
+        f"\n{report.cases} cases ({report.reverts} reverting) "
+        f"at {report.cases_per_second:.0f} cases/s"
+    )
+    assert report.cases == 200
+    assert report.batch_checked == 200 // fuzz.BATCH_EVERY
+    assert report.mismatches == []
+
+
+def test_catches_wrong_model(env):
+    """A model with the dust check off by one wei must be caught"""
+
+    def off_by_one(tentacles, balances, pools):
+        total = model.voting_power(tentacles, balances, pools)
+        for pool in (0, 1):
+            lp = sum(b for (p, _), b in zip(tentacles, balances) if p == pool)
+            total += lp == DUST_THRESHOLD - 1
+        return total
+
+    fuzzer = fuzz.DifferentialFuzzer(seed=2, reference=off_by_one)
+    healthy = PoolState(balances=(10**24, 10**24), total_supply=10**26)
+    case = fuzz.FuzzCase(
+        pools=[healthy, healthy], balances=[0, DUST_THRESHOLD - 1] + [0] * 7
+    )
+
+    assert fuzzer.evaluate_contract(case) != fuzzer.evaluate_model(case)
+
+
+def test_batch_views_agree_on_every_case(fuzzer):
+    report = fuzzer.run(16, batch_every=1)
+    assert report.batch_checked == 16
+    assert report.mismatches == []
+
+
+def test_case_generation_is_seeded():
+    a = [fuzz.random_case(random.Random(7)) for _ in range(5)]
+    b = [fuzz.random_case(random.Random(7)) for _ in range(5)]
+    assert a == b
+
+
+def test_parallel_workers():
+    report = fuzz.run_parallel(40, workers=2, seed=3)
+    print(
+        f"\n{report.cases} cases on 2 workers at {report.cases_per_second:.0f} cases/s"
+    )
+    assert report.cases == 40
+    assert report.mismatches == []
@@ -0,0 +1,72 @@
+"""
+Tests may mutate the shared session deployments; every test starts from the
+same snapshot, in any order and on any xdist worker. Each mutating test
+first checks that it starts from that snapshot, so a leak from any test that
+ran before it on the same worker fails, whatever the order.
+"""
+
+import types
+
+import pytest
+from conftest import resolve_fork_block, worker_id
+
+from scripts import mocks
+from scripts.model import DUST_THRESHOLD, PoolState
+
+POOL_SUPPLY = 1_000 * 10**18
+
+
+def _lp_voter(electorate):
+    return next(iter(electorate.balances[1]))
+
+
+def _assert_pristine(electorate, voter):
+    for token, held in zip(electorate.tokens, electorate.balances):
+        assert token.balanceOf(voter) == held.get(voter, 0)
+    assert electorate.census.balanceOf(voter) == electorate.expected_power(voter)
+    assert electorate.pools[0].totalSupply() == POOL_SUPPLY
+
+
+@pytest.mark.parametrize("amount", [DUST_THRESHOLD - 1, DUST_THRESHOLD, 10**20])
+def test_dealing_lp_is_reverted(electorate, amount):
+    """Start from the snapshot, then deal LP to probe the dust rule"""
+    voter = _lp_voter(electorate)
+    _assert_pristine(electorate, voter)
+    wrapper = electorate.wrappers[0]
+    naked = electorate.balances[0].get(voter, 0)
+
+    mocks.set_token_balance(wrapper, voter, amount)
+    for other in electorate.wrappers[1:]:
+        mocks.set_token_balance(other, voter, 0)
+
+    power = electorate.census.balanceOf(voter)
+    if amount < DUST_THRESHOLD:
+        assert power == naked
+    else:
+        assert power > naked
+
+
+@pytest.mark.parametrize("total_supply", [10**30, 1])
+def test_pool_rewrites_are_reverted(electorate, total_supply):
+    """Start from the snapshot, then rewrite a pool's state"""
+    _assert_pristine(electorate, _lp_voter(electorate))
+    pool = electorate.pools[0]
+    mocks.set_pool_state(pool, PoolState(balances=(1, 1), total_supply=total_supply))
+    assert pool.totalSupply() == total_supply
+
+
+def _config(workerinput=None, fork_block=None):
+    config = types.SimpleNamespace(getoption=lambda name: fork_block)
+    if workerinput is not None:
+        config.workerinput = workerinput
+    return config
+
+
+def test_workers_share_one_fork_block():
+    assert resolve_fork_block(_config({"workerid": "gw3", "fork_block": 123})) == 123
+    assert resolve_fork_block(_config(fork_block="456")) == 456
+
+
+def test_worker_ids():
+    assert worker_id(_config({"workerid": "gw1", "fork_block": None})) == "gw1"
+    assert worker_id(_config()) == "main"
@@ -0,0 +1,250 @@
+import math
+import random
+import time
+
+import boa
+import pytest
+
+from scripts import lp_curve, mocks, model
+from scripts.lp_curve import CurveValuer, LPCurve
+from scripts.model import DUST_THRESHOLD, PoolState
+
+POOLS = {
+    "squid_eth": (
+        PoolState(
+            balances=(50 * 10**18, 75_000 * 10**18),
+            total_supply=1_000 * 10**18,
+            fee=3 * 10**6,
+        ),
+        1,
+    ),
+    "squill_squid": (
+        PoolState(
+            balances=(40_000 * 10**18, 3_200 * 10**18), total_supply=6_000 * 10**18
+        ),
+        0,
+    ),
+    "thin_side": (PoolState(balances=(10**18, 10**24), total_supply=10**20), 1),
+    # share of the other coin steps every 10**8 LP wei: too coarse for the one-wei probes
+    "coarse_sawtooth": (
+        PoolState(balances=(10**24, 10**18), total_supply=10**26, fee=5 * 10**7),
+        0,
+    ),
+}
+
+
+def _random_quantities(rng, total_supply, n):
+    top = math.log10(total_supply)
+    return [int(10 ** rng.uniform(math.log10(DUST_THRESHOLD), top)) for _ in range(n)]
+
+
+def test_log_grid():
+    grid = lp_curve.log_grid(DUST_THRESHOLD, 10**21, 256)
+    assert grid[0] == DUST_THRESHOLD and grid[-1] == 10**21
+    assert len(grid) == 256
+    assert grid == sorted(set(grid))
+
+    ratios = [b / a for a, b in zip(grid, grid[1:])]
+    assert max(ratios) / min(ratios) < 1.001
+
+    # Narrow ranges collapse duplicates instead of repeating points
+    assert lp_curve.log_grid(10, 12, 256) == [10, 11, 12]
+
+    assert lp_curve.log_grid(10, 10, 1) == [10]
+    with pytest.raises(ValueError):
+        lp_curve.log_grid(10, 100, 1)
+
+
+@pytest.mark.parametrize("name", POOLS)
+def test_bounds_contain_exact(name):
+    state, index = POOLS[name]
+    withdraw = model.mock_pool_withdraw(state, index)
+    curve = LPCurve.sample(withdraw, state.total_supply)
+
+    rng = random.Random(name)
+    outside = 0
+    for quantity in _random_quantities(rng, state.total_supply, 3_000):
+        bounds = curve.bounds(quantity)
+        if bounds is not None:
+            outside += not bounds[0] <= withdraw(quantity) <= bounds[1]
+
+    print(
+        f"\n{name}: slack {curve.slack:,} wei, {sum(curve.concave)}/{len(curve.concave)} segments concave"
+    )
+    assert outside == 0
+
+
+def test_grid_points_are_exact():
+    state, index = POOLS["squid_eth"]
+    withdraw = model.mock_pool_withdraw(state, index)
+    curve = LPCurve.sample(withdraw, state.total_supply)
+
+    for quantity in (curve.quantities[0], curve.quantities[-1]):
+        assert curve.bounds(quantity) == (withdraw(quantity), withdraw(quantity))
+    assert curve.bounds(DUST_THRESHOLD - 1) is None
+    assert curve.bounds(state.total_supply + 1) is None
+
+
+def test_tolerance_controls_fallback():
+    state, index = POOLS["squid_eth"]
+    withdraw = model.mock_pool_withdraw(state, index)
+    curve = LPCurve.sample(withdraw, state.total_supply)
+    balances = _random_quantities(random.Random(3), state.total_supply, 500) + [
+        DUST_THRESHOLD - 1
+    ]
+    exact = [model.lp_balance_in_squid(withdraw, bal) for bal in balances]
+
+    strict = CurveValuer(curve, withdraw, tolerance=0)
+    assert strict.value_many(balances) == exact
+    assert strict.stats.dust == 1
+
+    loose = CurveValuer(curve, withdraw, tolerance=1e-6)
+    values = loose.value_many(balances)
+    for bal, value, expected in zip(balances, values, exact):
+        assert abs(value - expected) <= 1e-6 * expected
+
+    wide = CurveValuer(curve, withdraw, tolerance=1e-3)
+    wide.value_many(balances)
+
+    print(f"\nstrict {strict.stats}\nloose  {loose.stats}\nwide   {wide.stats}")
+    assert strict.stats.lookups < loose.stats.lookups < wide.stats.lookups
+    assert wide.stats.exact < loose.stats.exact < strict.stats.exact
+
+
+def test_non_concave_curve_falls_back():
+    """A convex kink breaks concavity, so positions near it are solved exactly"""
+    kink = 10**15
+
+    def withdraw(q):
+        return q if q < kink else kink + 3 * (q - kink)
+
+    curve = LPCurve.sample(withdraw, 10**18, slack=0)
+    assert not all(curve.concave)
+    assert curve.bounds(kink + 1) is None
+
+    valuer = CurveValuer(curve, withdraw, tolerance=1)
+    balances = [kink - 10**12, kink + 10**12]
+    assert valuer.value_many(balances) == [
+        model.lp_balance_in_squid(withdraw, b) for b in balances
+    ]
+    assert valuer.stats.exact == 2
+
+
+def test_save_load_roundtrip(tmp_path):
+    state, index = POOLS["squill_squid"]
+    curve = LPCurve.sample(
+        model.mock_pool_withdraw(state, index),
+        state.total_supply,
+        block=123,
+        pool="0xabc",
+        index=index,
+    )
+    path = tmp_path / "curve.json"
+    curve.save(path)
+    loaded = LPCurve.load(path)
+
+    assert loaded == curve
+    assert loaded.block == 123 and loaded.slack == curve.slack
+
+
+def test_grid_stops_where_withdraw_reverts():
+    """Like twocrypto-ng, which reverts well before the whole supply is withdrawn"""
+    state, index = POOLS["squid_eth"]
+    exact = model.mock_pool_withdraw(state, index)
+    limit = state.total_supply * 9 // 10
+
+    def withdraw(quantity):
+        if quantity > limit:
+            raise model.ModelRevert("withdraw exceeds pool")
+        return exact(quantity)
+
+    curve = LPCurve.sample(withdraw, state.total_supply)
+    assert curve.quantities[-1] <= limit < curve.reverts_at <= state.total_supply
+    assert curve.bounds(curve.quantities[-1] + 1) is None
+
+    valuer = CurveValuer(curve, withdraw)
+    assert valuer.value(limit) == model.lp_balance_in_squid(exact, limit)
+    assert valuer.stats.exact == 1
+    with pytest.raises(model.ModelRevert):
+        valuer.value(curve.reverts_at)
+
+    with pytest.raises(ValueError):
+        LPCurve.sample(withdraw, state.total_supply, lo=limit + 1)
+
+
+def test_save_load_many(tmp_path):
+    curves = {}
+    for name in ("squid_eth", "squill_squid"):
+        state, index = POOLS[name]
+        curves[name] = LPCurve.sample(
+            model.mock_pool_withdraw(state, index),
+            state.total_supply,
+            points=32,
+            index=index,
+        )
+    curves["squid_eth"].reverts_at = 10**30
+
+    path = tmp_path / "lp_curves.json"
+    lp_curve.save_curves(curves, path)
+    assert lp_curve.load_curves(path) == curves
+
+
+def test_matches_census_on_mock_pool(env, mock_squid, mock_pools):
+    """Curve valuation of SQUID/ETH LP positions against SquidDaoVote itself"""
+    tentacles, wrappers = mocks.deploy_wrappers(mock_squid, mock_pools, 2)
+    census = mocks.deploy_census(mock_squid, mock_pools, tentacles)
+    pool = mock_pools[0]
+
+    def withdraw(q):
+        return pool.calc_withdraw_one_coin(q, mocks.SQUID_ETH_INDEX)
+
+    curve = LPCurve.sample(
+        withdraw, pool.totalSupply(), points=64, index=mocks.SQUID_ETH_INDEX
+    )
+    exact = CurveValuer(curve, withdraw, tolerance=0)
+    approx = CurveValuer(curve, withdraw, tolerance=1e-4)
+
+    rng = random.Random(5)
+    holders = [f"0x{i + 1:040x}" for i in range(12)]
+    for holder, bal in zip(
+        holders, _random_quantities(rng, pool.totalSupply(), len(holders))
+    ):
+        wrappers[0]._mint_for_testing(holder, bal)
+        expected = census.squid_lp_balance_in_squid(holder)
+        assert exact.value(bal) == expected
+        assert abs(approx.value(bal) - expected) <= 1e-4 * expected
+
+    assert approx.stats.lookups > 0
+
+
+def test_lookup_benchmark():
+    """Table lookups vs. one exact solve per position on an EVM pool"""
+    with boa.swap_env(boa.Env()):
+        squid = mocks.deploy_token("Squid", "SQUID")
+        pool = mocks.deploy_mock_pools(squid)[0]
+
+        def withdraw(q):
+            return pool.calc_withdraw_one_coin(q, mocks.SQUID_ETH_INDEX)
+
+        balances = _random_quantities(random.Random(9), pool.totalSupply(), 400)
+
+        start = time.perf_counter()
+        curve = LPCurve.sample(withdraw, pool.totalSupply(), points=128)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        exact = [model.lp_balance_in_squid(withdraw, bal) for bal in balances]
+        solve = time.perf_counter() - start
+
+        valuer = CurveValuer(curve, withdraw, tolerance=1e-5)
+        start = time.perf_counter()
+        values = valuer.value_many(balances)
+        lookup = time.perf_counter() - start
+
+    print(
+        f"\n{len(balances)} positions: exact {solve:.2f}s, table {lookup:.2f}s "
+        f"(+{build:.2f}s build), {valuer.stats}"
+    )
+    for value, expected in zip(values, exact):
+        assert abs(value - expected) <= 1e-5 * expected
+    assert lookup < solve
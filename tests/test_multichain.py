@@ -0,0 +1,184 @@
+"""
+Multi-chain census against two local chain stand-ins: separate boa envs with
+their own deployments, synthetic block timestamps and per-request latency
+standing in for RPC round trips.
+"""
+
+import time
+
+import boa
+import pytest
+from eth_utils import to_checksum_address
+
+from scripts import electorate as synth
+from scripts import mocks
+from scripts.client import BoaTransport
+from scripts.multichain import Chain, ChainError, block_at, multichain_census
+
+GENESIS = 1_700_000_000
+VOTERS = 60
+BATCH = 16
+
+
+class SlowBoaTransport(BoaTransport):
+    def __init__(self, env, latency, block):
+        super().__init__(env)
+        self.latency = latency
+        self.block = block
+
+    def call(self, to, data):
+        time.sleep(self.latency)
+        return super().call(to, data)
+
+    def batch_call(self, to, datas):
+        time.sleep(self.latency)
+        return [super(SlowBoaTransport, self).call(to, data) for data in datas]
+
+
+class LocalEndpoint:
+    """
+    A chain stand-in: one boa env whose state answers for every block, with
+    headers on a fixed (optionally jittered) cadence and `latency` per request.
+    """
+
+    def __init__(self, env, block_time, head, latency, jitter=()):
+        self.env = env
+        self.latency = latency
+        self.timestamps = [GENESIS]
+        for n in range(1, head + 1):
+            self.timestamps.append(
+                self.timestamps[-1]
+                + block_time
+                + (jitter[n % len(jitter)] if jitter else 0)
+            )
+        self.requests = 0
+        self.pinned = []
+
+    def block(self, tag):
+        time.sleep(self.latency)
+        self.requests += 1
+        number = len(self.timestamps) - 1 if tag == "latest" else tag
+        return {"number": number, "timestamp": self.timestamps[number]}
+
+    def transport(self, block):
+        self.pinned.append(block)
+        return SlowBoaTransport(self.env, self.latency, block)
+
+
+@pytest.fixture(scope="module")
+def chains():
+    """Two chains; chain B also holds naked SQUID for a slice of chain A's voters"""
+    built = {}
+    for name, seed in (("alpha", 11), ("beta", 12)):
+        env = boa.Env()
+        with boa.swap_env(env):
+            built[name] = (env, synth.build(voters=VOTERS, seed=seed))
+
+    env_b, beta = built["beta"]
+    alpha = built["alpha"][1]
+    shared = {v: (i + 1) * 10**21 for i, v in enumerate(alpha.voters[:20])}
+    with boa.swap_env(env_b):
+        for voter, amount in shared.items():
+            mocks.set_token_balance(beta.squid, voter, amount)
+    return built, shared
+
+
+def _chains(built, latency=(0.12, 0.08)):
+    (env_a, alpha), (env_b, beta) = built["alpha"], built["beta"]
+    return [
+        Chain(
+            "alpha",
+            LocalEndpoint(env_a, block_time=2, head=50_000, latency=latency[0]),
+            alpha.census.address,
+        ),
+        Chain(
+            "beta",
+            LocalEndpoint(env_b, block_time=12, head=9_000, latency=latency[1]),
+            beta.census.address,
+        ),
+    ]
+
+
+def test_block_at_timestamp():
+    endpoint = LocalEndpoint(None, block_time=2, head=100_000, latency=0)
+    assert block_at(endpoint, GENESIS + 1_000)["number"] == 500
+    assert block_at(endpoint, GENESIS + 1_001)["number"] == 500
+    assert block_at(endpoint, GENESIS + 10**9)["number"] == 100_000
+    print(f"\nsteady cadence: {endpoint.requests} header requests")
+
+    irregular = LocalEndpoint(
+        None, block_time=3, head=100_000, latency=0, jitter=(0, 9, -2, 0, 0, 40, -1)
+    )
+    for target in (GENESIS + 7, GENESIS + 123_457, irregular.timestamps[77_777]):
+        block = block_at(irregular, target)
+        assert (
+            irregular.timestamps[block["number"]]
+            <= target
+            < irregular.timestamps[block["number"] + 1]
+        )
+    print(f"irregular cadence: {irregular.requests} header requests for 3 lookups")
+    assert irregular.requests < 3 * 2 * 17
+
+    with pytest.raises(ValueError):
+        block_at(endpoint, GENESIS - 1)
+
+
+def test_merges_power_across_chains(chains):
+    built, shared = chains
+    alpha, beta = built["alpha"][1], built["beta"][1]
+    voters = alpha.voters + beta.voters
+    timestamp = GENESIS + 6_000
+
+    chains_ = _chains(built, latency=(0, 0))
+    result = multichain_census(chains_, voters, timestamp, batch_size=BATCH)
+
+    assert {name: run.block for name, run in result.chains.items()} == {
+        "alpha": 3_000,
+        "beta": 500,
+    }
+    assert [c.endpoint.pinned for c in chains_] == [[3_000], [500]]
+    for voter in voters:
+        expected_a = alpha.expected_power(voter) if voter in alpha.voters else 0
+        expected_b = (
+            beta.expected_power(voter) if voter in beta.voters else shared.get(voter, 0)
+        )
+        address = to_checksum_address(voter)
+        assert result.powers[address] == expected_a + expected_b
+        assert result.breakdown.get(address, {}) == {
+            name: p for name, p in (("alpha", expected_a), ("beta", expected_b)) if p
+        }
+    both = [a for a, by_chain in result.breakdown.items() if len(by_chain) == 2]
+    assert len(both) == sum(alpha.expected_power(v) > 0 for v in shared)
+
+    rows = list(result.to_rows())
+    assert rows[0] == ["address", "power", "alpha", "beta"]
+    assert len(rows) == len(voters) + 1
+
+
+def test_wall_clock_tracks_slowest_chain(chains):
+    """Latency-bound like a real RPC census: py-evm holds the GIL, so keep EVM work small"""
+    built, _ = chains
+    voters = built["alpha"][1].voters[:20] + built["beta"][1].voters[:20]
+    timestamp = GENESIS + 6_000
+
+    sequential = multichain_census(
+        _chains(built), voters, timestamp, batch_size=8, concurrency=1
+    )
+    concurrent = multichain_census(_chains(built), voters, timestamp, batch_size=8)
+
+    slowest = max(run.seconds for run in sequential.chains.values())
+    print(
+        f"\nper chain {', '.join(f'{n} {r.seconds:.2f}s' for n, r in sequential.chains.items())};"
+        f" sequential {sequential.seconds:.2f}s, concurrent {concurrent.seconds:.2f}s"
+    )
+    assert concurrent.powers == sequential.powers
+    assert concurrent.seconds < 0.75 * sequential.seconds
+    assert concurrent.seconds < 1.35 * slowest
+
+
+def test_failing_chain_is_named(chains):
+    built, _ = chains
+    broken = _chains(built, latency=(0, 0))
+    broken[1].address = mocks.ZERO_ADDRESS
+    with pytest.raises(ChainError, match="beta"):
+        multichain_census(broken, built["alpha"][1].voters[:5], GENESIS + 60)
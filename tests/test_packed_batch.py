@@ -0,0 +1,224 @@
+import boa
+import pytest
+
+from scripts import mocks, packed
+from scripts.client import ContractCallError, SquidDaoVoteClient
+
+DUST_THRESHOLD = 10_000_000
+
+BALANCE_ONLY_TOKEN = """
+balanceOf: public(HashMap[address, uint256])
+
+@external
+def mint(to: address, amount: uint256):
+    self.balanceOf[to] += amount
+"""
+
+
+def _populate(squid, wrappers, n_voters):
+    """Naked-only, LP-only, dust, mixed and empty voters in rotation"""
+    voters = [f"0x{i + 1:040x}" for i in range(n_voters)]
+    for i, voter in enumerate(voters):
+        kind = i % 5
+        if kind in (0, 3):
+            squid._mint_for_testing(voter, (i + 1) * 10**18)
+        if kind in (1, 3):
+            for k, wrapper in enumerate(wrappers):
+                wrapper._mint_for_testing(voter, (i + k + 1) * 10**17)
+        if kind == 2:
+            wrappers[0]._mint_for_testing(voter, DUST_THRESHOLD - 1)
+    return voters
+
+
+@pytest.fixture
+def census_9(env, mock_squid, mock_pools):
+    tentacles, wrappers = mocks.deploy_wrappers(mock_squid, mock_pools, 9)
+    census = mocks.deploy_census(mock_squid, mock_pools, tentacles)
+    return census, wrappers
+
+
+def test_encode_decode_roundtrip():
+    voters = ["0x5abC63ebF1950d531408cf8E12cE24c047504847", mocks.ZERO_ADDRESS]
+    data = packed.encode_voters(voters)
+    assert len(data) == 40
+    assert data[:20].hex() == voters[0][2:].lower()
+
+    assert packed.decode_powers(
+        (7).to_bytes(32, "big") + (2**255).to_bytes(32, "big")
+    ) == [
+        7,
+        2**255,
+    ]
+    with pytest.raises(ValueError):
+        packed.decode_powers(b"\x00" * 33)
+
+
+def test_batch_matches_balance_of(census_9, mock_squid):
+    census, wrappers = census_9
+    voters = _populate(mock_squid, wrappers, 20)
+    expected = [census.balanceOf(voter) for voter in voters]
+    assert any(expected) and not all(expected)
+
+    client = SquidDaoVoteClient.from_boa(census.address)
+    assert packed.packed_voting_power(client, voters) == expected
+    assert packed.packed_voting_power(client, voters, batch_size=7) == expected
+    assert list(census.balanceOfBatch(voters)) == expected
+
+
+def test_empty_and_malformed_batches(census_9):
+    census, _ = census_9
+    client = SquidDaoVoteClient.from_boa(census.address)
+
+    assert client.balanceOfPacked(b"") == b""
+    assert list(census.balanceOfBatch([])) == []
+
+    with pytest.raises(ContractCallError):
+        client.balanceOfPacked(b"\x01" * 21)
+    with pytest.raises(ContractCallError):
+        client.balanceOfPacked(b"\x01" * 20 * (packed.MAX_BATCH + 1))
+
+
+def _packed_gas(census, voters):
+    client = SquidDaoVoteClient.from_boa(census.address)
+    fn = client._function("balanceOfPacked", 1)
+    boa.env.reset_gas_used()
+    computation = boa.env.raw_call(
+        census.address, data=fn.encode([packed.encode_voters(voters)])
+    )
+    return packed.decode_powers(fn.decode(computation.output)), computation.net_gas_used
+
+
+def test_batch_does_not_read_supplies():
+    """Every live tentacle has supply, so the batch views never pay for totalSupply() reads"""
+    with boa.swap_env(boa.Env()):
+        squid = mocks.deploy_token("Squid", "SQUID")
+        pools = mocks.deploy_mock_pools(squid)
+        tentacles, wrappers = mocks.deploy_wrappers(squid, pools, 9)
+        census = mocks.deploy_census(squid, pools, tentacles)
+        voters = _populate(squid, wrappers, 4)
+
+        unheld, unheld_gas = _packed_gas(census, [])
+        for token in [squid, *wrappers]:
+            token._mint_for_testing(mocks.ZERO_ADDRESS, 1)
+        held, held_gas = _packed_gas(census, [])
+        assert unheld == held == []
+        assert unheld_gas == held_gas
+
+        expected = [census.balanceOf(v) for v in voters]
+        assert _packed_gas(census, voters)[0] == expected
+
+
+def test_voters_without_lp_skip_pool_pricing():
+    """The per-address skip: pools are only priced for voters holding more than dust LP"""
+    with boa.swap_env(boa.Env()):
+        squid = mocks.deploy_token("Squid", "SQUID")
+        pools = mocks.deploy_mock_pools(squid)
+        tentacles, wrappers = mocks.deploy_wrappers(squid, pools, 9)
+        census = mocks.deploy_census(squid, pools, tentacles)
+        voters = _populate(squid, wrappers, 5)
+        naked, lp, dust = voters[0], voters[1], voters[2]
+
+        _, base_gas = _packed_gas(census, [naked])
+        costs = {}
+        for name, voter in (("naked", naked), ("lp", lp), ("dust", dust)):
+            _, gas = _packed_gas(census, [naked, voter])
+            costs[name] = gas - base_gas
+        print(f"\nMarginal packed gas per voter: {costs}")
+
+        assert costs["naked"] < costs["lp"]
+        assert costs["dust"] < costs["lp"]
+
+
+def test_wrapper_without_total_supply(census_9, mock_squid, mock_pools):
+    """A wrapper that only implements balanceOf() is priced like any other tentacle"""
+    census, wrappers = census_9
+    vault = boa.loads(BALANCE_ONLY_TOKEN)
+    census.add_tentacle((vault.address, mock_pools[0].address, mocks.SQUID_ETH_INDEX))
+
+    voters = _populate(mock_squid, wrappers, 10)
+    vault.mint(voters[2], 10**18)
+    expected = [census.balanceOf(voter) for voter in voters]
+    assert expected[2] > 0
+
+    client = SquidDaoVoteClient.from_boa(census.address)
+    assert packed.packed_voting_power(client, voters) == expected
+    assert list(census.balanceOfBatch(voters)) == expected
+
+
+def test_calldata_and_gas_benchmark():
+    """
+    Packed vs. ABI-array batch vs. one balanceOf per voter:
+    calldata bytes, EIP-2028 calldata gas and execution gas.
+    """
+    rows = []
+    with boa.swap_env(boa.Env()):
+        squid = mocks.deploy_token("Squid", "SQUID")
+        pools = mocks.deploy_mock_pools(squid)
+        tentacles, wrappers = mocks.deploy_wrappers(squid, pools, 9)
+        census = mocks.deploy_census(squid, pools, tentacles)
+        client = SquidDaoVoteClient.from_boa(census.address)
+        all_voters = _populate(squid, wrappers, 64)
+
+        def measure(fn, nargs, *args):
+            data = client._function(fn, nargs).encode(args)
+            boa.env.reset_gas_used()
+            computation = boa.env.raw_call(census.address, data=data)
+            return data, computation.net_gas_used
+
+        for n in (1, 8, 64):
+            voters = all_voters[:n]
+            packed_data, packed_gas = measure(
+                "balanceOfPacked", 1, packed.encode_voters(voters)
+            )
+            array_data, array_gas = measure("balanceOfBatch", 1, voters)
+            single = [measure("balanceOf", 1, v) for v in voters]
+            single_data = sum(len(d) for d, _ in single)
+            single_gas = sum(g for _, g in single)
+            rows.append(
+                (
+                    n,
+                    len(packed_data),
+                    packed.calldata_gas(packed_data),
+                    packed_gas,
+                    len(array_data),
+                    packed.calldata_gas(array_data),
+                    array_gas,
+                    single_data,
+                    single_gas,
+                )
+            )
+
+    print(
+        f"\n{'Voters':>6} | {'packed bytes':>12} {'cd gas':>7} {'exec gas':>9} "
+        f"| {'array bytes':>11} {'cd gas':>7} {'exec gas':>9} | {'single bytes':>12} {'exec gas':>9}"
+    )
+    for n, pb, pcg, pg, ab, acg, ag, sb, sg in rows:
+        print(
+            f"{n:>6} | {pb:>12,} {pcg:>7,} {pg:>9,} | {ab:>11,} {acg:>7,} {ag:>9,} "
+            f"| {sb:>12,} {sg:>9,}"
+        )
+
+    # A single voter pads to one 32-byte word either way; savings start at two
+    for n, pb, pcg, pg, ab, acg, ag, sb, sg in rows:
+        assert pb <= ab and pcg <= acg
+        if n > 1:
+            assert pb < ab and pcg < acg
+            assert pg < sg
+
+
+@pytest.mark.fork_only
+def test_live_layout_batch_gas(census, voter_addresses):
+    """On the Fraxtal registry one packed batch costs less than a balanceOf per voter"""
+    client = SquidDaoVoteClient.from_boa(census.address)
+    single_gas = 0
+    for voter in voter_addresses:
+        data = client._function("balanceOf", 1).encode([voter])
+        boa.env.reset_gas_used()
+        single_gas += boa.env.raw_call(census.address, data=data).net_gas_used
+
+    powers, batch_gas = _packed_gas(census, voter_addresses)
+    print(
+        f"\nLive layout, {len(voter_addresses)} voters: packed {batch_gas:,} vs single {single_gas:,}"
+    )
+    assert powers == [census.balanceOf(v) for v in voter_addresses]
+    assert batch_gas < single_gas
@@ -0,0 +1,205 @@
+import random
+import time
+
+import pytest
+from eth_utils import to_canonical_address, to_checksum_address
+
+from scripts import mocks
+from scripts.census import Census
+from scripts.client import SquidDaoVoteClient
+from scripts.electorate import voter_addresses
+from scripts.model import DUST_THRESHOLD
+from scripts.prefilter import (
+    BloomFilter,
+    HolderPrefilter,
+    holders_from_logs,
+    relevant_holders,
+)
+
+
+def _census(electorate, prefilter=None):
+    return Census(
+        SquidDaoVoteClient.from_boa(electorate.census.address),
+        batch_size=32,
+        prefilter=prefilter,
+    )
+
+
+def _prefilter(electorate, census=None):
+    block = (census or _census(electorate)).pinned_block()
+    return HolderPrefilter.from_balances(
+        block, electorate.tentacles, electorate.balances
+    )
+
+
+def _stream(electorate, holders, strangers, seed=2):
+    """`holders` electorate voters and `strangers` fresh addresses, with repeats, shuffled"""
+    rng = random.Random(seed)
+    stream = rng.sample(electorate.voters, holders) + voter_addresses(rng, strangers)
+    stream += rng.sample(stream, len(stream) // 10)
+    rng.shuffle(stream)
+    return stream
+
+
+def test_bloom_has_no_false_negatives():
+    rng = random.Random(0)
+    members = [rng.randbytes(20) for _ in range(50_000)]
+    bloom = BloomFilter(len(members), error_rate=0.01)
+    for key in members:
+        bloom.add(key)
+    assert all(key in bloom for key in members)
+
+    strangers = [rng.randbytes(20) for _ in range(100_000)]
+    start = time.perf_counter()
+    false_positives = sum(key in bloom for key in strangers)
+    elapsed = time.perf_counter() - start
+    rate = false_positives / len(strangers)
+    print(
+        f"\n50,000 holders in {bloom.nbytes:,} bytes, {bloom.hashes} hashes:"
+        f" false positive rate {rate:.3%}, {len(strangers) / elapsed:,.0f} lookups/s"
+    )
+    assert rate < 0.015
+
+
+def test_never_drops_a_real_holder(electorate):
+    prefilter = _prefilter(electorate)
+    states = electorate.pool_states()
+    powered = [v for v in electorate.voters if electorate.expected_power(v, states)]
+    assert powered
+    assert not any(prefilter.definitely_zero(v) for v in powered)
+    assert not any(
+        prefilter.definitely_zero(to_checksum_address(v)) for v in powered[:50]
+    )
+
+    # Whatever it does rule out really is zero: empty voters and dust-only LP
+    ruled_out = [v for v in electorate.voters if prefilter.definitely_zero(v)]
+    dust_only = [
+        v
+        for v in ruled_out
+        if any(0 < held.get(v, 0) < DUST_THRESHOLD for held in electorate.balances[1:])
+    ]
+    print(
+        f"\n{len(powered)} holders kept, {len(ruled_out)} voters ruled out ({len(dust_only)} dust-only)"
+    )
+    assert all(electorate.expected_power(v, states) == 0 for v in ruled_out)
+    assert dust_only
+
+
+def test_prefiltered_census_matches_plain(electorate):
+    stream = _stream(electorate, holders=60, strangers=240)
+
+    plain = _census(electorate)
+    start = time.perf_counter()
+    expected = plain.run(stream)
+    plain_seconds = time.perf_counter() - start
+
+    filtered = _census(electorate)
+    prefilter = _prefilter(electorate, filtered)
+    filtered.prefilter = prefilter
+    start = time.perf_counter()
+    powers = filtered.run(stream)
+    filtered_seconds = time.perf_counter() - start
+
+    assert powers == expected
+    plain_calls = plain.metrics.counters["eth_calls"]
+    calls = filtered.metrics.counters["eth_calls"]
+    print(
+        f"\n{len(stream)} addresses, 20% holders: skip rate {prefilter.skip_rate:.0%},"
+        f" {plain_calls} -> {calls} eth_calls, {plain_seconds:.2f}s -> {filtered_seconds:.2f}s"
+        f" ({plain_seconds / filtered_seconds:.1f}x)"
+    )
+    assert filtered.metrics.counters["prefiltered"] >= 200
+    assert calls < plain_calls
+    assert filtered_seconds < plain_seconds
+
+    # The streaming path skips the same addresses
+    assert filtered.score(list(expected)) == list(expected.values())
+
+
+def test_negative_cache_and_advance(electorate):
+    """A stale superset: emptied holders pass the bloom filter once, then hit the negative cache"""
+    holders = relevant_holders(electorate.tentacles, electorate.balances)
+    emptied = [v for v in electorate.voters if v in holders][:5]
+    for voter in emptied:
+        for token in electorate.tokens:
+            mocks.set_token_balance(token, voter, 0)
+
+    census = _census(electorate)
+    prefilter = _prefilter(electorate, census)
+    census.prefilter = prefilter
+    assert census.run(emptied) == {to_checksum_address(v): 0 for v in emptied}
+    assert census.metrics.counters["eth_calls"] == 1
+
+    again = _census(electorate, prefilter)
+    assert again.run(emptied) == {to_checksum_address(v): 0 for v in emptied}
+    assert prefilter.stats["negative_hits"] == len(emptied)
+    assert "eth_calls" not in again.metrics.counters
+
+    # One of them receives SQUID: advancing with it as touched scores it again
+    mocks.set_token_balance(electorate.squid, emptied[0], 10**18)
+    prefilter.advance(prefilter.block, touched=[emptied[0]])
+    fresh = _census(electorate, prefilter)
+    assert fresh.run(emptied)[to_checksum_address(emptied[0])] == 10**18
+    assert fresh.metrics.counters["prefiltered"] == len(emptied) - 1
+
+    prefilter.advance(prefilter.block, pools_changed=True)
+    assert not prefilter.negative
+
+
+def test_block_mismatch_is_refused(electorate):
+    census = _census(electorate)
+    census.prefilter = HolderPrefilter(census.pinned_block() + 1, electorate.voters)
+    with pytest.raises(ValueError, match="prefilter is for block"):
+        census.run(electorate.voters[:3])
+
+
+def test_save_load_and_log_holders(electorate, tmp_path):
+    prefilter = _prefilter(electorate)
+    path = tmp_path / "holders.bloom"
+    prefilter.save(path)
+    loaded = HolderPrefilter.load(path)
+    assert (loaded.block, loaded.bloom.size, loaded.bloom.hashes) == (
+        prefilter.block,
+        prefilter.bloom.size,
+        prefilter.bloom.hashes,
+    )
+    assert loaded.bloom.bits == prefilter.bloom.bits
+    holders = relevant_holders(electorate.tentacles, electorate.balances)
+    assert not any(loaded.definitely_zero(v) for v in holders)
+
+    class Logs:
+        """eth_getLogs over a fixed list of (block, recipient) transfers"""
+
+        def __init__(self, transfers):
+            self.transfers = transfers
+            self.ranges = []
+
+        def request(self, method, params):
+            (query,) = params
+            lo, hi = int(query["fromBlock"], 16), int(query["toBlock"], 16)
+            self.ranges.append((lo, hi))
+            return [
+                {
+                    "topics": [
+                        "0xddf2",
+                        "0x" + "00" * 32,
+                        "0x" + to_canonical_address(to).rjust(32, b"\0").hex(),
+                    ]
+                }
+                for block, to in self.transfers
+                if lo <= block <= hi
+            ]
+
+    recipients = electorate.voters[:4]
+    source = Logs(
+        [
+            (10, recipients[0]),
+            (120, recipients[1]),
+            (250, recipients[2]),
+            (301, recipients[3]),
+        ]
+    )
+    assert holders_from_logs(source, ["0xtoken"], 0, 300, step=100) == set(
+        recipients[:3]
+    )
+    assert source.ranges == [(0, 99), (100, 199), (200, 299), (300, 300)]
@@ -0,0 +1,263 @@
+import random
+import time
+
+import boa
+import pytest
+from eth_utils import to_checksum_address
+
+from scripts import electorate as synth
+from scripts import mocks
+from scripts import tentacles as live
+from scripts.census import Census
+from scripts.client import BoaTransport, SquidDaoVoteClient
+from scripts.mocks import SQUID_ETH_INDEX, SQUILL_SQUID_INDEX
+from scripts.model import PoolState, lp_balance_in_squid, mock_pool_withdraw
+from scripts.scenarios import (
+    ForkPool,
+    Scenario,
+    Snapshot,
+    price_grid,
+    price_shock,
+    pull_liquidity,
+    revalue,
+    run_grid,
+    value_column,
+)
+
+
+@pytest.fixture(scope="module")
+def snapshot(electorate):
+    return Snapshot.from_electorate(electorate)
+
+
+def _squid_indices(electorate):
+    squid_eth, squill_squid = (pool.address for pool in electorate.pools[:2])
+    return {squid_eth: SQUID_ETH_INDEX, squill_squid: SQUILL_SQUID_INDEX}
+
+
+def _whale(snapshot, pool):
+    positions, quantities = snapshot.columns[(pool, SQUID_ETH_INDEX)]
+    return snapshot.voters[positions[quantities.index(max(quantities))]]
+
+
+def test_column_matches_model():
+    rng = random.Random(0)
+    for _ in range(200):
+        supply = rng.randint(10**18, 10**27)
+        state = PoolState(
+            balances=(rng.randint(1, 10**27), rng.randint(1, 10**27)),
+            total_supply=supply,
+            fee=rng.choice([0, rng.randint(0, 10**8)]),
+        )
+        quantities = [
+            rng.choice([rng.randint(0, 10**7), rng.randint(10**7, supply)])
+            for _ in range(20)
+        ]
+        for index in (0, 1):
+            withdraw = mock_pool_withdraw(state, index)
+            assert value_column(state, index, quantities) == [
+                lp_balance_in_squid(withdraw, q) for q in quantities
+            ]
+
+
+def test_base_scenario_is_the_census(electorate, snapshot):
+    result = revalue(snapshot, Scenario("base"))
+    states = electorate.pool_states()
+    assert result.powers == [
+        electorate.expected_power(v, states) for v in electorate.voters
+    ]
+
+
+def _apply_on_chain(electorate, scenario):
+    """Mutate the mocks into `scenario`"""
+    for pool in electorate.pools[:2]:
+        if pool.address in scenario.pools:
+            mocks.set_pool_state(pool, scenario.pools[pool.address])
+    for voter, holdings in scenario.balances.items():
+        for token, bal in zip(electorate.tokens, holdings):
+            mocks.set_token_balance(token, voter, bal)
+
+
+@pytest.mark.parametrize(
+    "which", ["squid_eth -30%", "all +30%", "whale pulls", "drained pool"]
+)
+def test_scenarios_match_contract_on_mutated_mocks(electorate, snapshot, which):
+    scenario = _scenario(electorate, snapshot, which)
+    result = revalue(snapshot, scenario)
+    _apply_on_chain(electorate, scenario)
+
+    lp_holders = sorted(set().union(*(set(h) for h in electorate.balances[1:])))
+    sample = lp_holders[:100] + list(scenario.balances) + electorate.voters[:20]
+    census = Census(SquidDaoVoteClient.from_boa(electorate.census.address))
+    onchain = census.run(sample)
+    for voter in sample:
+        assert (
+            onchain[to_checksum_address(voter)]
+            == result.powers[snapshot.position[voter]]
+        ), voter
+
+
+def _scenario(electorate, snapshot, which):
+    squid_eth = electorate.pools[0].address
+    if which == "squid_eth -30%":
+        return Scenario(
+            which,
+            {
+                squid_eth: price_shock(
+                    snapshot.pool_states[squid_eth], SQUID_ETH_INDEX, -0.3
+                )
+            },
+        )
+    if which == "all +30%":
+        return price_grid(snapshot, _squid_indices(electorate), [0.3])[-1]
+    if which == "whale pulls":
+        return pull_liquidity(snapshot, _whale(snapshot, squid_eth), squid_eth)
+    state = snapshot.pool_states[squid_eth]
+    drained = PoolState(
+        (state.balances[0] // 100, state.balances[1] * 3), state.total_supply, 10**8
+    )
+    return Scenario(which, {squid_eth: drained})
+
+
+def test_fork_pool_finds_mock_slots(electorate):
+    pool = ForkPool(electorate.pools[0].address)
+    assert pool.slots == {
+        "balance0": mocks.TWOCRYPTO_BALANCES_SLOT,
+        "balance1": mocks.TWOCRYPTO_BALANCES_SLOT + 1,
+        "total_supply": mocks.TWOCRYPTO_SUPPLY_SLOT,
+        "fee": mocks.TWOCRYPTO_FEE_SLOT,
+        "D": None,
+    }
+    assert pool.state() == electorate.pool_states()[0]
+
+
+@pytest.mark.parametrize(
+    "which", ["squid_eth -30%", "all +30%", "whale pulls", "drained pool"]
+)
+def test_fork_pools_match_model(electorate, snapshot, which):
+    """Pricing through the pools' own code agrees with the model, and leaves no state behind"""
+    pools = {pool.address: ForkPool(pool.address) for pool in electorate.pools[:2]}
+    scenario = _scenario(electorate, snapshot, which)
+    assert (
+        revalue(snapshot, scenario, pools).powers == revalue(snapshot, scenario).powers
+    )
+    assert {a: p.state() for a, p in pools.items()} == snapshot.pool_states
+
+
+def test_snapshot_from_reader(electorate, snapshot):
+    from scripts.slots import BalanceReader
+
+    pools = [p.address for p in electorate.pools[:2]]
+    registry = [
+        (token.address, mocks.ZERO_ADDRESS if pool is None else pools[pool], index)
+        for token, (pool, index) in zip(electorate.tokens, electorate.tentacles)
+    ]
+    reader = BalanceReader(BoaTransport(), [token for token, _, _ in registry])
+    read = Snapshot.from_reader(
+        reader, electorate.voters, registry, snapshot.pool_states
+    )
+
+    assert read.tentacles == snapshot.tentacles
+    assert read.naked == snapshot.naked and read.columns == snapshot.columns
+    with pytest.raises(ValueError):
+        Snapshot.from_reader(
+            reader, electorate.voters, registry[::-1], snapshot.pool_states
+        )
+
+
+@pytest.mark.fork_only
+def test_live_layout_scenarios_match_contract(census, voter_addresses):
+    """
+    Live Fraxtal balances and twocrypto-ng pools: the base scenario is the
+    census, and a shocked scenario matches the contract run on the same
+    rewritten pool storage.
+    """
+    from scripts.slots import BalanceReader
+
+    pools = {
+        address: ForkPool(address)
+        for address in (live.SQUID_ETH_POOL, live.SQUILL_SQUID_POOL)
+    }
+    assert all(pool.slots["D"] is not None for pool in pools.values())
+    reader = BalanceReader(
+        BoaTransport(), [token for token, _, _ in live.FRAXTAL_TENTACLES]
+    )
+    states = {address: pool.state() for address, pool in pools.items()}
+    snapshot = Snapshot.from_reader(
+        reader, voter_addresses, live.FRAXTAL_TENTACLES, states
+    )
+
+    base = revalue(snapshot, Scenario("base"), pools)
+    assert base.powers == [census.balanceOf(v) for v in voter_addresses]
+
+    indices = {
+        live.SQUID_ETH_POOL: live.SQUID_ETH_INDEX,
+        live.SQUILL_SQUID_POOL: live.SQUILL_SQUID_INDEX,
+    }
+    shocked = price_grid(snapshot, indices, [-0.1])[-1]
+    result = revalue(snapshot, shocked, pools)
+    with boa.env.anchor():
+        for address, pool in pools.items():
+            pool.write(shocked.pools[address])
+        onchain = [census.balanceOf(v) for v in voter_addresses]
+    print(
+        f"\nlive -10%: total {base.total / 10**18:,.0f} -> {result.total / 10**18:,.0f} SQUID"
+    )
+    assert result.powers == onchain
+    assert result.total < base.total
+    assert {address: pool.state() for address, pool in pools.items()} == states
+
+
+def test_whale_pull_moves_ranking(electorate, snapshot):
+    squid_eth = electorate.pools[0].address
+    whale = _whale(snapshot, squid_eth)
+    base = revalue(snapshot, Scenario("base"))
+    pulled = revalue(snapshot, pull_liquidity(snapshot, whale, squid_eth))
+
+    i = snapshot.position[whale]
+    base_rank = base.ranking().index(i) + 1
+    rank = pulled.ranking().index(i) + 1
+    print(
+        f"\nwhale #{base_rank} -> #{rank}, total {base.total / 10**18:,.0f} -> {pulled.total / 10**18:,.0f}"
+    )
+    assert pulled.powers[i] < base.powers[i]
+    assert rank > base_rank
+    assert pulled.rank_changes(base, top=3)[0][2] == 1
+
+
+def test_parallel_grid_matches_serial(electorate, snapshot):
+    scenarios = [Scenario("base")] + price_grid(
+        snapshot, _squid_indices(electorate), [-0.3, -0.1, 0.1, 0.3]
+    )
+    serial = run_grid(snapshot, scenarios, workers=1)
+    parallel = run_grid(snapshot, scenarios, workers=2)
+    assert [r.powers for r in parallel] == [r.powers for r in serial]
+    assert [r.name for r in parallel] == [s.name for s in scenarios]
+
+    totals = {r.name: r.total for r in serial}
+    assert totals["all pools -30%"] > totals["base"] > totals["all pools +30%"]
+
+
+def test_revaluation_throughput():
+    """A larger electorate: one scenario pass against the per-voter model path"""
+    with boa.swap_env(boa.Env()):
+        electorate = synth.build(voters=50_000, seed=5)
+    snapshot = Snapshot.from_electorate(electorate)
+    scenario = price_grid(snapshot, _squid_indices(electorate), [0.3])[-1]
+
+    result = revalue(snapshot, scenario)
+    states = {**snapshot.pool_states, **scenario.pools}
+    ids = {pool.address: k for k, pool in enumerate(electorate.pools[:2])}
+    by_id = {ids[p]: s for p, s in states.items()}
+    sample = electorate.voters[:5_000]
+    start = time.perf_counter()
+    expected = [electorate.expected_power(v, by_id) for v in sample]
+    per_voter = (time.perf_counter() - start) / len(sample)
+
+    print(
+        f"\n50,000 voters: scenario pass {result.seconds * 1e3:.0f} ms"
+        f" ({len(snapshot.voters) / result.seconds:,.0f} voters/s),"
+        f" per-voter model {1 / per_voter:,.0f} voters/s"
+    )
+    assert result.powers[:5_000] == expected
+    assert result.seconds < per_voter * len(snapshot.voters)
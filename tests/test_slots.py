@@ -0,0 +1,193 @@
+import random
+import time
+
+import boa
+import pytest
+
+from scripts import mocks
+from scripts.client import BoaTransport, RPCTransport
+from scripts.slots import CALL, PROBE_POOL, SOLIDITY, VYPER, BalanceReader, SlotLayout
+
+
+def _token_code(slot, layout, scale=1):
+    """
+    Hand-assembled `balanceOf(address)`: sload of the `layout` mapping entry at
+    `slot`, times `scale` (scale != 1 is a wrapper with computed balances).
+    """
+    key_at, slot_at = (0x00, 0x20) if layout == SOLIDITY else (0x20, 0x00)
+    code = f"600435 60{key_at:02x}52 60{slot:02x}60{slot_at:02x}52 6040600020 54"
+    if scale != 1:
+        code += f"60{scale:02x}02"
+    code += "600052 60206000f3"
+    return bytes.fromhex(code.replace(" ", ""))
+
+
+def _raw_token(address, slot, layout, balances, scale=1):
+    boa.env.set_code(address, _token_code(slot, layout, scale))
+    for holder, bal in balances.items():
+        boa.env.set_storage(address, SlotLayout(layout, slot).slot_of(holder), bal)
+    return address
+
+
+def _balances(voters, seed):
+    rng = random.Random(seed)
+    return {v: rng.randint(1, 10**24) for v in voters if rng.random() < 0.3}
+
+
+def test_detects_and_matches_mock_tokens(electorate):
+    reader = BalanceReader(BoaTransport(), [t.address for t in electorate.tokens])
+    storage = reader.read_all(electorate.voters)
+    calls = [reader._calls(t, electorate.voters) for t in reader.tokens]
+
+    assert set(reader.layouts.values()) == {SlotLayout(VYPER, mocks.ERC20_BALANCE_SLOT)}
+    assert storage == calls
+    assert storage == [
+        [held.get(v, 0) for v in electorate.voters] for held in electorate.balances
+    ]
+
+
+@pytest.mark.parametrize("layout,slot", [(SOLIDITY, 0), (SOLIDITY, 51), (VYPER, 3)])
+def test_raw_layouts(electorate, layout, slot):
+    voters = electorate.voters[:300]
+    balances = _balances(voters, slot)
+    token = _raw_token("0x" + "51" * 20, slot, layout, balances)
+
+    reader = BalanceReader(BoaTransport(), [token])
+    assert reader.read(token, voters) == [balances.get(v, 0) for v in voters]
+    assert reader.layouts[token] == SlotLayout(layout, slot)
+
+
+def test_computed_balances_fall_back_to_calls(electorate):
+    voters = electorate.voters[:300]
+    balances = _balances(voters, 1)
+    token = _raw_token("0x" + "52" * 20, 7, SOLIDITY, balances, scale=3)
+
+    reader = BalanceReader(BoaTransport(), [token])
+    assert reader.read(token, voters) == [3 * balances.get(v, 0) for v in voters]
+    assert reader.layouts[token].kind == CALL
+
+
+def test_layout_drift_is_caught_by_spot_checks(electorate):
+    voters = electorate.voters[:300]
+    balances = _balances(voters, 2)
+    token = _raw_token("0x" + "53" * 20, 4, VYPER, balances)
+    reader = BalanceReader(BoaTransport(), [token])
+    reader.read(token, voters)
+
+    boa.env.set_code(
+        token, _token_code(4, VYPER, scale=2)
+    )  # upgraded to computed balances
+    assert reader.read(token, voters) == [2 * balances.get(v, 0) for v in voters]
+    assert reader.layouts[token].kind == CALL
+    assert reader.metrics.counters["layout_fallbacks"] == 1
+
+
+def test_empty_holders_read_with_calls(electorate):
+    """An all-empty probe is read with calls and never cached as CALL"""
+    token = _raw_token("0x" + "54" * 20, 2, VYPER, {})
+    reader = BalanceReader(BoaTransport(), [token])
+    assert reader.detect(token, electorate.voters[:20]) is None
+    assert reader.read(token, electorate.voters[:20]) == [0] * 20
+    assert token not in reader.layouts
+
+    # Holders past the probe pool are used for detection in the same batch
+    voters = electorate.voters[: PROBE_POOL + 50]
+    late = {v: 10**18 + k for k, v in enumerate(voters[PROBE_POOL:])}
+    for holder, bal in late.items():
+        boa.env.set_storage(token, SlotLayout(VYPER, 2).slot_of(holder), bal)
+    assert reader.read(token, voters) == [late.get(v, 0) for v in voters]
+    assert reader.layouts[token] == SlotLayout(VYPER, 2)
+    assert (
+        reader.metrics.counters["layout_undetected"] == 4
+    )  # detect, then twice per empty probe
+
+
+class StorageSession:
+    """JSON-RPC session answering eth_getStorageAt / eth_getProof / eth_call from boa state"""
+
+    def __init__(self):
+        self.posts = []
+
+    def _answer(self, request):
+        method, params = request["method"], request["params"]
+        if method == "eth_getStorageAt":
+            result = hex(boa.env.get_storage(params[0], int(params[1], 16)))
+        elif method == "eth_getProof":
+            result = {
+                "storageProof": [
+                    {
+                        "key": key,
+                        "value": hex(boa.env.get_storage(params[0], int(key, 16))),
+                    }
+                    for key in params[1]
+                ]
+            }
+        else:
+            out = boa.env.raw_call(
+                params[0]["to"], data=bytes.fromhex(params[0]["data"][2:])
+            ).output
+            result = "0x" + out.hex()
+        return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+    def post(self, url, json, timeout):
+        self.posts.append(json)
+        body = (
+            [self._answer(r) for r in json]
+            if isinstance(json, list)
+            else self._answer(json)
+        )
+        return type(
+            "Response",
+            (),
+            {"raise_for_status": lambda self: None, "json": lambda self: body},
+        )()
+
+
+@pytest.mark.parametrize("proof", [False, True])
+def test_rpc_requests(electorate, proof):
+    session = StorageSession()
+    transport = RPCTransport("http://rpc", block=123, session=session)
+    reader = BalanceReader(
+        transport, [electorate.squid.address], batch_size=100, proof=proof
+    )
+    voters = electorate.voters[:250]
+
+    assert reader.read(electorate.squid.address, voters) == [
+        electorate.balances[0].get(v, 0) for v in voters
+    ]
+    method = "eth_getProof" if proof else "eth_getStorageAt"
+    reads = [
+        p
+        for p in session.posts
+        if (p[0] if isinstance(p, list) else p)["method"] == method
+    ]
+    assert all(
+        (r[0] if isinstance(r, list) else r)["params"][-1] == "0x7b" for r in reads
+    )
+    print(f"\n{method}: {len(session.posts)} posts for 250 voters (incl. detection)")
+    # detection: 128 candidate slots (2 batches) and one verify; then 3 reads of <= 100 slots
+    assert len(reads) == 2 + 1 + 3
+
+
+def test_storage_vs_call_throughput(electorate):
+    tokens = [t.address for t in electorate.tokens]
+    voters = electorate.voters
+    reader = BalanceReader(BoaTransport(), tokens)
+    for token in tokens:
+        reader.detect(token, voters)
+
+    start = time.perf_counter()
+    storage = reader.read_all(voters)
+    storage_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    calls = [reader._calls(t, voters) for t in tokens]
+    call_s = time.perf_counter() - start
+
+    reads = len(voters) * len(tokens)
+    print(
+        f"\n{reads:,} balances: storage {reads / storage_s:,.0f}/s, calls {reads / call_s:,.0f}/s"
+        f" ({call_s / storage_s:.1f}x)"
+    )
+    assert storage == calls
+    assert storage_s < call_s
@@ -0,0 +1,226 @@
+import json
+import random
+import time
+import tracemalloc
+
+import pytest
+
+from scripts.census import Census
+from scripts.client import SquidDaoVoteClient
+from scripts.tally import (
+    Ballot,
+    Tally,
+    read_ballots,
+    split_weighted,
+    total_power_from_csv,
+)
+
+BATCH = 64
+
+
+def _census(electorate):
+    return Census(
+        SquidDaoVoteClient.from_boa(electorate.census.address), batch_size=BATCH
+    )
+
+
+def _ballots(electorate, kind, n, seed=0):
+    rng = random.Random(seed)
+    ballots = []
+    for voter in rng.sample(electorate.voters, n):
+        if kind == "single":
+            choice = rng.randrange(3)
+        elif kind == "approval":
+            choice = rng.sample(range(3), rng.randint(1, 3))
+        else:
+            choice = {
+                c: rng.randint(0, 100) for c in rng.sample(range(3), rng.randint(1, 3))
+            }
+            choice[next(iter(choice))] += 1
+        ballots.append(Ballot(voter, choice))
+    return ballots
+
+
+def _expected(electorate, kind, ballots):
+    states = electorate.pool_states()
+    totals = [0, 0, 0]
+    for ballot in ballots:
+        power = electorate.expected_power(ballot.voter, states)
+        if kind == "single":
+            totals[ballot.choice] += power
+        elif kind == "approval":
+            for c in ballot.choice:
+                totals[c] += power
+        else:
+            for c, share in split_weighted(power, ballot.choice).items():
+                totals[c] += share
+    return totals
+
+
+@pytest.mark.parametrize("kind", ["single", "approval", "weighted"])
+def test_tally_matches_model(electorate, kind):
+    ballots = _ballots(electorate, kind, 200)
+    result = Tally(_census(electorate), kind, 3).run(ballots)
+
+    print(f"\n{kind}: {result.totals}")
+    assert list(result.totals.values()) == _expected(electorate, kind, ballots)
+    assert result.counted == 200
+    assert result.participation == sum(
+        electorate.expected_power(b.voter) for b in ballots
+    )
+
+
+def test_weighted_split_is_exact():
+    assert split_weighted(10, {0: 1, 1: 1, 2: 1}) == {0: 4, 1: 3, 2: 3}
+    assert split_weighted(7, {0: 0, 1: 2}) == {0: 0, 1: 7}
+    rng = random.Random(1)
+    for _ in range(1_000):
+        power = rng.getrandbits(90)
+        weights = {c: rng.randint(0, 10**6) for c in range(rng.randint(1, 5))}
+        weights[0] += 1
+        shares = split_weighted(power, weights)
+        assert sum(shares.values()) == power
+        total = sum(weights.values())
+        assert all(
+            abs(shares[c] - power * w / total) <= 1 + power * 1e-12
+            for c, w in weights.items()
+        )
+
+
+def test_duplicates_invalid_and_quorum(electorate):
+    voters = electorate.voters[:40]
+    ballots = [Ballot(v, 0) for v in voters]
+    ballots += [
+        Ballot(v.upper().replace("0X", "0x"), 1) for v in voters[:5]
+    ]  # re-votes: ignored
+    ballots += [
+        Ballot(voters[0], 3),
+        Ballot(voters[1], True),
+    ]  # duplicates too, never validated
+    ballots += [Ballot("0xnope", 0), Ballot(electorate.voters[40], 3)]
+
+    powers = [electorate.expected_power(v) for v in voters]
+    total_power = sum(electorate.expected_power(v) for v in electorate.voters)
+    census = _census(electorate)
+    result = Tally(
+        census, "single", 3, total_power=total_power, quorum=0.01, chunk_size=16
+    ).run(ballots)
+
+    print(f"\n{json.dumps(result.to_dict(), indent=2)}")
+    assert result.totals == {0: sum(powers), 1: 0, 2: 0}
+    assert (result.ballots, result.counted, result.duplicates, result.invalid) == (
+        49,
+        40,
+        7,
+        2,
+    )
+    assert result.zero_power == powers.count(0)
+    assert result.quorum_met == (sum(powers) * 100 >= total_power)
+    assert result.winner == 0
+
+    # Power fetched only for the 40 distinct voters, batched within each chunk
+    assert census.metrics.counters["voters"] == 40
+    assert census.metrics.counters["eth_calls"] == 3
+
+    strict = Tally(
+        _census(electorate), "single", 3, total_power=total_power, quorum=0.99
+    ).run(ballots)
+    assert strict.quorum_met is False
+
+
+def test_chunking_does_not_change_result(electorate):
+    ballots = _ballots(electorate, "weighted", 150, seed=4)
+    ballots += ballots[::7]
+    results = [
+        Tally(_census(electorate), "weighted", 3, chunk_size=size)
+        .run(iter(ballots))
+        .to_dict()
+        for size in (1, 13, 4_096)
+    ]
+    assert results[0] == results[1] == results[2]
+
+
+def test_ballot_files(electorate, tmp_path):
+    voters = electorate.voters[:4]
+    csv_path = tmp_path / "ballots.csv"
+    csv_path.write_text(
+        f"voter,choice\n{voters[0]},0:3;2:1\n{voters[1]},1\n{voters[2]},x\n"
+    )
+    jsonl_path = tmp_path / "ballots.jsonl"
+    jsonl_path.write_text(
+        json.dumps({"voter": voters[0], "choice": {"0": 3, "2": 1}})
+        + "\n"
+        + json.dumps({"voter": voters[1], "choice": {"1": 1}})
+        + "\n"
+    )
+
+    from_csv = Tally(_census(electorate), "weighted", 3).run(read_ballots(csv_path))
+    from_jsonl = Tally(_census(electorate), "weighted", 3).run(read_ballots(jsonl_path))
+    assert from_csv.invalid == 2  # `1` is not a weighted ballot, `x` is unparsable
+    assert from_jsonl.counted == 2
+    assert from_jsonl.totals[0] + from_jsonl.totals[2] == electorate.expected_power(
+        voters[0]
+    )
+
+    # Approval rows approving a single choice count like any other
+    approval_path = tmp_path / "approval.csv"
+    approval_path.write_text(
+        f"voter,choice\n{voters[0]},2\n{voters[1]},0;1\n{voters[2]},1\n{voters[3]},x\n"
+    )
+    approvals = Tally(_census(electorate), "approval", 3).run(
+        read_ballots(approval_path, "approval")
+    )
+    assert (approvals.counted, approvals.invalid) == (3, 1)
+    power = [electorate.expected_power(v) for v in voters[:3]]
+    assert approvals.totals == {0: power[1], 1: power[1] + power[2], 2: power[0]}
+    # A kind-agnostic read gives a bare int, which approval ballots accept too
+    assert (
+        Tally(_census(electorate), "approval", 3)
+        .run(read_ballots(approval_path))
+        .to_dict()
+        == approvals.to_dict()
+    )
+
+    powers = tmp_path / "powers.csv"
+    powers.write_text(f"address,power\n{voters[0]},5\n{voters[1]},7\n")
+    assert total_power_from_csv(powers) == 12
+
+
+class ModelPower:
+    """Census stand-in that prices voters off their address, for volume tests"""
+
+    def __init__(self):
+        self.scored = 0
+
+    def score(self, voters):
+        self.scored += len(voters)
+        return [int(v[-6:], 16) * 10**12 for v in voters]
+
+
+def _stream(n, voters, seed=0):
+    rng = random.Random(seed)
+    pool = [f"0x{rng.getrandbits(160):040x}" for _ in range(voters)]
+    for i in range(n):
+        yield Ballot(pool[i % voters], {0: rng.randint(1, 9), 1: rng.randint(0, 9)})
+
+
+def test_memory_is_bounded_by_voters_not_ballots():
+    def peak(n):
+        tracemalloc.start()
+        census = ModelPower()
+        start = time.perf_counter()
+        result = Tally(census, "weighted", 2, chunk_size=1_024).run(
+            _stream(n, voters=2_000)
+        )
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"\n{n:>7,} ballots: peak {peak / 2**20:.2f} MiB, {n / elapsed:,.0f} ballots/s"
+        )
+        assert census.scored == 2_000
+        assert result.duplicates == n - 2_000
+        return peak
+
+    small, large = peak(20_000), peak(200_000)
+    assert large < small * 1.5
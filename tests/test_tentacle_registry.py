@@ -0,0 +1,229 @@
+import boa
+import pytest
+
+from scripts import mocks
+
+DUST_THRESHOLD = 10_000_000
+HOLDER = "0x00000000000000000000000000000000DeaDBeef"
+ZERO_ADDRESS = mocks.ZERO_ADDRESS
+
+
+@pytest.fixture
+def build_census(env, mock_squid, mock_pools):
+    def _build(n, one_pool=False):
+        tentacles, wrappers = mocks.deploy_wrappers(mock_squid, mock_pools, n, one_pool)
+        census = mocks.deploy_census(mock_squid, mock_pools, tentacles)
+        return census, tentacles, wrappers
+
+    return _build
+
+
+def expected_power(addr, mock_squid, tentacles, wrappers, pools):
+    """Reference valuation mirroring the pre-registry contract logic"""
+    total = mock_squid.balanceOf(addr)
+    lp_per_pool = {}
+    for (token, pool, index), wrapper in zip(tentacles[1:], wrappers):
+        lp_per_pool.setdefault((pool, index), 0)
+        lp_per_pool[(pool, index)] += wrapper.balanceOf(addr)
+
+    for (pool, index), bal in lp_per_pool.items():
+        if bal < DUST_THRESHOLD:
+            continue
+        rate = pools[pool].calc_withdraw_one_coin(bal, index) * 10**18 // bal
+        total += bal * rate // 10**18
+    return total
+
+
+def test_nine_tentacle_layout(build_census, mock_squid, mock_pools):
+    census, tentacles, wrappers = build_census(9)
+    squid_eth, squill_squid, _ = mock_pools
+
+    assert census.tentacle_count() == 9
+    assert census.lp_pool_count() == 2
+    assert census.lp_pools(0) == (squid_eth.address, 1)
+    assert census.lp_pools(1) == (squill_squid.address, 0)
+
+    mock_squid._mint_for_testing(HOLDER, 1_000 * 10**18)
+    for i, wrapper in enumerate(wrappers):
+        wrapper._mint_for_testing(HOLDER, (i + 1) * 10**18)
+
+    pools = {squid_eth.address: squid_eth, squill_squid.address: squill_squid}
+    expected = expected_power(HOLDER, mock_squid, tentacles, wrappers, pools)
+    assert census.balanceOf(HOLDER) == expected
+
+    # Component views still add up to the total
+    assert census.squid_balance(HOLDER) == 1_000 * 10**18
+    assert census.squid_lp_balance(HOLDER) == (1 + 3 + 5 + 7) * 10**18
+    assert census.squill_lp_balance(HOLDER) == (2 + 4 + 6 + 8) * 10**18
+    assert census.balanceOf(HOLDER) == (
+        census.squid_balance(HOLDER)
+        + census.squid_lp_balance_in_squid(HOLDER)
+        + census.squill_lp_balance_in_squid(HOLDER)
+    )
+
+
+@pytest.mark.parametrize("n", range(1, 17))
+def test_balance_matches_reference(build_census, mock_squid, mock_pools, n):
+    census, tentacles, wrappers = build_census(n)
+    squid_eth, squill_squid, _ = mock_pools
+    pools = {squid_eth.address: squid_eth, squill_squid.address: squill_squid}
+
+    mock_squid._mint_for_testing(HOLDER, 42 * 10**18)
+    for i, wrapper in enumerate(wrappers):
+        wrapper._mint_for_testing(HOLDER, 10**17 * (i + 1))
+
+    assert census.tentacle_count() == n
+    assert census.balanceOf(HOLDER) == expected_power(
+        HOLDER, mock_squid, tentacles, wrappers, pools
+    )
+    assert census.balanceOf(ZERO_ADDRESS) == 0
+
+
+def test_dust_is_grouped_per_pool(build_census, mock_squid, mock_pools):
+    """Dust in several wrappers of one pool counts once it crosses the threshold"""
+    census, _, wrappers = build_census(5, one_pool=True)
+
+    for wrapper in wrappers:
+        wrapper._mint_for_testing(HOLDER, DUST_THRESHOLD // 4 - 1)
+    assert census.squid_lp_balance(HOLDER) < DUST_THRESHOLD
+    assert census.balanceOf(HOLDER) == 0
+
+    wrappers[0]._mint_for_testing(HOLDER, 4)
+    assert census.squid_lp_balance(HOLDER) >= DUST_THRESHOLD
+    assert census.balanceOf(HOLDER) == census.squid_lp_balance_in_squid(HOLDER)
+
+
+def test_add_and_remove_tentacle(build_census, mock_pools):
+    census, _, wrappers = build_census(3)
+    squid_eth, _, _ = mock_pools
+
+    vault = mocks.deploy_token("New Vault", "VAULT")
+    vault._mint_for_testing(HOLDER, 10**18)
+    before = census.balanceOf(HOLDER)
+
+    census.add_tentacle((vault.address, squid_eth.address, 1))
+    assert census.tentacle_count() == 4
+    assert census.lp_pool_count() == 2
+    assert census.balanceOf(HOLDER) > before
+
+    census.remove_tentacle(vault.address)
+    assert census.tentacle_count() == 3
+    assert census.balanceOf(HOLDER) == before
+    assert [census.tentacles(i)[0] for i in range(1, 3)] == [
+        w.address for w in wrappers
+    ]
+
+
+def test_pool_group_goes_with_last_wrapper(build_census, mock_squid, mock_pools):
+    census, _, wrappers = build_census(3)
+    squid_eth, squill_squid, _ = mock_pools
+    mock_squid._mint_for_testing(HOLDER, 10**18)
+    for wrapper in wrappers:
+        wrapper._mint_for_testing(HOLDER, 10**18)
+    squill_value = census.squill_lp_balance_in_squid(HOLDER)
+
+    # Dropping SQUID/ETH's only wrapper drops its group; SQUID/SQUILL moves to id 0
+    census.remove_tentacle(wrappers[0].address)
+    assert census.lp_pool_count() == 1
+    assert census.lp_pools(0) == (squill_squid.address, 0)
+    assert census.squid_lp_balance_in_squid(HOLDER) == 0
+    assert census.squill_lp_balance_in_squid(HOLDER) == squill_value
+    assert census.balanceOf(HOLDER) == 10**18 + squill_value
+
+    # Add/remove cycles over fresh pools never fill MAX_POOLS
+    other = mocks.deploy_token("Other", "OTHER")
+    for i in range(20):
+        pool = boa.load(
+            mocks.TWOCRYPTO_PATH,
+            [other.address, mock_squid.address],
+            [10**18, 10**18],
+            10**18,
+            10**18,
+        )
+        vault = mocks.deploy_token(f"Vault {i}", f"V{i}")
+        census.add_tentacle((vault.address, pool.address, 1))
+        assert census.lp_pool_count() == 2
+        census.remove_tentacle(vault.address)
+        assert census.lp_pool_count() == 1
+
+    census.add_tentacle((wrappers[0].address, squid_eth.address, 1))
+    assert census.lp_pools(1) == (squid_eth.address, 1)
+    assert census.balanceOf(
+        HOLDER
+    ) == 10**18 + squill_value + census.squid_lp_balance_in_squid(HOLDER)
+
+
+def test_registry_guards(build_census, mock_squid, mock_pools):
+    census, _, wrappers = build_census(3)
+    squid_eth, squill_squid, _ = mock_pools
+    vault = mocks.deploy_token("New Vault", "VAULT")
+
+    with boa.env.prank(HOLDER), boa.reverts("Only owner"):
+        census.add_tentacle((vault.address, squid_eth.address, 1))
+    with boa.env.prank(HOLDER), boa.reverts("Only owner"):
+        census.remove_tentacle(wrappers[0].address)
+
+    with boa.reverts("Duplicate tentacle"):
+        census.add_tentacle((wrappers[0].address, squid_eth.address, 1))
+
+    # SQUID index sanity check or burn it all
+    with boa.reverts():
+        census.add_tentacle((vault.address, squid_eth.address, 0))
+
+    with boa.reverts("Unknown tentacle"):
+        census.remove_tentacle(vault.address)
+
+
+def test_registry_capacity(build_census, mock_pools):
+    census, _, _ = build_census(16)
+    squid_eth, _, _ = mock_pools
+    vault = mocks.deploy_token("New Vault", "VAULT")
+
+    with boa.reverts("Too many tentacles"):
+        census.add_tentacle((vault.address, squid_eth.address, 1))
+
+
+def test_transfer_ownership(build_census, mock_pools):
+    census, _, _ = build_census(2)
+    squid_eth, _, _ = mock_pools
+    vault = mocks.deploy_token("New Vault", "VAULT")
+
+    census.transfer_ownership(HOLDER)
+    assert census.owner() == HOLDER
+    with boa.reverts("Only owner"):
+        census.add_tentacle((vault.address, squid_eth.address, 1))
+    with boa.env.prank(HOLDER):
+        census.add_tentacle((vault.address, squid_eth.address, 1))
+
+
+def test_gas_per_tentacle_is_flat():
+    """
+    Benchmark balanceOf gas for 1..16 tentacles sharing one pool.
+    The marginal cost of each extra tentacle should not grow with registry size.
+    Runs in its own env so access counters can be reset to cold before each call.
+    """
+    gas_used = {}
+    with boa.swap_env(boa.Env()):
+        squid = mocks.deploy_token("Squid", "SQUID")
+        pools = mocks.deploy_mock_pools(squid)
+        squid._mint_for_testing(HOLDER, 10**18)
+
+        for n in range(1, 17):
+            tentacles, wrappers = mocks.deploy_wrappers(squid, pools, n, one_pool=True)
+            census = mocks.deploy_census(squid, pools, tentacles)
+            for wrapper in wrappers:
+                wrapper._mint_for_testing(HOLDER, 10**18)
+
+            boa.env.reset_gas_used()
+            census.balanceOf(HOLDER)
+            gas_used[n] = census._computation.net_gas_used
+
+    print(f"\n{'Tentacles':<12} {'Gas':<10} {'Marginal'}")
+    print("-" * 32)
+    for n in range(1, 17):
+        marginal = gas_used[n] - gas_used[n - 1] if n > 1 else 0
+        print(f"{n:<12} {gas_used[n]:<10,} {marginal:,}")
+
+    # n=1 -> 2 adds the pool valuation; per-source cost is measured from there
+    deltas = [gas_used[n] - gas_used[n - 1] for n in range(3, 17)]
+    assert max(deltas) - min(deltas) <= max(deltas) * 0.05, deltas